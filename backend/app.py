@@ -2,12 +2,29 @@
 import os
 from flask import Flask, jsonify
 from flask_cors import CORS
-from extensions import db, migrate, jwt
+from extensions import db, migrate, jwt, sqlite_engine_options, install_sqlite_profile
 from config import Config
+from services.audit_service import audit_writer
+from services.notification_service import notification_dispatcher
+from services.token_blocklist import revocation_index
+from services.job_queue import job_queue
+from services.write_lane import write_lane
+from services.metrics import request_metrics
+from services.rate_limit import rate_limiter
+from services.idempotency import idempotency_store
+from services.progress import progress_hub
+from services.scheduler import scheduler
+from services.maintenance import register_maintenance_tasks
+from services.backup_service import backup_stats
+from services.telegram_auth import telegram_user_cache
+from services.settings_service import settings_cache
+from services.results_cache import results_cache
+from services.eligibility import eligibility_index
+from services.pagination import InvalidCursor
 from routes import (
     auth_bp, users_bp, sessions_bp,
     participants_bp, votes_bp, results_bp,
-    settings_bp, audit_bp
+    settings_bp, audit_bp, export_bp, jobs_bp, analytics_bp, backups_bp
 )
 
 def create_app(test_config=None):
@@ -21,9 +38,25 @@ def create_app(test_config=None):
 
     # Инициализация расширений
     CORS(app, resources={r"/api/*": {"origins": "*"}})
+    # профиль SQLite: пул, WAL и PRAGMA на каждое соединение (extensions.install_sqlite_profile)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**sqlite_engine_options(app.config),
+                                               **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_profile(db.engine, app.config)
+        request_metrics.instrument_engine(db.engine)
+    write_lane.init_app(app)
+    request_metrics.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    audit_writer.init_app(app)
+    notification_dispatcher.init_app(app)
+    revocation_index.init_app(app)
+    job_queue.init_app(app)
+    rate_limiter.init_app(app)
+    idempotency_store.init_app(app)
+    scheduler.init_app(app)
+    register_maintenance_tasks(scheduler, app.config)
 
     # Создание базы SQLite, если файла нет
     db_file = app.config.get("DB_FILE")
@@ -41,6 +74,27 @@ def create_app(test_config=None):
     app.register_blueprint(results_bp, url_prefix="/api/v1/results")
     app.register_blueprint(settings_bp, url_prefix="/api/v1/settings")
     app.register_blueprint(audit_bp, url_prefix="/api/v1/audit")
+    app.register_blueprint(export_bp, url_prefix="/api/v1/export")
+    app.register_blueprint(jobs_bp, url_prefix="/api/v1/jobs")
+    app.register_blueprint(analytics_bp, url_prefix="/api/v1/analytics")
+    app.register_blueprint(backups_bp, url_prefix="/api/v1/admin/backup")
+
+    # счётчики подсистем в /metrics
+    with app.app_context():
+        for name, stats in {"audit": audit_writer.stats, "notify": notification_dispatcher.stats,
+                            "jobs": job_queue.stats, "write_lane": write_lane.stats,
+                            "revocation": revocation_index.stats, "backup": backup_stats,
+                            "telegram_user_cache": telegram_user_cache.stats,
+                            "settings_cache": settings_cache().stats, "results_cache": results_cache().stats,
+                            "eligibility": eligibility_index().stats, "rate_limit": rate_limiter.stats,
+                            "idempotency": idempotency_store.stats, "progress": progress_hub.stats}.items():
+            request_metrics.register_source(name, stats)
+        for name, task in scheduler.tasks.items():
+            request_metrics.register_source(f"scheduler_{name}", task.stats)
+
+    @app.errorhandler(InvalidCursor)
+    def invalid_cursor(e):
+        return jsonify({"status":"error","message": f"Invalid pagination parameter: {e}"}), 400
 
     @app.route("/")
     def index():
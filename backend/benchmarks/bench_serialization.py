@@ -0,0 +1,48 @@
+"""Стоимость сериализации списка на строку: ORM + to_dict + jsonify против проекции + orjson.
+
+Запуск из backend/:  python -m benchmarks.bench_serialization [rows]
+"""
+import sys, time
+from datetime import datetime
+from flask import Flask, jsonify
+from sqlalchemy import insert
+from extensions import db
+from models import AuditLog, User
+from services.serialization import AUDIT_LOG, USER
+
+
+def build_app(rows):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        now = datetime.utcnow()
+        db.session.execute(insert(User), [{"user_id": i, "name": f"Пользователь {i}", "email": f"u{i}@example.com",
+                                           "telegram_id": 10_000 + i, "role": "user", "active": True,
+                                           "created_at": now, "updated_at": now} for i in range(1, rows + 1)])
+        db.session.execute(insert(AuditLog), [{"user_id": i, "action": "vote_submitted", "details": {"count": i % 7},
+                                               "session_id": 1, "timestamp": now} for i in range(1, rows + 1)])
+        db.session.commit()
+    return app
+
+
+def measure(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+        db.session.expunge_all()
+    return best
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app = build_app(rows)
+    with app.test_request_context():
+        for name, model, projection in (("users", User, USER), ("audit_log", AuditLog, AUDIT_LOG)):
+            orm = measure(lambda: jsonify([o.to_dict() for o in model.query.all()]).get_data())
+            proj = measure(lambda: projection.dumps(projection.query(db.session).all()))
+            print(f"{name:<10} rows={rows}  orm+to_dict+jsonify {orm / rows * 1e6:6.2f} us/row  "
+                  f"projection+orjson {proj / rows * 1e6:6.2f} us/row  x{orm / proj:.1f}")
@@ -0,0 +1,77 @@
+"""Конкурентная запись голосов в файловую SQLite: пропускная способность и ошибки блокировок.
+
+Три режима на одной и той же нагрузке (THREADS потоков по OPS_PER_THREAD бюллетеней):
+  baseline — настройки по умолчанию (rollback journal, synchronous=FULL, без busy_timeout);
+  profile  — extensions.install_sqlite_profile (WAL, synchronous=NORMAL, busy_timeout, mmap);
+  lane     — profile + services/write_lane.WriteLane (групповой commit).
+
+Запуск из backend/:  python -m benchmarks.bench_sqlite_writes [threads] [ops_per_thread]
+"""
+import os, sys, tempfile, threading, time
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from extensions import db, sqlite_engine_options, install_sqlite_profile
+import models  # noqa: F401 — регистрирует таблицы
+from services.write_lane import WriteLane
+from routes.votes import _save_ballot
+
+TARGETS = 20
+
+
+def build_app(path, mode):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}", SQLITE_WRITE_LANE=(mode == "lane"))
+    if mode == "baseline":
+        # без busy_timeout драйвер ждёт блокировку 5 с по умолчанию — оставляем как в исходной конфигурации
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"check_same_thread": False}}
+    else:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options(app.config)
+    db.init_app(app)
+    with app.app_context():
+        if mode != "baseline":
+            install_sqlite_profile(db.engine, app.config)
+        db.create_all()
+    lane = WriteLane()
+    lane.init_app(app)
+    return app, lane
+
+
+def run(mode, threads, ops_per_thread):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app, lane = build_app(path, mode)
+    errors = []
+
+    def worker(voter_id):
+        with app.app_context():
+            for i in range(ops_per_thread):
+                ballot = {t: (voter_id + i + t) % 11 for t in range(1, 6)}
+                try:
+                    lane.run(_save_ballot, 1, voter_id, {(t + i) % TARGETS + 1: s for t, s in ballot.items()})
+                except OperationalError as e:
+                    db.session.rollback()
+                    errors.append(str(e.orig))
+
+    pool = [threading.Thread(target=worker, args=(v,)) for v in range(1, threads + 1)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    lane.close()
+    with app.app_context():
+        db.engine.dispose()
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    total = threads * ops_per_thread
+    return {"mode": mode, "ops": total, "seconds": round(elapsed, 3), "ops_per_s": round((total - len(errors)) / elapsed, 1),
+            "errors": len(errors), "batches": lane.stats["batches"] or None}
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for mode in ("baseline", "profile", "lane"):
+        print(run(mode, threads, ops))
@@ -0,0 +1,288 @@
+"""Нагрузочный прогон API: синтетическая организация + конкурентные клиенты + сравнение с baseline.
+
+Сидирование: пользователи, активная сессия со всеми участниками (и, по желанию, полной матрицей
+голосов), закрытая сессия с рассчитанными результатами. Клиенты — потоки с собственным
+test client Flask (transport=client) или requests к локальному WSGI-серверу (transport=http).
+
+Запуск из backend/:
+  python -m benchmarks.load_test --scale small --save      # записать baseline
+  python -m benchmarks.load_test --scale small --compare   # сравнить; код выхода 1 при регрессии
+
+Baseline имеет смысл только для той машины, где записан: перед сравнением на новом железе
+перезапишите его через --save.
+"""
+import argparse, hashlib, hmac, json, os, platform, random, shutil, sqlite3, sys, tempfile, threading, time, urllib.parse
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import insert
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+SCALES = {
+    "small": {"users": 60, "ballot": 10, "prefill": True, "requests": 300, "concurrency": 8},
+    "medium": {"users": 200, "ballot": 20, "prefill": True, "requests": 1000, "concurrency": 32},
+    "large": {"users": 500, "ballot": 30, "prefill": True, "requests": 3000, "concurrency": 100},
+}
+SCENARIOS = ["submit_votes", "login", "results", "results_live", "sessions_list"]
+TELEGRAM_ID_BASE = 7_000_000
+
+
+def create_bench_app(db_path):
+    from app import create_app
+    from extensions import db
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "DB_FILE": None,
+        "JWT_SECRET_KEY": "bench-secret",
+        "NOTIFY_ASYNC": False,
+        "JOBS_ASYNC": False,
+        # сценарии шлют сотни бюллетеней от одних и тех же пользователей — лимитер их бы резал
+        "RATE_LIMIT_ENABLED": False,
+        # VACUUM/ANALYZE и бэкап по расписанию не должны попадать в замеры
+        "SCHEDULER_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed(app, users, prefill):
+    """Пользователи 1..users, активная сессия с полным составом и закрытая сессия с результатами."""
+    from extensions import db
+    from models import User, Session, SessionParticipant, Vote
+    from services.bonus_calc import calculate_bonus_for_session
+    from services.score_aggregates import rebuild_aggregates
+    rng = random.Random(42)
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.execute(insert(User), [
+            {"user_id": i, "name": f"User {i:05d}", "telegram_id": TELEGRAM_ID_BASE + i, "role": "user",
+             "active": True, "created_at": now, "updated_at": now} for i in range(1, users + 1)])
+        active, closed = 1, 2
+        db.session.execute(insert(Session), [
+            {"session_id": active, "start_date": date.today(), "end_date": date.today(), "active": True,
+             "auto_participants": True, "created_at": now},
+            {"session_id": closed, "start_date": date.today(), "end_date": date.today(), "active": False,
+             "auto_participants": True, "created_at": now}])
+        db.session.execute(insert(SessionParticipant), [
+            {"session_id": sid, "user_id": u, "can_vote": True, "can_receive_votes": True, "status": "active",
+             "created_at": now, "updated_at": now} for sid in (active, closed) for u in range(1, users + 1)])
+        # полная матрица голосов (каждый за каждого) — как в конце реальной недели голосования
+        matrix_sessions = (active, closed) if prefill else (closed,)
+        for sid in matrix_sessions:
+            rows = [{"session_id": sid, "voter_id": v, "target_id": t, "score": rng.randint(0, 10),
+                     "created_at": now, "updated_at": now}
+                    for v in range(1, users + 1) for t in range(1, users + 1) if v != t]
+            for start in range(0, len(rows), 5000):
+                db.session.execute(insert(Vote), rows[start:start + 5000])
+        db.session.commit()
+        for sid in matrix_sessions:
+            rebuild_aggregates(sid)
+        calculate_bonus_for_session(closed)
+    return active, closed
+
+
+def signed_init_data(bot_token, telegram_id, nonce):
+    fields = {"auth_date": str(int(time.time())), "query_id": nonce,
+              "user": json.dumps({"id": telegram_id, "first_name": "Bench"})}
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode(fields)
+
+
+def build_requests(scenario, n, users, ballot, active, closed, tokens, bot_token, tag="run"):
+    rng = random.Random(f"{scenario}-{tag}")
+    out = []
+    for i in range(n):
+        voter = rng.randint(1, users)
+        headers = {"Authorization": f"Bearer {tokens[voter]}"}
+        if scenario == "submit_votes":
+            targets = rng.sample([u for u in range(1, users + 1) if u != voter], min(ballot, users - 1))
+            body = {"session_id": active, "votes": [{"target_id": t, "score": rng.randint(0, 10)} for t in targets]}
+            out.append(("POST", "/api/v1/votes/", body, headers))
+        elif scenario == "login":
+            out.append(("POST", "/api/v1/auth/telegram",
+                        {"init_data": signed_init_data(bot_token, TELEGRAM_ID_BASE + voter, f"{scenario}-{tag}-{i}")}, {}))
+        elif scenario == "results":
+            out.append(("GET", f"/api/v1/results/{closed}", None, headers))
+        elif scenario == "results_live":
+            out.append(("GET", f"/api/v1/results/{active}/live", None, headers))
+        elif scenario == "sessions_list":
+            out.append(("GET", "/api/v1/sessions/?limit=50", None, headers))
+    return out
+
+
+class _ClientTransport:
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+        return lambda method, path, body, headers: client.open(path, method=method, json=body, headers=headers).status_code
+
+    def close(self):
+        pass
+
+
+class _HttpTransport:
+    def __init__(self, app):
+        import requests
+        from werkzeug.serving import make_server, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self._requests = requests
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def session(self):
+        http = self._requests.Session()
+        return lambda method, path, body, headers: http.request(method, self.base_url + path, json=body,
+                                                               headers=headers, timeout=60).status_code
+
+    def close(self):
+        self.server.shutdown()
+
+
+def drive(transport, requests_, concurrency):
+    """Гоняет запросы в `concurrency` потоков; возвращает (латентности в мс, число ошибок, секунды)."""
+    latencies = np.zeros(len(requests_))
+    errors = [0] * concurrency
+    cursor = iter(range(len(requests_)))
+    lock = threading.Lock()
+
+    def worker(slot):
+        send = transport.session()
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                status = send(*requests_[i])
+            except Exception:
+                status = 599
+            latencies[i] = (time.perf_counter() - started) * 1000
+            if status >= 400:
+                errors[slot] += 1
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, sum(errors), time.perf_counter() - started
+
+
+def summarize(latencies, errors, seconds):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+    return {"requests": len(latencies), "errors": errors, "throughput_rps": round(len(latencies) / seconds, 1),
+            "mean_ms": round(float(latencies.mean()), 2) if len(latencies) else 0,
+            "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+
+
+def compare(report, baseline, tolerance, min_delta_ms=20.0):
+    """Список регрессий: p95 выросла или пропускная способность упала больше чем на tolerance.
+
+    Рост p95 меньше min_delta_ms не считается — на быстрых эндпоинтах это шум планировщика.
+    """
+    regressions = []
+    for name, base in baseline.get("endpoints", {}).items():
+        cur = report["endpoints"].get(name)
+        if cur is None:
+            continue
+        if cur["p95_ms"] > base["p95_ms"] * (1 + tolerance) and cur["p95_ms"] - base["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {cur['p95_ms']} ms")
+        if cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {cur['throughput_rps']} rps")
+        if cur["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {cur['errors']}")
+    return regressions
+
+
+def run(scale="small", transport="client", scenarios=None, concurrency=None, requests_per_scenario=None):
+    params = dict(SCALES[scale])
+    concurrency = concurrency or params["concurrency"]
+    n = requests_per_scenario or params["requests"]
+    # verify_telegram_init_data проверяет подпись токеном из Config
+    from config import Config
+    bot_token = Config.TELEGRAM_BOT_TOKEN
+    tmpdir = tempfile.mkdtemp(prefix="smart_bonus_bench_")
+    app = create_bench_app(os.path.join(tmpdir, "bench.db"))
+    active, closed = seed(app, params["users"], params["prefill"])
+
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        tokens = {u: create_access_token(identity=u) for u in range(1, params["users"] + 1)}
+
+    driver = _HttpTransport(app) if transport == "http" else _ClientTransport(app)
+    report = {"meta": {"scale": scale, "transport": transport, "concurrency": concurrency,
+                       "users": params["users"], "ballot": params["ballot"],
+                       "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                       "created_at": datetime.utcnow().isoformat()},
+              "endpoints": {}}
+    try:
+        for scenario in scenarios or SCENARIOS:
+            args = (params["users"], params["ballot"], active, closed, tokens, bot_token)
+            # прогрев (кэши, пул соединений) в статистику не идёт
+            drive(driver, build_requests(scenario, concurrency * 2, *args, tag="warmup"), concurrency)
+            reqs = build_requests(scenario, n, *args)
+            report["endpoints"][scenario] = summarize(*drive(driver, reqs, concurrency))
+    finally:
+        driver.close()
+        from services.audit_service import audit_writer
+        from services.job_queue import job_queue
+        from extensions import db
+        audit_writer.close()
+        job_queue.close()
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--transport", choices=["client", "http"], default="client")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--save", action="store_true", help="записать отчёт как baseline")
+    parser.add_argument("--compare", action="store_true", help="сравнить с baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--min-delta-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    report = run(args.scale, args.transport, args.scenario, args.concurrency, args.requests)
+    print(f"{'endpoint':<15}{'req':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, s in report["endpoints"].items():
+        print(f"{name:<15}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}")
+
+    path = os.path.join(BASELINE_DIR, f"{args.scale}-{args.transport}.json")
+    if args.compare:
+        if not os.path.exists(path):
+            print(f"no baseline at {path}")
+            return 2
+        with open(path) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_delta_ms)
+        for r in regressions:
+            print("REGRESSION", r)
+        if regressions:
+            return 1
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,15 +11,97 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Профиль SQLite (extensions.install_sqlite_profile) и очередь записи (services/write_lane.WriteLane)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "10"))
+    SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "20"))
+    SQLITE_WRITE_LANE = os.getenv("SQLITE_WRITE_LANE", "false").lower() == "true"
+    WRITE_LANE_BATCH_SIZE = int(os.getenv("WRITE_LANE_BATCH_SIZE", "64"))
+
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt-secret-key")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    REVOCATION_POLL_INTERVAL = float(os.getenv("REVOCATION_POLL_INTERVAL", "2.0"))
+    REVOCATION_BLOOM_THRESHOLD = int(os.getenv("REVOCATION_BLOOM_THRESHOLD", "10000"))
 
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "8266839851:AAHKbgpKR_EtDgVqPC2ww2V_tXkI-KsHfl4")
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+    TELEGRAM_AUTH_MAX_AGE = int(os.getenv("TELEGRAM_AUTH_MAX_AGE", "86400"))
+    TELEGRAM_USER_CACHE_SIZE = int(os.getenv("TELEGRAM_USER_CACHE_SIZE", "10000"))
+    # сброс кэша при изменении пользователя виден только своему воркеру — остальные ждут TTL
+    TELEGRAM_USER_CACHE_TTL = float(os.getenv("TELEGRAM_USER_CACHE_TTL", "60"))
+    USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "2000"))
+
+    # Outbox уведомлений (services/notification_service.NotificationDispatcher)
+    NOTIFY_ASYNC = os.getenv("NOTIFY_ASYNC", "true").lower() == "true"
+    NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+    NOTIFY_GLOBAL_RATE = float(os.getenv("NOTIFY_GLOBAL_RATE", "30"))
+    NOTIFY_PER_CHAT_RATE = float(os.getenv("NOTIFY_PER_CHAT_RATE", "1"))
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+
+    # Фоновые задачи: закрытие сессии и пересчёт (services/job_queue.JobQueue)
+    JOBS_ASYNC = os.getenv("JOBS_ASYNC", "true").lower() == "true"
+    JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+    JOBS_STALE_AFTER = int(os.getenv("JOBS_STALE_AFTER", "1800"))
+    JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+    JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", "5.0"))
+
+    # Лимит запросов на пользователя и Idempotency-Key (services/rate_limit, services/idempotency)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "1"))
+    RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "3600"))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
 
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+    # Метрики запросов и SQL (services/metrics.RequestMetrics, GET /metrics)
+    METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "false").lower() == "true"
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "10"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+    # Кэш system_settings (services/settings_service.SettingsCache)
+    SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "60"))
+    SETTINGS_VERSION_CHECK_INTERVAL = float(os.getenv("SETTINGS_VERSION_CHECK_INTERVAL", "1.0"))
+    RESULTS_CACHE_CHECK_INTERVAL = float(os.getenv("RESULTS_CACHE_CHECK_INTERVAL", "30"))
+    ELIGIBILITY_CHECK_INTERVAL = float(os.getenv("ELIGIBILITY_CHECK_INTERVAL", "2"))
+    # SSE прогресса голосования (services/progress.ProgressHub)
+    PROGRESS_HEARTBEAT = float(os.getenv("PROGRESS_HEARTBEAT", "15"))
+    PROGRESS_RESYNC_INTERVAL = float(os.getenv("PROGRESS_RESYNC_INTERVAL", "30"))
+    # срок токена для ?jwt= стрима прогресса: проверяется при подключении, открытый стрим не рвёт
+    PROGRESS_STREAM_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("PROGRESS_STREAM_TOKEN_EXPIRES", "60")))
+
     BACKUP_ENABLED = os.getenv("BACKUP_ENABLED", "true").lower() == "true"
     BACKUP_SCHEDULE = os.getenv("BACKUP_SCHEDULE", "0 2 * * *")
     BACKUP_RETENTION_DAYS = int(os.getenv("BACKUP_RETENTION_DAYS", "30"))
+    BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+    BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "zstd")  # zstd (если установлен zstandard) | gzip
+    BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+    BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.005"))
+
+    # Планировщик обслуживания (services/scheduler, services/maintenance); пустое расписание — задача выключена
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_TICK = float(os.getenv("SCHEDULER_TICK", "30"))
+    AUTH_CLEANUP_SCHEDULE = os.getenv("AUTH_CLEANUP_SCHEDULE", "*/30 * * * *")
+    DB_ANALYZE_SCHEDULE = os.getenv("DB_ANALYZE_SCHEDULE", "15 3 * * *")
+    DB_VACUUM_SCHEDULE = os.getenv("DB_VACUUM_SCHEDULE", "45 3 * * 0")
+    AUDIT_ARCHIVE_SCHEDULE = os.getenv("AUDIT_ARCHIVE_SCHEDULE", "30 2 * * *")
+    MAINTENANCE_DELETE_BATCH_SIZE = int(os.getenv("MAINTENANCE_DELETE_BATCH_SIZE", "1000"))
+
+    # Буферизованный аудит (services/audit_service.AuditWriter)
+    AUDIT_ASYNC = os.getenv("AUDIT_ASYNC", "true").lower() == "true"
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+    AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "sync")  # sync | drop
+    # Хранение аудита: старые записи — в сжатые сегменты (services/audit_archive)
+    AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+    AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "audit_archive")  # относительный путь — от instance/
+    AUDIT_ARCHIVE_BATCH_SIZE = int(os.getenv("AUDIT_ARCHIVE_BATCH_SIZE", "5000"))
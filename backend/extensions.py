@@ -1,7 +1,53 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from sqlalchemy import event
 
 db = SQLAlchemy()
 jwt = JWTManager()
 migrate = Migrate()
+
+# BIGINT PRIMARY KEY в SQLite не является алиасом rowid и не автоинкрементируется
+BigIntPK = db.BigInteger().with_variant(db.Integer(), "sqlite")
+
+
+def _is_sqlite_file(uri):
+    return uri.startswith("sqlite") and ":memory:" not in uri and uri not in ("sqlite://", "sqlite:///")
+
+
+def sqlite_engine_options(config):
+    """Параметры пула для файловой SQLite; для :memory: Flask-SQLAlchemy сам ставит StaticPool."""
+    if not _is_sqlite_file(config.get("SQLALCHEMY_DATABASE_URI", "")):
+        return {}
+    return {
+        "pool_size": config.get("SQLITE_POOL_SIZE", 10),
+        "max_overflow": config.get("SQLITE_MAX_OVERFLOW", 20),
+        "pool_timeout": config.get("SQLITE_POOL_TIMEOUT", 30),
+        "connect_args": {"timeout": config.get("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000, "check_same_thread": False},
+    }
+
+
+def install_sqlite_profile(engine, config):
+    """PRAGMA на каждое новое соединение SQLite: WAL, synchronous=NORMAL, busy_timeout, кэш и mmap.
+
+    Транзакциями по-прежнему управляет pysqlite (BEGIN перед первым DML): чтения до записи идут
+    без снимка, поэтому запись ждёт блокировку по busy_timeout, а не падает на апгрейде
+    read→write. Явный BEGIN IMMEDIATE выдаёт только очередь записи (services/write_lane).
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = [
+        ("journal_mode", config.get("SQLITE_JOURNAL_MODE", "WAL")),
+        ("synchronous", config.get("SQLITE_SYNCHRONOUS", "NORMAL")),
+        ("busy_timeout", config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        ("cache_size", config.get("SQLITE_CACHE_SIZE", -64000)),  # отрицательное — в KiB
+        ("mmap_size", config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        ("temp_store", "MEMORY"),
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
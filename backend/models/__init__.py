@@ -6,3 +6,7 @@ from .result import Result
 from .auth import AuthSession, RevokedToken
 from .audit import AuditLog
 from .settings import SystemSetting
+from .aggregate import ScoreAggregate
+from .notification import NotificationOutbox
+from .job import Job, ScheduledTask
+from .analytics import SessionSummary, UserSessionHistory
@@ -0,0 +1,26 @@
+from extensions import db
+from datetime import datetime
+
+class ScoreAggregate(db.Model):
+    __tablename__ = "score_aggregates"
+
+    session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), primary_key=True)
+    target_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    score_sum = db.Column(db.BigInteger, default=0, nullable=False)
+    vote_count = db.Column(db.Integer, default=0, nullable=False)
+    min_score = db.Column(db.SmallInteger)
+    max_score = db.Column(db.SmallInteger)
+    histogram = db.Column(db.JSON, default=dict, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "target_id": self.target_id,
+            "score_sum": self.score_sum,
+            "vote_count": self.vote_count,
+            "min_score": self.min_score,
+            "max_score": self.max_score,
+            "average_score": round(self.score_sum / self.vote_count, 2) if self.vote_count else None,
+            "histogram": self.histogram
+        }
@@ -0,0 +1,40 @@
+from extensions import db
+from datetime import datetime
+
+class SessionSummary(db.Model):
+    """Итоги закрытой сессии для сравнительной аналитики (wiki 8.4); заполняется services/analytics."""
+    __tablename__ = "session_summaries"
+
+    session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), primary_key=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    participants_count = db.Column(db.Integer, default=0, nullable=False)
+    eligible_voters = db.Column(db.Integer, default=0, nullable=False)
+    voters_count = db.Column(db.Integer, default=0, nullable=False)
+    participation_rate = db.Column(db.Numeric(5,4))
+    votes_count = db.Column(db.Integer, default=0, nullable=False)
+    average_score = db.Column(db.Numeric(5,2))
+    total_bonus = db.Column(db.Numeric(15,2))
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("idx_session_summaries_start", "start_date", "session_id"),
+    )
+
+class UserSessionHistory(db.Model):
+    """Строка истории сотрудника по одной сессии: оценки, место, премия и своё участие."""
+    __tablename__ = "user_session_history"
+
+    user_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), primary_key=True)
+    start_date = db.Column(db.Date, nullable=False)
+    average_score = db.Column(db.Numeric(5,2))
+    rank = db.Column(db.Integer)
+    total_bonus = db.Column(db.Numeric(15,2))
+    votes_received = db.Column(db.Integer, default=0, nullable=False)
+    votes_given = db.Column(db.Integer, default=0, nullable=False)
+    can_vote = db.Column(db.Boolean)
+
+    __table_args__ = (
+        db.Index("idx_user_history_user_start", "user_id", "start_date", "session_id"),
+    )
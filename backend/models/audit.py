@@ -1,10 +1,10 @@
-from extensions import db
+from extensions import db, BigIntPK
 from datetime import datetime
 
 class AuditLog(db.Model):
     __tablename__ = "audit_log"
 
-    log_id = db.Column(db.BigInteger, primary_key=True)
+    log_id = db.Column(BigIntPK, primary_key=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="SET NULL"))
     action = db.Column(db.String(100), nullable=False)
     details = db.Column(db.JSON)
@@ -13,6 +13,14 @@ class AuditLog(db.Model):
     user_agent = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # GET /audit: ORDER BY timestamp DESC, log_id DESC с фильтрами action / user / session
+    __table_args__ = (
+        db.Index("idx_audit_log_timestamp", "timestamp", "log_id"),
+        db.Index("idx_audit_action_time", "action", "timestamp", "log_id"),
+        db.Index("idx_audit_user_time", "user_id", "timestamp", "log_id"),
+        db.Index("idx_audit_session_time", "session_id", "timestamp", "log_id"),
+    )
+
     def to_dict(self):
         return {
             "log_id": self.log_id,
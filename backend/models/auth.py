@@ -18,5 +18,6 @@ class RevokedToken(db.Model):
 
     token_hash = db.Column(db.String(255), primary_key=True)
     user_id = db.Column(db.BigInteger, nullable=False)
-    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime)
     reason = db.Column(db.String(100))
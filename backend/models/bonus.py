@@ -1,10 +1,10 @@
-from extensions import db
+from extensions import db, BigIntPK
 from datetime import datetime
 
 class BonusParameters(db.Model):
     __tablename__ = "bonus_parameters"
 
-    param_id = db.Column(db.BigInteger, primary_key=True)
+    param_id = db.Column(BigIntPK, primary_key=True)
     session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), nullable=False, index=True)
     average_weekly_revenue = db.Column(db.Numeric(15,2))
     participation_multiplier = db.Column(db.Numeric(5,4))
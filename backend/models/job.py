@@ -0,0 +1,77 @@
+from extensions import db, BigIntPK
+from datetime import datetime
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+
+    job_id = db.Column(BigIntPK, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"))
+    status = db.Column(db.String(20), default="queued", nullable=False)  # queued | running | succeeded | failed
+    # ключ дедупликации занят, пока задача в очереди; при захвате воркером сбрасывается в NULL
+    dedupe_key = db.Column(db.String(100), unique=True)
+    payload = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    created_by = db.Column(db.BigInteger, db.ForeignKey("users.user_id"))
+    locked_by = db.Column(db.String(80))
+    # после неудачной попытки задача ждёт в очереди до next_attempt_at (NULL — можно сразу)
+    next_attempt_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index("idx_jobs_status_created", "status", "created_at"),
+        db.Index("idx_jobs_session_status", "session_id", "status"),
+    )
+
+    def to_dict(self):
+        wait_ms = None
+        if self.started_at and self.created_at:
+            wait_ms = int((self.started_at - self.created_at).total_seconds() * 1000)
+        return {
+            "job_id": self.job_id,
+            "job_type": self.job_type,
+            "session_id": self.session_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_by": self.created_by,
+            "created_at": None if not self.created_at else self.created_at.isoformat(),
+            "started_at": None if not self.started_at else self.started_at.isoformat(),
+            "next_attempt_at": None if not self.next_attempt_at else self.next_attempt_at.isoformat(),
+            "finished_at": None if not self.finished_at else self.finished_at.isoformat(),
+            "queue_wait_ms": wait_ms,
+            "duration_ms": self.duration_ms
+        }
+
+class ScheduledTask(db.Model):
+    """Состояние задачи планировщика (services/scheduler); строка — ещё и межпроцессная блокировка запуска."""
+    __tablename__ = "scheduled_tasks"
+
+    name = db.Column(db.String(50), primary_key=True)
+    # время срабатывания cron, которое уже забрал какой-то воркер; повторно его не выполнить
+    last_due = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(80))
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(20))  # running | succeeded | failed
+    last_duration_ms = db.Column(db.Integer)
+    last_result = db.Column(db.JSON)
+    last_error = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "last_due": None if not self.last_due else self.last_due.isoformat(),
+            "last_started_at": None if not self.last_started_at else self.last_started_at.isoformat(),
+            "last_finished_at": None if not self.last_finished_at else self.last_finished_at.isoformat(),
+            "last_status": self.last_status,
+            "last_duration_ms": self.last_duration_ms,
+            "last_result": self.last_result,
+            "last_error": self.last_error
+        }
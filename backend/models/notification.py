@@ -0,0 +1,31 @@
+from extensions import db, BigIntPK
+from datetime import datetime
+
+class NotificationOutbox(db.Model):
+    __tablename__ = "notification_outbox"
+
+    notification_id = db.Column(BigIntPK, primary_key=True)
+    chat_id = db.Column(db.BigInteger, nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default="pending", nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(36))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index("idx_outbox_status_due", "status", "next_attempt_at"),)
+
+    def to_dict(self):
+        return {
+            "notification_id": self.notification_id,
+            "chat_id": self.chat_id,
+            "message": self.message,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": None if not self.created_at else self.created_at.isoformat(),
+            "sent_at": None if not self.sent_at else self.sent_at.isoformat()
+        }
@@ -1,10 +1,10 @@
-from extensions import db
+from extensions import db, BigIntPK
 from datetime import datetime
 
 class Result(db.Model):
     __tablename__ = "results"
 
-    result_id = db.Column(db.BigInteger, primary_key=True)
+    result_id = db.Column(BigIntPK, primary_key=True)
     session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     average_score = db.Column(db.Numeric(5,2))
@@ -1,10 +1,10 @@
-from extensions import db
+from extensions import db, BigIntPK
 from datetime import datetime
 
 class Session(db.Model):
     __tablename__ = "sessions"
 
-    session_id = db.Column(db.BigInteger, primary_key=True)
+    session_id = db.Column(BigIntPK, primary_key=True)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
     active = db.Column(db.Boolean, default=True)
@@ -17,6 +17,11 @@ class Session(db.Model):
     bonus_parameters = db.relationship("BonusParameters", back_populates="session", cascade="all, delete-orphan")
     results = db.relationship("Result", back_populates="session", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index("idx_sessions_created", "created_at", "session_id"),
+        db.Index("idx_sessions_active_created", "active", "created_at", "session_id"),
+    )
+
     def to_dict(self):
         return {
             "session_id": self.session_id,
@@ -31,7 +36,7 @@ class Session(db.Model):
 class SessionParticipant(db.Model):
     __tablename__ = "session_participants"
 
-    participant_id = db.Column(db.BigInteger, primary_key=True)
+    participant_id = db.Column(BigIntPK, primary_key=True)
     session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     can_vote = db.Column(db.Boolean, default=True)
@@ -42,7 +47,11 @@ class SessionParticipant(db.Model):
 
     session = db.relationship("Session", back_populates="participants")
 
-    __table_args__ = (db.UniqueConstraint("session_id", "user_id", name="uq_session_user"),)
+    __table_args__ = (
+        db.UniqueConstraint("session_id", "user_id", name="uq_session_user"),
+        db.Index("idx_participants_session_page", "session_id", "participant_id"),
+        db.Index("idx_participants_session_status", "session_id", "status", "participant_id"),
+    )
 
     def to_dict(self):
         return {
@@ -1,10 +1,10 @@
-from extensions import db
+from extensions import db, BigIntPK
 from datetime import datetime
 
 class User(db.Model):
     __tablename__ = "users"
 
-    user_id = db.Column(db.BigInteger, primary_key=True)
+    user_id = db.Column(BigIntPK, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(255))
     telegram_id = db.Column(db.BigInteger, unique=True, index=True)
@@ -19,6 +19,14 @@ class User(db.Model):
     votes_given = db.relationship("Vote", foreign_keys="Vote.voter_id", back_populates="voter")
     votes_received = db.relationship("Vote", foreign_keys="Vote.target_id", back_populates="target")
 
+    # keyset-пагинация GET /users: ORDER BY name, user_id с фильтрами role / active
+    __table_args__ = (
+        db.Index("idx_users_name", "name", "user_id"),
+        db.Index("idx_users_role_name", "role", "name", "user_id"),
+        db.Index("idx_users_active_name", "active", "name", "user_id"),
+        db.Index("idx_users_email", "email"),  # сопоставление по email при массовом импорте
+    )
+
     def to_dict(self):
         return {
             "user_id": self.user_id,
@@ -1,10 +1,10 @@
-from extensions import db
+from extensions import db, BigIntPK
 from datetime import datetime
 
 class Vote(db.Model):
     __tablename__ = "votes"
 
-    vote_id = db.Column(db.BigInteger, primary_key=True)
+    vote_id = db.Column(BigIntPK, primary_key=True)
     session_id = db.Column(db.BigInteger, db.ForeignKey("sessions.session_id", ondelete="CASCADE"), nullable=False, index=True)
     voter_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     target_id = db.Column(db.BigInteger, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
@@ -17,7 +17,10 @@ class Vote(db.Model):
     voter = db.relationship("User", foreign_keys=[voter_id], back_populates="votes_given")
     target = db.relationship("User", foreign_keys=[target_id], back_populates="votes_received")
 
-    __table_args__ = (db.UniqueConstraint("session_id", "voter_id", "target_id", name="uq_vote_unique"),)
+    __table_args__ = (
+        db.UniqueConstraint("session_id", "voter_id", "target_id", name="uq_vote_unique"),
+        db.Index("idx_votes_counting", "session_id", "target_id", "score"),
+    )
 
     def to_dict(self):
         return {
@@ -6,8 +6,13 @@ from .votes import votes_bp
 from .results import results_bp
 from .settings import settings_bp
 from .audit import audit_bp
+from .export import export_bp
+from .jobs import jobs_bp
+from .analytics import analytics_bp
+from .backups import backups_bp
 
 __all__ = [
     "auth_bp","users_bp","sessions_bp","participants_bp",
-    "votes_bp","results_bp","settings_bp","audit_bp"
+    "votes_bp","results_bp","settings_bp","audit_bp",
+    "export_bp","jobs_bp","analytics_bp","backups_bp"
 ]
@@ -0,0 +1,41 @@
+import click
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from extensions import db
+from models.analytics import SessionSummary, UserSessionHistory
+from services.analytics import TREND_PERIODS, group_summaries, rebuild_rollups
+from services.pagination import date_arg, int_arg
+from services.serialization import SESSION_SUMMARY, USER_HISTORY
+
+analytics_bp = Blueprint("analytics_bp", __name__, cli_group="analytics")
+
+@analytics_bp.route("/trends", methods=["GET"])
+@jwt_required()
+def trends():
+    """Сравнительная аналитика по сессиям (wiki 8.4) — только из сводных таблиц, без votes."""
+    # некорректные from/to/user_id -> InvalidCursor -> 400 (обработчик в app.py)
+    date_from, date_to, user_id = date_arg("from"), date_arg("to"), int_arg("user_id")
+    period = request.args.get("period", "session")
+    if period not in TREND_PERIODS:
+        return jsonify({"status":"error","message": f"period must be one of {sorted(TREND_PERIODS)}"}), 400
+
+    # история сотрудника — по idx_user_history_user_start, сессии — по idx_session_summaries_start
+    projection, model = (USER_HISTORY, UserSessionHistory) if user_id is not None else (SESSION_SUMMARY, SessionSummary)
+    query = projection.query(db.session)
+    if user_id is not None:
+        query = query.filter(UserSessionHistory.user_id == user_id)
+    if date_from:
+        query = query.filter(model.start_date >= date_from)
+    if date_to:
+        query = query.filter(model.start_date <= date_to)
+    rows = query.order_by(model.start_date, model.session_id).all()
+    if period == "session" or user_id is not None:
+        return projection.response(rows)
+    return jsonify(group_summaries(rows, period))
+
+@analytics_bp.cli.command("backfill")
+@click.option("--session-id", "session_ids", type=int, multiple=True, help="Только эти сессии (по умолчанию все закрытые).")
+def backfill(session_ids):
+    """Пересобирает session_summaries и user_session_history из votes/results."""
+    rebuilt = rebuild_rollups(list(session_ids) or None)
+    click.echo(f"Rebuilt rollups for {rebuilt} session(s)")
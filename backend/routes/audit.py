@@ -1,11 +1,61 @@
-from flask import Blueprint, jsonify
+import click
+from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required
+from extensions import db
 from models.audit import AuditLog
+from services.audit_archive import query_archive, archive_audit_logs
+from services.pagination import (keyset_page, paginated_response, datetime_arg, int_arg, page_limit, decode_cursor,
+                                 encode_cursor, DEFAULT_LIMIT)
+from services.serialization import AUDIT_LOG
 
-audit_bp = Blueprint("audit_bp", __name__)
+audit_bp = Blueprint("audit_bp", __name__, cli_group="audit")
+PAGE_COLUMNS = [AuditLog.timestamp, AuditLog.log_id]
 
 @audit_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_audit_logs():
-    logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(200).all()
-    return jsonify([l.to_dict() for l in logs])
+    query = AUDIT_LOG.query(db.session)
+    if request.args.get("action"):
+        query = query.filter(AuditLog.action == request.args["action"])
+    user_id, session_id = int_arg("user_id"), int_arg("session_id")
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+    if session_id is not None:
+        query = query.filter(AuditLog.session_id == session_id)
+    since, until = datetime_arg("from"), datetime_arg("to")
+    if since:
+        query = query.filter(AuditLog.timestamp >= since)
+    if until:
+        query = query.filter(AuditLog.timestamp < until)
+    logs, next_cursor = keyset_page(query, PAGE_COLUMNS, descending=True, default_limit=DEFAULT_LIMIT)
+    if next_cursor is None:
+        # горячая таблица кончилась — дальше идут строки из архивных сегментов (они старше)
+        logs, next_cursor = _continue_from_archive(logs, since, until)
+    return paginated_response(logs, next_cursor, AUDIT_LOG)
+
+def _continue_from_archive(logs, since, until):
+    limit = page_limit()
+    if logs:
+        before = (logs[-1].timestamp, logs[-1].log_id)
+    elif request.args.get("after"):
+        before = tuple(decode_cursor(request.args["after"], PAGE_COLUMNS))
+    else:
+        before = None
+    if before and before[0] is None:
+        before = None  # строки без timestamp идут первыми — после них архив читается с начала
+    archived = query_archive(current_app.config, limit - len(logs) + 1, since=since, until=until,
+                             action=request.args.get("action"), user_id=int_arg("user_id"),
+                             session_id=int_arg("session_id"), before=before)
+    if not archived:
+        return logs, None
+    rows = list(logs) + archived
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][-1], rows[-1][0]])
+
+@audit_bp.cli.command("archive")
+def archive():
+    """Переносит записи старше AUDIT_RETENTION_DAYS в сжатые сегменты AUDIT_ARCHIVE_DIR."""
+    stats = archive_audit_logs(current_app.config)
+    click.echo(f"Archived {stats['archived']} audit record(s) into {stats['segments']} segment(s)")
@@ -1,12 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
 from extensions import db
 from models.user import User
 from models.auth import AuthSession, RevokedToken
-from services.telegram_auth import verify_telegram_init_data
-from services.audit_service import log_action
-import hashlib
+from services.telegram_auth import verify_telegram_init_data, telegram_user_cache
+from services.audit_service import log_action, stage_action
+from services.token_blocklist import revocation_index, hash_token, token_hash_from_payload
+from services.write_lane import write_lane
 
 auth_bp = Blueprint("auth_bp", __name__)
 
@@ -18,29 +19,35 @@ def telegram_login():
     if not user_info:
         return jsonify({"status":"error","message":"Invalid Telegram data"}), 401
 
+    # пользователь, AuthSession и записи аудита сохраняются одной транзакцией
     telegram_id = user_info.get("id")
-    user = User.query.filter_by(telegram_id=telegram_id).first()
-    if not user:
-        user = User(name=user_info.get("first_name","Unknown"), telegram_id=telegram_id, telegram_username=user_info.get("username"), role="user", active=True)
-        db.session.add(user); db.session.commit()
-        log_action(None, "user_created", {"telegram_id": telegram_id, "name": user.name})
+    user_data, access_token = write_lane.run(_record_login, user_info, telegram_user_cache.get(telegram_id))
+    telegram_user_cache.set(telegram_id, user_data)
+    return jsonify({"status":"success","token": access_token, "user": user_data})
 
-    access_token = create_access_token(identity=user.user_id, expires_delta=timedelta(hours=1))
-    token_hash = hashlib.sha256(access_token.encode()).hexdigest()
-
-    auth_session = AuthSession(user_id=user.user_id, token_hash=token_hash, expires_at=datetime.utcnow()+timedelta(hours=1))
-    db.session.add(auth_session); db.session.commit()
+def _record_login(user_info, user_data=None):
+    telegram_id = user_info.get("id")
+    if user_data is None:
+        user = User.query.filter_by(telegram_id=telegram_id).first()
+        if not user:
+            user = User(name=user_info.get("first_name","Unknown"), telegram_id=telegram_id, telegram_username=user_info.get("username"), role="user", active=True)
+            db.session.add(user); db.session.flush()
+            stage_action(None, "user_created", {"telegram_id": telegram_id, "name": user.name})
+        user_data = user.to_dict()
 
-    log_action(user.user_id, "login", {"telegram_id": telegram_id})
-    return jsonify({"status":"success","token": access_token, "user": user.to_dict()})
+    access_token = create_access_token(identity=user_data["user_id"], expires_delta=timedelta(hours=1))
+    db.session.add(AuthSession(user_id=user_data["user_id"], token_hash=hash_token(access_token), expires_at=datetime.utcnow()+timedelta(hours=1)))
+    stage_action(user_data["user_id"], "login", {"telegram_id": telegram_id})
+    return user_data, access_token
 
 @auth_bp.route("/logout", methods=["POST"])
 @jwt_required()
 def logout():
     current_user = get_jwt_identity()
-    token = request.headers.get("Authorization","").replace("Bearer ","")
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    revoked = RevokedToken(token_hash=token_hash, user_id=current_user, reason="logout")
+    token_hash = token_hash_from_payload(get_jwt())
+    expires_at = datetime.utcfromtimestamp(get_jwt()["exp"])
+    revoked = RevokedToken(token_hash=token_hash, user_id=current_user, expires_at=expires_at, reason="logout")
     db.session.add(revoked); db.session.commit()
+    revocation_index.add(token_hash, expires_at)
     log_action(current_user, "logout", {"token_hash": token_hash})
     return jsonify({"status":"success","message":"Logged out"})
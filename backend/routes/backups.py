@@ -0,0 +1,25 @@
+from flask import Blueprint, current_app, jsonify, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.backup_service import backup_stats, list_backups, backup_path
+from services.job_queue import job_queue
+
+backups_bp = Blueprint("backups_bp", __name__)
+
+@backups_bp.route("/", methods=["GET"])
+@jwt_required()
+def backup_overview():
+    return jsonify({"stats": backup_stats, "backups": list_backups(current_app.config)})
+
+@backups_bp.route("/create", methods=["POST"])
+@jwt_required()
+def start_backup():
+    job, created = job_queue.enqueue("backup", created_by=get_jwt_identity(), dedupe_key="backup")
+    return jsonify({"status":"accepted","job": job.to_dict(), "deduplicated": not created}), 202, {"Location": f"/api/v1/jobs/{job.job_id}"}
+
+@backups_bp.route("/download/<path:filename>", methods=["GET"])
+@jwt_required()
+def download_backup(filename):
+    path = backup_path(filename, current_app.config)
+    if path is None:
+        return jsonify({"status":"error","message":"Backup not found"}), 404
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True)
@@ -0,0 +1,76 @@
+import hashlib, re
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.export_service import DATASETS, CONTENT_TYPES, data_fingerprint, export_stream
+from services.audit_service import log_action
+from services.lru_cache import LRUCache
+
+export_bp = Blueprint("export_bp", __name__)
+
+_RANGE = re.compile(r"^bytes=(\d+)-(\d*)$")
+# ETag -> длина выгрузки в байтах: поток детерминирован, длину достаточно узнать один раз
+_lengths = LRUCache(maxsize=1024)
+
+
+def _measured(chunks, etag):
+    """Пропускает поток насквозь и запоминает его длину, если клиент дочитал до конца."""
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        yield chunk
+    _lengths.set(etag, total)
+
+
+def _slice(chunks, start, end):
+    """Отдаёт байты [start, end] из потока, не держа в памяти больше одного чанка."""
+    offset = 0
+    for chunk in chunks:
+        chunk_end = offset + len(chunk)
+        if chunk_end > start and offset <= end:
+            yield chunk[max(start - offset, 0):end - offset + 1]
+        offset = chunk_end
+        if offset > end:
+            return
+
+
+@export_bp.route("/session/<int:session_id>", methods=["GET"])
+@jwt_required()
+def export_session(session_id):
+    dataset = request.args.get("dataset", "results")
+    fmt = request.args.get("format", "csv")
+    if dataset not in DATASETS or fmt not in CONTENT_TYPES:
+        return jsonify({"status":"error","message": f"dataset must be one of {sorted(DATASETS)}, format one of {sorted(CONTENT_TYPES)}"}), 400
+    use_gzip = fmt != "xlsx" and (request.args.get("gzip") == "1" or "gzip" in request.headers.get("Accept-Encoding", ""))
+
+    etag = hashlib.sha256(f"{session_id}:{dataset}:{fmt}:{use_gzip}:{data_fingerprint(dataset, session_id)}".encode()).hexdigest()[:32]
+    headers = {
+        "ETag": f'"{etag}"',
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="session_{session_id}_{dataset}.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    log_action(get_jwt_identity(), "export", {"dataset": dataset, "format": fmt}, session_id=session_id)
+
+    # докачка: поток детерминирован для неизменных данных, поэтому пропускаем уже отданные байты;
+    # длина известна после полной отдачи с тем же ETag, иначе — один холостой прогон генератора
+    total = _lengths.get(etag)
+    match = _RANGE.match(request.headers.get("Range", ""))
+    if_range = request.headers.get("If-Range")
+    if match and (not if_range or if_range.strip('"') == etag):
+        if total is None:
+            total = sum(len(c) for c in export_stream(dataset, session_id, fmt, use_gzip))
+            _lengths.set(etag, total)
+        start = int(match.group(1))
+        end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+        if start >= total or start > end:
+            return Response(status=416, headers={"Content-Range": f"bytes */{total}"})
+        headers.update({"Content-Range": f"bytes {start}-{end}/{total}", "Content-Length": str(end - start + 1)})
+        body = _slice(export_stream(dataset, session_id, fmt, use_gzip), start, end)
+        return Response(stream_with_context(body), status=206, mimetype=CONTENT_TYPES[fmt], headers=headers)
+
+    if total is not None:
+        headers["Content-Length"] = str(total)
+    body = _measured(export_stream(dataset, session_id, fmt, use_gzip), etag)
+    return Response(stream_with_context(body), mimetype=CONTENT_TYPES[fmt], headers=headers)
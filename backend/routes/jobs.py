@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from extensions import db
+from models.job import Job
+
+jobs_bp = Blueprint("jobs_bp", __name__)
+
+@jobs_bp.route("/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"status":"error","message":"Job not found"}), 404
+    return jsonify(job.to_dict())
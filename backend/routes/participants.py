@@ -1,23 +1,91 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models.session import SessionParticipant
+from models.session import Session, SessionParticipant
 from services.audit_service import log_action
+from services.pagination import keyset_page, paginated_response
+from services.serialization import PARTICIPANT
+from services.participants_service import bulk_add, bulk_update, bulk_remove
+from services.eligibility import eligibility_index
 
 participants_bp = Blueprint("participants_bp", __name__)
 
 @participants_bp.route("/<int:session_id>", methods=["GET"])
 @jwt_required()
 def list_participants(session_id):
-    participants = SessionParticipant.query.filter_by(session_id=session_id).all()
-    return jsonify([p.to_dict() for p in participants])
+    query = PARTICIPANT.query(db.session).filter(SessionParticipant.session_id == session_id)
+    if request.args.get("status"):
+        query = query.filter(SessionParticipant.status == request.args["status"])
+    participants, next_cursor = keyset_page(query, [SessionParticipant.participant_id])
+    return paginated_response(participants, next_cursor, PARTICIPANT)
+
+def _closed_or_missing(session_id):
+    """404/409 для добавления участников в несуществующую или закрытую сессию."""
+    session = db.session.get(Session, session_id)
+    if session is None:
+        return jsonify({"status":"error","message":"Session not found"}), 404
+    if not session.active:
+        return jsonify({"status":"error","message":"Session is closed"}), 409
+    return None
 
 @participants_bp.route("/<int:session_id>", methods=["POST"])
 @jwt_required()
 def add_participant(session_id):
+    error = _closed_or_missing(session_id)
+    if error:
+        return error
     current_user = get_jwt_identity()
     data = request.get_json() or {}
     part = SessionParticipant(session_id=session_id, user_id=data["user_id"], can_vote=data.get("can_vote", True), can_receive_votes=data.get("can_receive_votes", True), status=data.get("status", "active"))
     db.session.add(part); db.session.commit()
+    eligibility_index().invalidate(session_id)
     log_action(current_user, "participant_added", {"session_id": session_id, "user_id": data["user_id"]})
     return jsonify({"status":"success","participant": part.to_dict()})
+
+def _bulk_items(data):
+    """{"participants": [{user_id, ...}]} или {"user_ids": [...], общие поля} (wiki 5.5)."""
+    if isinstance(data.get("participants"), list):
+        return data["participants"]
+    if isinstance(data.get("user_ids"), list):
+        shared = {k: v for k, v in data.items() if k != "user_ids"}
+        return [{"user_id": u, **shared} for u in data["user_ids"]]
+    return None
+
+def _bulk_response(current_user, session_id, action, applied, errors):
+    if applied:
+        eligibility_index().invalidate(session_id)
+    log_action(current_user, action, {"session_id": session_id, "user_ids": applied, "errors": len(errors)}, session_id=session_id)
+    return jsonify({"status":"success","applied": applied,"errors": errors})
+
+@participants_bp.route("/<int:session_id>/bulk", methods=["POST"])
+@jwt_required()
+def bulk_add_participants(session_id):
+    error = _closed_or_missing(session_id)
+    if error:
+        return error
+    items = _bulk_items(request.get_json() or {})
+    if items is None:
+        return jsonify({"status":"error","message":"participants or user_ids list is required"}), 400
+    applied, errors = bulk_add(session_id, items)
+    db.session.commit()
+    return _bulk_response(get_jwt_identity(), session_id, "participants_bulk_added", applied, errors)
+
+@participants_bp.route("/<int:session_id>/bulk", methods=["PATCH"])
+@jwt_required()
+def bulk_update_participants(session_id):
+    items = _bulk_items(request.get_json() or {})
+    if items is None:
+        return jsonify({"status":"error","message":"participants or user_ids list is required"}), 400
+    applied, errors = bulk_update(session_id, items)
+    db.session.commit()
+    return _bulk_response(get_jwt_identity(), session_id, "participants_bulk_updated", applied, errors)
+
+@participants_bp.route("/<int:session_id>/bulk", methods=["DELETE"])
+@jwt_required()
+def bulk_remove_participants(session_id):
+    user_ids = (request.get_json() or {}).get("user_ids")
+    if not isinstance(user_ids, list):
+        return jsonify({"status":"error","message":"user_ids list is required"}), 400
+    applied, errors = bulk_remove(session_id, user_ids)
+    db.session.commit()
+    return _bulk_response(get_jwt_identity(), session_id, "participants_bulk_removed", applied, errors)
@@ -1,18 +1,34 @@
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required
-from services.bonus_calc import calculate_bonus_for_session
-from models.result import Result
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.bonus_calc import compute_session_results
+from services.score_aggregates import load_aggregate_batch
+from services.job_queue import enqueue_session_job
+from services.settings_service import vote_scale
+from services.results_cache import results_cache
 
 results_bp = Blueprint("results_bp", __name__)
 
 @results_bp.route("/<int:session_id>", methods=["GET"])
 @jwt_required()
 def get_results(session_id):
-    results = Result.query.filter_by(session_id=session_id).order_by(Result.rank.asc()).all()
-    return jsonify([r.to_dict() for r in results])
+    body, etag = results_cache().get(session_id)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype="application/json", headers=headers)
+
+@results_bp.route("/<int:session_id>/live", methods=["GET"])
+@jwt_required()
+def get_live_results(session_id):
+    """Текущий рейтинг по score_aggregates, до закрытия сессии и без записи в results."""
+    target_ids, scores, weights = load_aggregate_batch(session_id)
+    scale_min, scale_max = vote_scale()
+    results = compute_session_results(target_ids, scores, weights, scale_min=scale_min, scale_max=scale_max)
+    return jsonify(results)
 
 @results_bp.route("/<int:session_id>/recalculate", methods=["POST"])
 @jwt_required()
 def recalc_results(session_id):
-    results = calculate_bonus_for_session(session_id)
-    return jsonify({"status":"success","results": results})
+    # повторный запрос, пока пересчёт ещё в очереди, получает ту же задачу
+    job, created = enqueue_session_job("recalculate", session_id, created_by=get_jwt_identity())
+    return jsonify({"status":"accepted","job": job.to_dict(), "deduplicated": not created}), 202, {"Location": f"/api/v1/jobs/{job.job_id}"}
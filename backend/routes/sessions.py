@@ -1,28 +1,44 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from extensions import db
+import json
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, get_jwt_request_location, create_access_token
+from datetime import date
+from extensions import db, jwt
 from models.session import Session
-from services.audit_service import log_action
-from services.notification_service import send_notification
-from services.bonus_calc import calculate_bonus_for_session
+from services.audit_service import log_action, stage_action
+from services.participants_service import enroll_active_users
+from services.notification_service import notify_user
+from services.job_queue import enqueue_session_job
+from services.eligibility import eligibility_index
+from services.progress import progress_hub
+from services.pagination import keyset_page, paginated_response, bool_arg
+from services.serialization import SESSION
 
 sessions_bp = Blueprint("sessions_bp", __name__)
 
 @sessions_bp.route("/", methods=["GET"])
 @jwt_required()
 def get_sessions():
-    sessions = Session.query.order_by(Session.created_at.desc()).all()
-    return jsonify([s.to_dict() for s in sessions])
+    query = SESSION.query(db.session)
+    active = bool_arg("active")
+    if active is not None:
+        query = query.filter(Session.active == active)
+    sessions, next_cursor = keyset_page(query, [Session.created_at, Session.session_id], descending=True)
+    return paginated_response(sessions, next_cursor, SESSION)
 
 @sessions_bp.route("/", methods=["POST"])
 @jwt_required()
 def create_session():
     current_user = get_jwt_identity()
     data = request.get_json() or {}
-    session = Session(start_date=data["start_date"], end_date=data["end_date"], active=data.get("active", True), auto_participants=data.get("auto_participants", True))
-    db.session.add(session); db.session.commit()
+    session = Session(start_date=date.fromisoformat(data["start_date"]), end_date=date.fromisoformat(data["end_date"]), active=data.get("active", True), auto_participants=data.get("auto_participants", True))
+    db.session.add(session); db.session.flush()
+    if session.auto_participants:
+        # сессия, участники и запись аудита — одна транзакция
+        added = enroll_active_users(session.session_id)
+        stage_action(current_user, "participants_auto_added", {"session_id": session.session_id, "added_count": added}, session_id=session.session_id)
+    db.session.commit()
     log_action(current_user, "session_created", {"session_id": session.session_id})
-    send_notification(chat_id=current_user, message=f"🗳 Создана новая сессия #{session.session_id}")
+    notify_user(current_user, f"🗳 Создана новая сессия #{session.session_id}")
     return jsonify({"status":"success","session": session.to_dict()}), 201
 
 @sessions_bp.route("/<int:session_id>/close", methods=["POST"])
@@ -33,7 +49,64 @@ def close_session(session_id):
     session.active = False
     session.closed_at = db.func.now()
     db.session.commit()
+    eligibility_index().invalidate(session_id)
+    progress_hub.record_closed(session_id)
     log_action(current_user, "session_closed", {"session_id": session_id})
-    send_notification(chat_id=current_user, message=f"✅ Сессия #{session_id} закрыта.")
-    calculate_bonus_for_session(session_id)
-    return jsonify({"status":"success","message": f"Session {session_id} closed and results calculated."})
+    # расчёт результатов и уведомление — в фоновой задаче
+    job, _ = enqueue_session_job("close_session", session_id, created_by=current_user)
+    return jsonify({"status":"accepted","message": f"Session {session_id} closed, results are being calculated.",
+                    "job": job.to_dict()}), 202, {"Location": f"/api/v1/jobs/{job.job_id}"}
+
+STREAM_ENDPOINT = "sessions_bp.progress_stream"
+
+
+def _stream_scope(session_id):
+    return f"progress:{session_id}"
+
+
+@jwt.token_verification_loader
+def _scoped_tokens_only_for_streams(jwt_header, jwt_payload):
+    # токен стрима попадает в URL и логи прокси — в других маршрутах он не действует
+    return "scope" not in jwt_payload or request.endpoint == STREAM_ENDPOINT
+
+
+@jwt.token_verification_failed_loader
+def _scoped_token_rejected(jwt_header, jwt_payload):
+    return jsonify({"status":"error","message":"Stream token is not valid for this endpoint"}), 403
+
+
+@sessions_bp.route("/<int:session_id>/progress/token", methods=["POST"])
+@jwt_required()
+def progress_stream_token(session_id):
+    """Короткоживущий токен одного стрима для ?jwt= (EventSource не умеет слать заголовки).
+
+    parent_jti связывает его с токеном входа: logout отзывает и выданные им токены стрима.
+    """
+    if eligibility_index().get(session_id) is None:
+        return jsonify({"status":"error","message":"Session not found"}), 404
+    expires = current_app.config.get("PROGRESS_STREAM_TOKEN_EXPIRES")
+    token = create_access_token(identity=get_jwt_identity(), expires_delta=expires,
+                                additional_claims={"scope": _stream_scope(session_id), "parent_jti": get_jwt()["jti"]})
+    return jsonify({"status":"success","token": token, "expires_in": int(expires.total_seconds())})
+
+
+@sessions_bp.route("/<int:session_id>/progress/stream", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])
+def progress_stream(session_id):
+    # в ?jwt= принимается только токен этого стрима из /progress/token, не токен входа
+    if get_jwt_request_location() == "query_string" and get_jwt().get("scope") != _stream_scope(session_id):
+        return jsonify({"status":"error","message":"Query-string token must be a stream token for this session"}), 403
+    if eligibility_index().get(session_id) is None:
+        return jsonify({"status":"error","message":"Session not found"}), 404
+    heartbeat = current_app.config.get("PROGRESS_HEARTBEAT", 15)
+
+    def events():
+        yield f"retry: {int(heartbeat * 1000)}\n\n"
+        for event in progress_hub.subscribe(session_id, lambda: eligibility_index().get(session_id), heartbeat):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
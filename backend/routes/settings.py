@@ -1,16 +1,20 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.settings_service import get_setting, set_setting
+from services.settings_service import set_setting, settings_cache
+from services.settings_service import list_settings as cached_settings
 from services.audit_service import log_action
-from models.settings import SystemSetting
 
 settings_bp = Blueprint("settings_bp", __name__)
 
 @settings_bp.route("/", methods=["GET"])
 @jwt_required()
 def list_settings():
-    settings = SystemSetting.query.all()
-    return jsonify({s.setting_key: s.setting_value for s in settings})
+    return jsonify(cached_settings())
+
+@settings_bp.route("/cache", methods=["GET"])
+@jwt_required()
+def settings_cache_stats():
+    return jsonify(settings_cache().stats)
 
 @settings_bp.route("/<key>", methods=["PATCH"])
 @jwt_required()
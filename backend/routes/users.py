@@ -1,16 +1,62 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models.user import User
 from services.audit_service import log_action
+from services.pagination import keyset_page, paginated_response, bool_arg
+from services.telegram_auth import telegram_user_cache
+from services.serialization import USER
+from services.user_import import iter_records, import_users
 
 users_bp = Blueprint("users_bp", __name__)
 
 @users_bp.route("/", methods=["GET"])
 @jwt_required()
 def list_users():
-    users = User.query.order_by(User.name.asc()).all()
-    return jsonify([u.to_dict() for u in users])
+    query = USER.query(db.session)
+    if request.args.get("role"):
+        query = query.filter(User.role == request.args["role"])
+    active = bool_arg("active")
+    if active is not None:
+        query = query.filter(User.active == active)
+    users, next_cursor = keyset_page(query, [User.name, User.user_id])
+    return paginated_response(users, next_cursor, USER)
+
+@users_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_import_users():
+    """Массовый импорт (wiki 6.4): JSON {"users": [...]}, CSV или JSON Lines потоком.
+
+    ?progress=true (или Accept: application/x-ndjson) — ответ NDJSON с прогрессом после каждой пачки.
+    """
+    current_user = get_jwt_identity()
+    fmt = request.args.get("format")
+    upload = request.files.get("file")
+    if request.is_json:
+        users = (request.get_json() or {}).get("users")
+        if not isinstance(users, list):
+            return jsonify({"status":"error","message":"users list is required"}), 400
+        records = enumerate(users, 1)
+    else:
+        stream = upload.stream if upload else request.stream
+        if not fmt:
+            name = (upload.filename if upload else "") or ""
+            mimetype = upload.mimetype if upload else request.mimetype
+            fmt = "csv" if name.endswith(".csv") or mimetype == "text/csv" else "jsonl"
+        if fmt not in ("csv", "jsonl"):
+            return jsonify({"status":"error","message":"format must be csv or jsonl"}), 400
+        records = iter_records(stream, fmt)
+
+    progress = import_users(records, actor_id=current_user,
+                            batch_size=current_app.config.get("USER_IMPORT_BATCH_SIZE", 2000))
+    if request.args.get("progress") == "true" or "application/x-ndjson" in request.headers.get("Accept", ""):
+        return Response(stream_with_context(json.dumps(p, ensure_ascii=False) + "\n" for p in progress),
+                        mimetype="application/x-ndjson")
+    for summary in progress:
+        pass
+    summary.pop("done")
+    return jsonify({"status":"success", **summary})
 
 @users_bp.route("/<int:user_id>", methods=["GET"])
 @jwt_required()
@@ -29,5 +75,6 @@ def update_user(user_id):
     if "permissions" in data:
         user.permissions = data["permissions"]
     db.session.commit()
+    telegram_user_cache.pop(user.telegram_id)
     log_action(current_user, "user_updated", {"target_id": user_id, **data})
     return jsonify({"status":"success","user": user.to_dict()})
@@ -1,24 +1,123 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from sqlalchemy import select
 from extensions import db
 from models.vote import Vote
 from services.audit_service import log_action
+from services.score_aggregates import apply_vote_deltas
+from services.sql_helpers import upsert
+from services.results_cache import results_cache
+from services.eligibility import eligibility_index
+from services.write_lane import write_lane
+from services.rate_limit import rate_limiter
+from services.idempotency import idempotency_store
+from services.progress import progress_hub
+from services.settings_service import vote_scale
 
 votes_bp = Blueprint("votes_bp", __name__)
 
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_score(score, scale):
+    """Сообщение об ошибке или None: оценка — целое в пределах шкалы из настроек."""
+    if not _is_int(score):
+        return "score must be an integer"
+    if not scale[0] <= score <= scale[1]:
+        return f"score must be between {scale[0]} and {scale[1]}"
+    return None
+
+
+def _parse_ballot(data):
+    """{target_id: score} из тела запроса или (None, сообщение) — до очереди записи и агрегатов."""
+    votes = data.get("votes", [])
+    if not isinstance(votes, list):
+        return None, "votes must be a list"
+    scale = vote_scale()
+    ballot = {}
+    for i, vote in enumerate(votes):
+        if not isinstance(vote, dict) or not _is_int(vote.get("target_id")):
+            return None, f"votes[{i}].target_id must be an integer"
+        error = _check_score(vote.get("score"), scale)
+        if error:
+            return None, f"votes[{i}].{error}"
+        ballot[vote["target_id"]] = vote["score"]
+    return ballot, None
+
 @votes_bp.route("/", methods=["POST"])
 @jwt_required()
+@idempotency_store.idempotent
+@rate_limiter.limit()
 def submit_votes():
     current_user = get_jwt_identity()
     data = request.get_json() or {}
     session_id = data.get("session_id")
-    votes = data.get("votes", [])
-    for v in votes:
-        existing = Vote.query.filter_by(session_id=session_id, voter_id=current_user, target_id=v["target_id"]).first()
-        if existing:
-            existing.score = v["score"]
-        else:
-            db.session.add(Vote(session_id=session_id, voter_id=current_user, target_id=v["target_id"], score=v["score"]))
+    if not _is_int(session_id):
+        return jsonify({"status":"error","message":"session_id must be an integer"}), 400
+    ballot, error = _parse_ballot(data)
+    if error:
+        return jsonify({"status":"error","message": error}), 400
+
+    # права голосующего и целей — из индекса сессии в памяти, без запросов на каждый бюллетень
+    eligibility = eligibility_index().get(session_id)
+    if eligibility is None:
+        return jsonify({"status":"error","message":"Session not found"}), 404
+    if not eligibility.open:
+        return jsonify({"status":"error","message":"Session is closed"}), 409
+    if current_user not in eligibility.voters:
+        return jsonify({"status":"error","message":"Voter is not an active participant of this session"}), 403
+
+    accepted = {t: s for t, s in ballot.items() if t in eligibility.targets}
+    rejected = [t for t in ballot if t not in accepted]
+    new_votes = write_lane.run(_save_ballot, session_id, current_user, accepted)
+    progress_hub.record_ballot(session_id, current_user, new_votes)
+    log_action(current_user, "votes_submitted", {"session_id": session_id, "count": len(accepted), "rejected": rejected})
+    return jsonify({"status":"success","message":"Votes saved","saved": len(accepted),"rejected": rejected})
+
+def _save_ballot(session_id, voter_id, accepted):
+    # прежние оценки нужны для дельт агрегатов; в очереди записи читаются уже под её блокировкой
+    old_scores = dict(db.session.execute(
+        select(Vote.target_id, Vote.score)
+        .where(Vote.session_id == session_id, Vote.voter_id == voter_id, Vote.target_id.in_(accepted))
+    ).all())
+    now = datetime.utcnow()
+    upsert(Vote, [{"session_id": session_id, "voter_id": voter_id, "target_id": t, "score": s,
+                   "created_at": now, "updated_at": now} for t, s in accepted.items()],
+           conflict_columns=["session_id", "voter_id", "target_id"], update_columns=["score", "updated_at"])
+    apply_vote_deltas(session_id, [(t, old_scores.get(t), s) for t, s in accepted.items()])
+    return len(accepted) - len(old_scores)
+
+@votes_bp.route("/<int:vote_id>", methods=["PATCH"])
+@jwt_required()
+def update_vote(vote_id):
+    current_user = get_jwt_identity()
+    data = request.get_json() or {}
+    vote = Vote.query.get_or_404(vote_id)
+    old_score, new_score = vote.score, data.get("new_score")
+    error = _check_score(new_score, vote_scale())
+    if error:
+        return jsonify({"status":"error","message": f"new_{error}"}), 400
+    vote.score = new_score
+    vote.modified_by_admin = True
+    apply_vote_deltas(vote.session_id, [(vote.target_id, old_score, new_score)])
+    db.session.commit()
+    results_cache().invalidate(vote.session_id)
+    log_action(current_user, "vote_update", {"vote_id": vote_id, "old_score": old_score, "new_score": new_score}, session_id=vote.session_id)
+    return jsonify({"status":"success","vote_id": vote_id,"old_score": old_score,"new_score": new_score})
+
+@votes_bp.route("/<int:vote_id>", methods=["DELETE"])
+@jwt_required()
+def delete_vote(vote_id):
+    current_user = get_jwt_identity()
+    vote = Vote.query.get_or_404(vote_id)
+    session_id, target_id, score = vote.session_id, vote.target_id, vote.score
+    apply_vote_deltas(session_id, [(target_id, score, None)])
+    db.session.delete(vote)
     db.session.commit()
-    log_action(current_user, "votes_submitted", {"session_id": session_id, "count": len(votes)})
-    return jsonify({"status":"success","message":"Votes saved"})
+    results_cache().invalidate(session_id)
+    progress_hub.record_vote_removed(session_id)
+    log_action(current_user, "vote_delete", {"vote_id": vote_id, "target_id": target_id, "score": score}, session_id=session_id)
+    return jsonify({"status":"success","vote_id": vote_id})
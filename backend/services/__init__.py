@@ -2,7 +2,7 @@ from .telegram_auth import verify_telegram_init_data
 from .bonus_calc import calculate_bonus_for_session
 from .audit_service import log_action
 from .backup_service import create_backup
-from .settings_service import get_setting, set_setting
-from .notification_service import send_notification
+from .settings_service import get_setting, set_setting, list_settings
+from .notification_service import send_notification, enqueue_notification, notify_user
 
-__all__ = ["verify_telegram_init_data","calculate_bonus_for_session","log_action","create_backup","get_setting","set_setting","send_notification"]
+__all__ = ["verify_telegram_init_data","calculate_bonus_for_session","log_action","create_backup","get_setting","set_setting","list_settings","send_notification","enqueue_notification","notify_user"]
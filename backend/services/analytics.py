@@ -0,0 +1,105 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, delete, func, insert
+from extensions import db
+from models.analytics import SessionSummary, UserSessionHistory
+from models.result import Result
+from models.session import Session, SessionParticipant
+from models.vote import Vote
+from services.sql_helpers import upsert
+
+TREND_PERIODS = {"session", "month", "year"}
+
+
+def refresh_session_rollup(session_id):
+    """Пересобирает строки session_summaries и user_session_history одной сессии.
+
+    Несколько запросов по индексам одной сессии, голоса и результаты уже сгруппированы в БД —
+    стоимость не зависит от числа других сессий. Выполняется в текущей транзакции, без commit.
+    Вызывается задачей close_session/recalculate после расчёта результатов.
+    """
+    session = db.session.get(Session, session_id)
+    if session is None:
+        return None
+    participants = db.session.execute(
+        select(SessionParticipant.user_id, SessionParticipant.can_vote, SessionParticipant.status)
+        .where(SessionParticipant.session_id == session_id)).all()
+    eligible = sum(1 for p in participants if p.can_vote and p.status == "active")
+    participants = {p.user_id: p.can_vote for p in participants}
+    given = dict(db.session.execute(
+        select(Vote.voter_id, func.count()).where(Vote.session_id == session_id).group_by(Vote.voter_id)).all())
+    votes_count, average_score = db.session.execute(
+        select(func.count(), func.avg(Vote.score)).where(Vote.session_id == session_id)).one()
+    results = {r.user_id: r for r in db.session.execute(
+        select(Result.user_id, Result.average_score, Result.rank, Result.total_bonus, Result.votes_received)
+        .where(Result.session_id == session_id))}
+
+    total_bonus = sum(r.total_bonus or 0 for r in results.values()) if results else None
+    upsert(SessionSummary, [{
+        "session_id": session_id, "start_date": session.start_date, "end_date": session.end_date,
+        "participants_count": len(participants), "eligible_voters": eligible, "voters_count": len(given),
+        "participation_rate": round(len(given) / eligible, 4) if eligible else None,
+        "votes_count": votes_count,
+        "average_score": round(float(average_score), 2) if average_score is not None else None,
+        "total_bonus": total_bonus, "computed_at": datetime.utcnow(),
+    }], conflict_columns=["session_id"], update_columns=[
+        "start_date", "end_date", "participants_count", "eligible_voters", "voters_count", "participation_rate",
+        "votes_count", "average_score", "total_bonus", "computed_at"])
+
+    db.session.execute(delete(UserSessionHistory).where(UserSessionHistory.session_id == session_id))
+    rows = []
+    for user_id in participants.keys() | results.keys() | given.keys():
+        result = results.get(user_id)
+        rows.append({"user_id": user_id, "session_id": session_id, "start_date": session.start_date,
+                     "average_score": result.average_score if result else None,
+                     "rank": result.rank if result else None,
+                     "total_bonus": result.total_bonus if result else None,
+                     "votes_received": (result.votes_received or 0) if result else 0,
+                     "votes_given": given.get(user_id, 0), "can_vote": participants.get(user_id)})
+    if rows:
+        db.session.execute(insert(UserSessionHistory), rows)
+    return len(rows)
+
+
+def rebuild_rollups(session_ids=None):
+    """Бэкфилл: пересобирает сводки всех закрытых сессий (или перечисленных), commit на каждую."""
+    if session_ids is None:
+        session_ids = db.session.scalars(
+            select(Session.session_id).where(Session.active.is_(False)).order_by(Session.session_id)).all()
+    rebuilt = 0
+    for session_id in session_ids:
+        try:
+            if refresh_session_rollup(session_id) is not None:
+                rebuilt += 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[analytics] rollup error for session {session_id}:", e)
+    return rebuilt
+
+
+def _period(start_date, period):
+    return start_date.strftime("%Y-%m") if period == "month" else str(start_date.year)
+
+
+def group_summaries(rows, period):
+    """Сворачивает строки сводок по месяцам/годам: средние взвешиваются числом голосов и голосующих."""
+    groups = defaultdict(lambda: {"sessions": 0, "eligible_voters": 0, "voters_count": 0, "votes_count": 0,
+                                  "score_sum": 0.0, "total_bonus": 0.0})
+    for row in rows:
+        group = groups[_period(row.start_date, period)]
+        group["sessions"] += 1
+        group["eligible_voters"] += row.eligible_voters
+        group["voters_count"] += row.voters_count
+        group["votes_count"] += row.votes_count
+        group["score_sum"] += float(row.average_score or 0) * row.votes_count
+        group["total_bonus"] += float(row.total_bonus or 0)
+    trends = []
+    for key, group in sorted(groups.items()):
+        score_sum = group.pop("score_sum")
+        trends.append({"period": key, **group,
+                       "participation_rate": round(group["voters_count"] / group["eligible_voters"], 4)
+                       if group["eligible_voters"] else None,
+                       "average_score": round(score_sum / group["votes_count"], 2) if group["votes_count"] else None,
+                       "total_bonus": round(group["total_bonus"], 2)})
+    return trends
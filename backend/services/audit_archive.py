@@ -0,0 +1,165 @@
+import gzip, json, os
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete
+from extensions import db
+from models.audit import AuditLog
+from services.pagination import naive_utc
+from services.serialization import AUDIT_LOG, dumps
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+
+def _archive_dir(config):
+    # относительный путь — от instance/ приложения, как у SQLite-базы, а не от текущего каталога
+    archive_dir = config.get("AUDIT_ARCHIVE_DIR", "audit_archive")
+    if has_app_context():
+        return os.path.join(current_app.instance_path, archive_dir)
+    return os.path.abspath(archive_dir)
+
+
+@contextmanager
+def _archive_lock(archive_dir):
+    """Эксклюзивная блокировка каталога архива — одна на все процессы и потоки.
+
+    fcntl есть только на POSIX, поэтому импорт здесь: на Windows — msvcrt.locking первого байта."""
+    with open(os.path.join(archive_dir, LOCK_FILE), "a+") as f:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK сам повторяет попытки ~10 с и затем падает с OSError — ждём дальше
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load_index(archive_dir):
+    """Индекс сегментов: {файл: {day, min_ts, max_ts, min_log_id, max_log_id, rows, actions}}."""
+    try:
+        with open(os.path.join(archive_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_index(archive_dir, index):
+    path = os.path.join(archive_dir, INDEX_FILE)
+    with open(path + ".part", "w") as f:
+        json.dump(index, f, sort_keys=True)
+    os.replace(path + ".part", path)
+
+
+def _write_segment(archive_dir, day, rows):
+    """Один gzip JSON Lines файл на (день, первая строка пачки); возвращает (имя, запись индекса)."""
+    name = f"audit-{day}-{rows[0][0]}.jsonl.gz"
+    path = os.path.join(archive_dir, name)
+    with gzip.open(path + ".part", "wb", compresslevel=6) as f:
+        for row in rows:
+            f.write(dumps(dict(zip(AUDIT_LOG.keys, row))) + b"\n")
+    os.replace(path + ".part", path)
+    timestamps = [row[-1] for row in rows]
+    return name, {"day": day, "min_ts": min(timestamps).isoformat(), "max_ts": max(timestamps).isoformat(),
+                  "min_log_id": min(r[0] for r in rows), "max_log_id": max(r[0] for r in rows),
+                  "rows": len(rows), "actions": dict(Counter(row[2] for row in rows))}
+
+
+def archive_audit_logs(config):
+    """Переносит строки audit_log старше AUDIT_RETENTION_DAYS в сжатые сегменты по дням.
+
+    Пачками по AUDIT_ARCHIVE_BATCH_SIZE: сегменты и индекс пишутся на диск раньше, чем строки
+    удаляются из таблицы, поэтому сбой посередине даёт повторную архивацию той же пачки
+    (имя сегмента то же — файл и запись индекса перезапишутся), а не потерю записей.
+    Архивация из нескольких воркеров/процессов сериализуется flock на каталоге архива, а индекс
+    перечитывается с диска перед каждым сохранением.
+    """
+    days = config.get("AUDIT_RETENTION_DAYS", 90)
+    batch_size = config.get("AUDIT_ARCHIVE_BATCH_SIZE", 5000)
+    archive_dir = _archive_dir(config)
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    stats = {"archived": 0, "segments": 0, "cutoff": cutoff.isoformat()}
+    with _archive_lock(archive_dir):
+        while True:
+            rows = (AUDIT_LOG.query(db.session).filter(AuditLog.timestamp < cutoff)
+                    .order_by(AuditLog.timestamp, AuditLog.log_id).limit(batch_size).all())
+            if not rows:
+                break
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(row[-1].strftime("%Y%m%d"), []).append(tuple(row))
+            entries = dict(_write_segment(archive_dir, day, day_rows) for day, day_rows in by_day.items())
+            index = load_index(archive_dir)
+            index.update(entries)
+            _save_index(archive_dir, index)
+            stats["segments"] += len(entries)
+            db.session.execute(delete(AuditLog).where(AuditLog.log_id.in_([row[0] for row in rows]))
+                               .execution_options(synchronize_session=False))
+            db.session.commit()
+            stats["archived"] += len(rows)
+    return stats
+
+
+def _matches(record, action, user_id, session_id):
+    return ((action is None or record["action"] == action)
+            and (user_id is None or record["user_id"] == user_id)
+            and (session_id is None or record["session_id"] == session_id))
+
+
+def query_archive(config, limit, since=None, until=None, action=None, user_id=None, session_id=None, before=None):
+    """Строки архива в порядке (timestamp, log_id) DESC — кортежи колонок AUDIT_LOG, как из БД.
+
+    Читаются только сегменты, чей интервал времени пересекает [since, until) и ниже курсора
+    before = (timestamp, log_id), а при фильтре по action — где такое действие есть в индексе.
+    Aware-границы переводятся в naive UTC, как хранятся метки в архиве.
+    """
+    since, until = naive_utc(since), naive_utc(until)
+    if before:
+        before = (naive_utc(before[0]), before[1])
+    archive_dir = _archive_dir(config)
+    index = load_index(archive_dir)
+    segments = []
+    for name, entry in index.items():
+        min_ts, max_ts = datetime.fromisoformat(entry["min_ts"]), datetime.fromisoformat(entry["max_ts"])
+        if since and max_ts < since or until and min_ts >= until or before and min_ts > before[0]:
+            continue
+        if action is not None and not entry["actions"].get(action):
+            continue
+        segments.append((max_ts, name))
+
+    found = []
+    # сегменты от новых к старым; остановка, когда следующий целиком старше уже набранного limit
+    for max_ts, name in sorted(segments, reverse=True):
+        if len(found) >= limit and max_ts < found[limit - 1][-1]:
+            break
+        with gzip.open(os.path.join(archive_dir, name), "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                timestamp = datetime.fromisoformat(record["timestamp"])
+                if since and timestamp < since or until and timestamp >= until:
+                    continue
+                if before and (timestamp, record["log_id"]) >= before:
+                    continue
+                if _matches(record, action, user_id, session_id):
+                    record["timestamp"] = timestamp
+                    found.append(tuple(record[k] for k in AUDIT_LOG.keys))
+        found.sort(key=lambda row: (row[-1], row[0]), reverse=True)
+    return found[:limit]
@@ -1,12 +1,145 @@
+import atexit, queue, threading
 from datetime import datetime
+from sqlalchemy import insert
 from extensions import db
 from models.audit import AuditLog
+from services.write_lane import write_lane
 
-def log_action(user_id, action, details=None, session_id=None, ip_address=None, user_agent=None):
-    try:
-        log = AuditLog(user_id=user_id, action=action, details=details, session_id=session_id, ip_address=ip_address, user_agent=user_agent, timestamp=datetime.utcnow())
-        db.session.add(log)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print("[audit_service] error:", e)
+# события безопасности всегда пишутся синхронно, до ответа клиенту
+SYNC_ACTIONS = {"login", "logout", "user_updated", "setting_updated", "vote_update", "vote_delete"}
+
+
+class AuditWriter:
+    """Буферизованная запись audit_log: очередь в памяти + фоновый поток, сбрасывающий пачки
+    по размеру (AUDIT_BATCH_SIZE) или по времени (AUDIT_FLUSH_INTERVAL).
+
+    Очередь ограничена AUDIT_QUEUE_SIZE; при переполнении AUDIT_OVERFLOW_POLICY решает,
+    что делать с новым событием: "sync" — записать его синхронно, "drop" — отбросить.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.sync_actions = set(SYNC_ACTIONS)
+        self.stats = {"queued": 0, "flushed": 0, "dropped": 0, "sync_writes": 0, "failed": 0, "batches": 0}
+        self._queue = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        if self._queue is not None:
+            self.flush()  # повторный init_app не должен терять события, накопленные для прежнего app
+        self.app = app
+        self.enabled = app.config.get("AUDIT_ASYNC", True)
+        self.batch_size = app.config.get("AUDIT_BATCH_SIZE", 500)
+        self.flush_interval = app.config.get("AUDIT_FLUSH_INTERVAL", 1.0)
+        self.overflow_policy = app.config.get("AUDIT_OVERFLOW_POLICY", "sync")
+        self.sync_actions = set(app.config.get("AUDIT_SYNC_ACTIONS", SYNC_ACTIONS))
+        self._queue = queue.Queue(maxsize=app.config.get("AUDIT_QUEUE_SIZE", 10000))
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def submit(self, record, sync=False):
+        if sync or not self.enabled:
+            return self._write_sync(record)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow_policy == "sync":
+                return self._write_sync(record)
+            self._count("dropped")
+            return False
+        self._count("queued")
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Сбрасывает всё, что накопилось в очереди; возвращает число записанных событий."""
+        written = 0
+        with self._lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                written += self._write_batch(batch)
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._queue is not None:
+            self.flush()
+
+    def _count(self, name, n=1):
+        # счётчики меняют потоки запросов и фоновый поток одновременно
+        with self._stats_lock:
+            self.stats[name] += n
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write_batch(self, batch):
+        with self.app.app_context():
+            try:
+                write_lane.run(_insert_records, batch)
+                self._count("flushed", len(batch))
+                self._count("batches")
+                return len(batch)
+            except Exception as e:
+                db.session.rollback()
+                self._count("failed", len(batch))
+                print("[audit_service] batch error:", e)
+                return 0
+            finally:
+                db.session.remove()
+
+    def _write_sync(self, record):
+        try:
+            write_lane.run(_insert_records, [record])
+            self._count("sync_writes")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            self._count("failed")
+            print("[audit_service] error:", e)
+            return False
+
+
+def _insert_records(records):
+    db.session.execute(insert(AuditLog), records)
+
+
+audit_writer = AuditWriter()
+
+
+def stage_action(user_id, action, details=None, session_id=None, ip_address=None, user_agent=None):
+    """Добавляет запись аудита в текущую транзакцию вызывающего: она сохранится его commit-ом."""
+    log = AuditLog(user_id=user_id, action=action, details=details, session_id=session_id,
+                   ip_address=ip_address, user_agent=user_agent, timestamp=datetime.utcnow())
+    db.session.add(log)
+    return log
+
+
+def log_action(user_id, action, details=None, session_id=None, ip_address=None, user_agent=None, sync=None):
+    """Ставит событие в очередь audit_writer; sync=True (или действие из SYNC_ACTIONS) пишет сразу."""
+    record = {"user_id": user_id, "action": action, "details": details, "session_id": session_id,
+              "ip_address": ip_address, "user_agent": user_agent, "timestamp": datetime.utcnow()}
+    if sync is None:
+        sync = action in audit_writer.sync_actions
+    return audit_writer.submit(record, sync=sync)
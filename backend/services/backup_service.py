@@ -1,18 +1,216 @@
-import os, subprocess
+import gzip, os, sqlite3, subprocess, tempfile, threading, time
 from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy.engine import make_url
 from config import Config
+from extensions import db
 
-def create_backup():
-    if not Config.BACKUP_ENABLED:
+try:
+    import zstandard
+except ImportError:  # zstd — необязательная зависимость, без неё пишем gzip
+    zstandard = None
+
+CHUNK_SIZE = 1024 * 1024
+FILE_PREFIX = "smart_bonus_"
+
+# метрики бэкапов процесса (отдаются GET /api/v1/admin/backup)
+backup_stats = {"total": 0, "failed": 0, "last_success_at": None, "last_duration_seconds": None,
+                "last_size_bytes": None, "last_raw_bytes": None, "last_restarts": None, "last_error": None}
+_backup_lock = threading.Lock()
+
+
+class BackupError(Exception):
+    pass
+
+
+def _setting(config, key, default):
+    if config is not None and key in config:
+        return config[key]
+    return getattr(Config, key, default)
+
+
+def _database_url(config):
+    """URL базы, из которой делается бэкап.
+
+    Для базы самого приложения берём URL движка: Flask-SQLAlchemy уже разрешил относительный
+    путь SQLite относительно app.instance_path, а не текущего каталога.
+    """
+    uri = _setting(config, "SQLALCHEMY_DATABASE_URI", "")
+    if has_app_context() and uri == current_app.config.get("SQLALCHEMY_DATABASE_URI"):
+        return db.engine.url
+    return make_url(uri)
+
+
+def _open_compressed(path, method):
+    if method == "zstd":
+        return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(path, "wb"), closefd=True)
+    return gzip.open(path, "wb", compresslevel=6)
+
+
+def _copy_stream(src, dst):
+    raw = 0
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        if not chunk:
+            return raw
+        dst.write(chunk)
+        raw += len(chunk)
+
+
+def _sqlite_snapshot(db_path, snapshot_path, pages, step_sleep, max_restarts):
+    """Копия через online backup API по `pages` страниц за шаг; между шагами база свободна для записи.
+
+    Запись из другого соединения перезапускает копирование; если это случилось больше
+    max_restarts раз, доделываем одним шагом — в WAL читающая транзакция писателей не блокирует.
+    """
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise BackupError("too many restarts")
+        last_remaining = remaining
+        if step_sleep:
+            time.sleep(step_sleep)
+
+    src = sqlite3.connect(db_path, timeout=30)
+    dst = sqlite3.connect(snapshot_path)
+    try:
+        try:
+            src.backup(dst, pages=pages, progress=progress)
+        except BackupError:
+            src.backup(dst, pages=-1)
+        result = dst.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            raise BackupError(f"integrity check failed: {result}")
+    finally:
+        dst.close()
+        src.close()
+    return restarts
+
+
+def _backup_sqlite(db_path, target, method, config):
+    # sqlite3.connect молча создал бы пустой файл, и «успешный» бэкап оказался бы пустым
+    if not db_path or db_path == ":memory:" or not os.path.isfile(db_path):
+        raise BackupError(f"SQLite database file not found: {db_path!r}")
+    fd, snapshot = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        restarts = _sqlite_snapshot(db_path, snapshot,
+                                    pages=_setting(config, "BACKUP_PAGES_PER_STEP", 256),
+                                    step_sleep=_setting(config, "BACKUP_STEP_SLEEP", 0.005),
+                                    max_restarts=_setting(config, "BACKUP_MAX_RESTARTS", 5))
+        with open(snapshot, "rb") as src, _open_compressed(target, method) as dst:
+            raw = _copy_stream(src, dst)
+        return raw, restarts
+    finally:
+        os.remove(snapshot)
+
+
+def _backup_postgres(uri, target, method):
+    # pg_dump пишет в pipe и сжимается на лету — несжатый дамп на диск не попадает;
+    # пароль передаётся через окружение, а не в командной строке
+    env = dict(os.environ, PGPASSWORD=uri.password or "")
+    dsn = uri.set(drivername="postgresql", password=None).render_as_string(hide_password=False)
+    # stderr — во временный файл: pipe без чтения заполнился бы и pg_dump встал бы вместе с нами
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(["pg_dump", "--no-password", dsn], stdout=subprocess.PIPE, stderr=stderr_file, env=env)
+        with _open_compressed(target, method) as dst:
+            raw = _copy_stream(proc.stdout, dst)
+        proc.stdout.close()
+        if proc.wait() != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read(2000).decode(errors="replace")
+            raise BackupError(f"pg_dump exited with {proc.returncode}: {stderr[:500]}")
+    return raw, 0
+
+
+def _backup_dir(config):
+    return os.path.realpath(_setting(config, "BACKUP_DIR", "backups"))
+
+
+def _is_backup_file(name):
+    return name.startswith(FILE_PREFIX) and not name.endswith(".part")
+
+
+def list_backups(config=None):
+    """Готовые бэкапы в BACKUP_DIR, новые первыми: [{filename, size_bytes, created_at}]."""
+    backup_dir = _backup_dir(config)
+    if not os.path.isdir(backup_dir):
+        return []
+    files = []
+    for entry in os.scandir(backup_dir):
+        if entry.is_file(follow_symlinks=False) and _is_backup_file(entry.name):
+            stat = entry.stat()
+            files.append({"filename": entry.name, "size_bytes": stat.st_size,
+                          "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat()})
+    return sorted(files, key=lambda f: f["created_at"], reverse=True)
+
+
+def backup_path(filename, config=None):
+    """Путь к готовому бэкапу по имени или None.
+
+    Имя приходит из URL: путь разрешается через realpath (с симлинками) и должен лежать прямо
+    в BACKUP_DIR — «../», абсолютные пути и ссылки наружу не проходят.
+    """
+    backup_dir = _backup_dir(config)
+    path = os.path.realpath(os.path.join(backup_dir, filename))
+    if os.path.dirname(path) != backup_dir or not _is_backup_file(os.path.basename(path)) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def apply_retention(backup_dir, days):
+    """Удаляет бэкапы старше `days` дней; возвращает имена удалённых файлов."""
+    if not days or days <= 0 or not os.path.isdir(backup_dir):
+        return []
+    cutoff = time.time() - days * 86400
+    removed = []
+    for name in os.listdir(backup_dir):
+        path = os.path.join(backup_dir, name)
+        if _is_backup_file(name) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed.append(name)
+    return removed
+
+
+def create_backup(config=None):
+    """Сжатый (zstd или gzip) снимок базы в BACKUP_DIR; возвращает путь к файлу или None."""
+    if not _setting(config, "BACKUP_ENABLED", True):
         print("[backup] disabled")
         return None
-    backup_dir = os.path.join(os.getcwd(), "backups")
+    uri = _database_url(config)
+    backup_dir = _backup_dir(config)
     os.makedirs(backup_dir, exist_ok=True)
-    filename = f"smart_bonus_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
+    method = _setting(config, "BACKUP_COMPRESSION", "zstd")
+    if method == "zstd" and zstandard is None:
+        method = "gzip"
+    kind = "db" if uri.get_backend_name() == "sqlite" else "sql"
+    filename = f"{FILE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.{kind}.{'zst' if method == 'zstd' else 'gz'}"
     filepath = os.path.join(backup_dir, filename)
-    try:
-        subprocess.run(["pg_dump", Config.SQLALCHEMY_DATABASE_URI, "-f", filepath], check=True)
-        return filepath
-    except Exception as e:
-        print("[backup] error:", e)
-        return None
+
+    with _backup_lock:
+        started = time.perf_counter()
+        backup_stats["total"] += 1
+        try:
+            if kind == "db":
+                raw, restarts = _backup_sqlite(uri.database, filepath + ".part", method, config)
+            else:
+                raw, restarts = _backup_postgres(uri, filepath + ".part", method)
+            os.replace(filepath + ".part", filepath)
+        except Exception as e:
+            if os.path.exists(filepath + ".part"):
+                os.remove(filepath + ".part")
+            backup_stats["failed"] += 1
+            backup_stats["last_error"] = str(e)
+            print("[backup] error:", e)
+            return None
+        backup_stats.update(last_success_at=datetime.utcnow().isoformat(),
+                            last_duration_seconds=round(time.perf_counter() - started, 3),
+                            last_size_bytes=os.path.getsize(filepath), last_raw_bytes=raw,
+                            last_restarts=restarts, last_error=None)
+    apply_retention(backup_dir, _setting(config, "BACKUP_RETENTION_DAYS", 30))
+    return filepath
@@ -1,10 +1,109 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import insert, delete
 from extensions import db
+from models.aggregate import ScoreAggregate
+from models.result import Result
+from models.bonus import BonusParameters
+from services.settings_service import vote_scale
+from services.score_aggregates import load_aggregate_batch, rebuild_aggregates
+from services.results_cache import results_cache
 
-def calculate_bonus_for_session(session_id: int):
-    try:
-        sql = db.text("SELECT * FROM calculate_session_results(:sid)")
-        rows = db.session.execute(sql, {"sid": session_id}).fetchall()
-        return [dict(r._mapping) for r in rows]
-    except Exception as e:
-        print("[bonus_calc] error:", e)
+
+def _ranks(values):
+    """Standard (1,2,2,4) и dense (1,2,2,3) ранги по убыванию values."""
+    n = len(values)
+    order = np.argsort(-values, kind="stable")
+    ordered = values[order]
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = ordered[1:] != ordered[:-1]
+    positions = np.arange(n)
+    standard = np.empty(n, dtype=np.int64)
+    dense = np.empty(n, dtype=np.int64)
+    standard[order] = np.maximum.accumulate(np.where(new_group, positions, 0)) + 1
+    dense[order] = np.cumsum(new_group)
+    return standard, dense
+
+
+def compute_session_results(target_ids, scores, weights=None, total_weekly_bonus=None, scale_min=0, scale_max=10):
+    """Векторизованный расчёт средних, рангов, T1–T4 и доли премии по каждому target_id.
+
+    weights — сколько голосов представляет каждая пара (target_id, score); None означает по одному.
+    Оценки вне шкалы [scale_min, scale_max] в расчёт не попадают: маршруты голосования их не
+    принимают, а гистограмма T1 всегда размером участники × ширина шкалы, сколько бы ни пришло в данных.
+    """
+    if weights is None:
+        weights = np.ones(len(target_ids), dtype=np.int64)
+    lo, hi = int(scale_min), int(scale_max)
+    in_scale = (scores >= lo) & (scores <= hi)
+    if not in_scale.all():
+        print(f"[bonus_calc] ignored {int(weights[~in_scale].sum())} vote(s) outside scale {lo}..{hi}")
+        target_ids, scores, weights = target_ids[in_scale], scores[in_scale], weights[in_scale]
+    if len(target_ids) == 0:
         return []
+
+    users, inverse = np.unique(target_ids, return_inverse=True)
+    n = len(users)
+    counts = np.bincount(inverse, weights=weights, minlength=n).astype(np.int64)
+    sums = np.bincount(inverse, weights=scores * weights, minlength=n)
+    averages = np.round(sums / counts, 2)
+    standard, dense = _ranks(averages)
+
+    # T1: гистограмма оценок каждого участника (score -> количество голосов), из неё — список оценок
+    width = hi - lo + 1
+    histogram = np.bincount(inverse * width + (scores - lo), weights=weights, minlength=n * width).reshape(n, width)
+
+    normalized = averages / float(hi) * 100 if hi else averages
+    if total_weekly_bonus:
+        total_points = averages.sum()
+        bonuses = averages / total_points * float(total_weekly_bonus) if total_points else np.zeros(n)
+    else:
+        bonuses = np.zeros(n)
+    bonuses = np.round(bonuses, 2)
+
+    results = []
+    for i in np.argsort(standard, kind="stable"):
+        row_hist = histogram[i].astype(np.int64)
+        results.append({
+            "user_id": int(users[i]),
+            "average_score": float(averages[i]),
+            "votes_received": int(counts[i]),
+            "rank": int(standard[i]),
+            "total_bonus": float(bonuses[i]),
+            "calculation_details": {
+                # как в calculate_session_results из вики: все полученные оценки (array_agg), по возрастанию
+                "T1_raw_scores": np.repeat(np.arange(lo, lo + width), row_hist).tolist(),
+                "T2_average": float(averages[i]),
+                "T3_normalized": round(float(normalized[i]), 2),
+                "T4_final": float(averages[i]),
+                "dense_rank": int(dense[i]),
+            },
+        })
+    return results
+
+
+def calculate_bonus_for_session(session_id: int):
+    """Считает и сохраняет результаты сессии по score_aggregates — O(participants), без скана votes.
+
+    Ошибки не глушатся: задача jobs откатывает транзакцию и уходит в повтор или failed.
+    """
+    params = (BonusParameters.query.filter_by(session_id=session_id)
+              .order_by(BonusParameters.created_at.desc()).first())
+    if not ScoreAggregate.query.filter_by(session_id=session_id).first():
+        # голоса, поданные до появления агрегатов
+        rebuild_aggregates(session_id)
+    target_ids, scores, weights = load_aggregate_batch(session_id)
+    scale_min, scale_max = vote_scale()
+    results = compute_session_results(
+        target_ids, scores, weights,
+        total_weekly_bonus=params.total_weekly_bonus if params else None,
+        scale_min=scale_min, scale_max=scale_max,
+    )
+
+    now = datetime.utcnow()
+    db.session.execute(delete(Result).where(Result.session_id == session_id))
+    if results:
+        db.session.execute(insert(Result), [dict(r, session_id=session_id, calculated_at=now) for r in results])
+    db.session.commit()
+    results_cache().invalidate(session_id)
+    return results
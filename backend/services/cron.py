@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+# (минимум, максимум) полей: минута, час, день месяца, месяц, день недели (0 и 7 — воскресенье)
+FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+           "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *", "@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *"}
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"bad step in {text!r}")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise CronError(f"{text!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """Cron из пяти полей (минута час день месяц день_недели) с *, списками, диапазонами и шагом.
+
+    Как в Vixie cron: если ограничены и день месяца, и день недели — подходит любой из них.
+    Время — локальное naive datetime процесса.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise CronError(f"expected 5 fields in {expression!r}")
+        try:
+            parsed = [_parse_field(f, low, high) for f, (low, high) in zip(fields, FIELDS)]
+        except ValueError as e:
+            raise CronError(f"bad cron expression {expression!r}: {e}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (sorted(p) for p in parsed)
+        self.weekdays = {d % 7 for d in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays  # cron: 0 — воскресенье
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment):
+        """Ближайшее время срабатывания строго позже moment (с точностью до минуты)."""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(366 * 5):  # «0 0 29 2 *» срабатывает раз в четыре года
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise CronError(f"{self.expression!r} never fires")
@@ -0,0 +1,91 @@
+import threading, time
+from flask import current_app
+from sqlalchemy import select, func
+from extensions import db
+from models.session import Session, SessionParticipant
+
+
+class SessionEligibility:
+    """Снимок прав участников одной сессии: кто может голосовать и за кого (статус active)."""
+
+    __slots__ = ("session_id", "open", "voters", "targets", "version", "checked_at")
+
+    def __init__(self, session_id, open, voters, targets, version, checked_at):
+        self.session_id = session_id
+        self.open = open
+        self.voters = voters
+        self.targets = targets
+        self.version = version
+        self.checked_at = checked_at
+
+
+class EligibilityIndex:
+    """Права голосования по сессиям в памяти: проверка бюллетеня — O(1) на голос без запросов к БД.
+
+    Индекс сессии строится одним SELECT по session_participants при первом голосовании. Маршруты
+    участников и закрытие сессии сбрасывают его сразу (invalidate); изменения из других воркеров
+    gunicorn замечаются сверкой версии — (active сессии, COUNT и MAX(updated_at) участников) —
+    не чаще раза в ELIGIBILITY_CHECK_INTERVAL секунд.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.stats = {"hits": 0, "misses": 0, "version_checks": 0, "invalidations": 0}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(session_id):
+        """(active, число участников, последнее изменение) или None, если сессии нет."""
+        members = SessionParticipant.session_id == session_id
+        row = db.session.execute(
+            select(Session.active,
+                   select(func.count()).select_from(SessionParticipant).where(members).scalar_subquery(),
+                   select(func.max(SessionParticipant.updated_at)).where(members).scalar_subquery())
+            .where(Session.session_id == session_id)
+        ).first()
+        return None if row is None else (bool(row[0]), row[1], row[2])
+
+    def get(self, session_id):
+        """SessionEligibility для сессии или None, если такой сессии нет."""
+        check_interval = current_app.config.get("ELIGIBILITY_CHECK_INTERVAL", 2)
+        now = time.monotonic()
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            if now - entry.checked_at < check_interval:
+                self.stats["hits"] += 1
+                return entry
+            self.stats["version_checks"] += 1
+            if self._version(session_id) == entry.version:
+                entry.checked_at = now
+                self.stats["hits"] += 1
+                return entry
+
+        self.stats["misses"] += 1
+        version = self._version(session_id)
+        if version is None:
+            self.invalidate(session_id, count=False)
+            return None
+        rows = db.session.execute(
+            select(SessionParticipant.user_id, SessionParticipant.can_vote, SessionParticipant.can_receive_votes)
+            .where(SessionParticipant.session_id == session_id, SessionParticipant.status == "active")
+        ).all()
+        entry = SessionEligibility(session_id, version[0],
+                                   frozenset(user_id for user_id, can_vote, _ in rows if can_vote),
+                                   frozenset(user_id for user_id, _, can_receive in rows if can_receive),
+                                   version, now)
+        with self._lock:
+            if session_id not in self._entries and len(self._entries) >= self.maxsize:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[session_id] = entry
+        return entry
+
+    def invalidate(self, session_id, count=True):
+        with self._lock:
+            self._entries.pop(session_id, None)
+            if count:
+                self.stats["invalidations"] += 1
+
+
+def eligibility_index():
+    return current_app.extensions.setdefault("eligibility_index", EligibilityIndex())
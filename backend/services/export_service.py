@@ -0,0 +1,229 @@
+import csv, io, json, re, zipfile, zlib
+from datetime import datetime, date
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from sqlalchemy import select, func
+from extensions import db
+from models.result import Result
+from models.session import SessionParticipant
+from models.user import User
+from models.vote import Vote
+
+CHUNK_SIZE = 64 * 1024
+YIELD_PER = 1000
+
+# dataset -> (колонки, функция построения запроса, колонки для отпечатка данных)
+DATASETS = {
+    "results": (
+        ["user_id", "name", "telegram_username", "average_score", "rank", "total_bonus", "votes_received", "calculation_details"],
+        lambda sid: (select(Result.user_id, User.name, User.telegram_username, Result.average_score, Result.rank,
+                            Result.total_bonus, Result.votes_received, Result.calculation_details)
+                     .join(User, User.user_id == Result.user_id)
+                     .where(Result.session_id == sid)
+                     .order_by(Result.rank, Result.user_id)),
+        (Result, Result.calculated_at),
+    ),
+    "votes": (
+        ["vote_id", "voter_id", "target_id", "score", "modified_by_admin", "created_at", "updated_at"],
+        lambda sid: (select(Vote.vote_id, Vote.voter_id, Vote.target_id, Vote.score, Vote.modified_by_admin,
+                            Vote.created_at, Vote.updated_at)
+                     .where(Vote.session_id == sid)
+                     .order_by(Vote.vote_id)),
+        (Vote, Vote.updated_at),
+    ),
+    "participants": (
+        ["participant_id", "user_id", "name", "telegram_username", "can_vote", "can_receive_votes", "status"],
+        lambda sid: (select(SessionParticipant.participant_id, SessionParticipant.user_id, User.name,
+                            User.telegram_username, SessionParticipant.can_vote,
+                            SessionParticipant.can_receive_votes, SessionParticipant.status)
+                     .join(User, User.user_id == SessionParticipant.user_id)
+                     .where(SessionParticipant.session_id == sid)
+                     .order_by(SessionParticipant.participant_id)),
+        (SessionParticipant, SessionParticipant.updated_at),
+    ),
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def data_fingerprint(dataset, session_id):
+    """(COUNT, MAX(updated)) по выгружаемым строкам — меняется при любом изменении данных."""
+    model, updated_column = DATASETS[dataset][2]
+    count, last = db.session.execute(
+        select(func.count(), func.max(updated_column)).select_from(model).where(model.session_id == session_id)
+    ).one()
+    return f"{count}:{last.isoformat() if last else ''}"
+
+
+def iter_rows(dataset, session_id):
+    """Строки выгрузки через серверный курсор, по YIELD_PER за раз — без загрузки всей сессии в память."""
+    stmt = DATASETS[dataset][1](session_id).execution_options(yield_per=YIELD_PER)
+    for row in db.session.execute(stmt):
+        yield tuple(row)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _cell_text(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _chunked(pieces):
+    """Склеивает мелкие куски в блоки ~CHUNK_SIZE, чтобы не отдавать по строке за раз."""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def encode_csv(columns, rows):
+    def pieces():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_cell_text(v) for v in row])
+            if out.tell() >= CHUNK_SIZE:
+                yield out.getvalue().encode()
+                out.seek(0); out.truncate()
+        yield out.getvalue().encode()
+    return _chunked(pieces())
+
+
+def encode_jsonl(columns, rows):
+    return _chunked(
+        (json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n").encode()
+        for row in rows
+    )
+
+
+class _ZipSink:
+    """Файлоподобный приёмник для zipfile без seek(): zipfile пишет data descriptors, а мы забираем байты."""
+
+    def __init__(self):
+        self.chunks, self.pos, self.pending = [], 0, 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.pos += len(data)
+        self.pending += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.pos
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.pending = 0
+        return data
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'),
+}
+
+
+def _xlsx_cell(value):
+    value = _cell_text(value)
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def encode_xlsx(columns, rows, sheet_name="export"):
+    """Потоковый XLSX без сторонних библиотек: лист пишется inline-строками прямо в zip-поток."""
+    sink = _ZipSink()
+
+    def entry(name):
+        # фиксированная дата — один и тот же набор данных даёт побайтно одинаковый файл (нужно для Range)
+        info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    with zipfile.ZipFile(sink, "w") as zf:
+        for name, content in _XLSX_STATIC.items():
+            zf.writestr(entry(name), content)
+        zf.writestr(entry("xl/workbook.xml"), (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets></workbook>'))
+        yield sink.drain()
+
+        with zf.open(entry("xl/worksheets/sheet1.xml"), "w", force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            sheet.write(("<row>" + "".join(_xlsx_cell(c) for c in columns) + "</row>").encode())
+            for row in rows:
+                sheet.write(("<row>" + "".join(_xlsx_cell(v) for v in row) + "</row>").encode())
+                if sink.pending >= CHUNK_SIZE:
+                    yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+ENCODERS = {"csv": encode_csv, "jsonl": encode_jsonl, "xlsx": encode_xlsx}
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 — формат gzip; mtime=0, вывод детерминирован
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset, session_id, fmt, gzip=False):
+    columns = DATASETS[dataset][0]
+    if fmt == "xlsx":
+        stream = encode_xlsx(columns, iter_rows(dataset, session_id), sheet_name=dataset)
+    else:
+        stream = ENCODERS[fmt](columns, iter_rows(dataset, session_id))
+    return gzip_stream(stream) if gzip else stream
@@ -0,0 +1,81 @@
+import functools, hashlib, threading, time
+from flask import request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from services.lru_cache import LRUCache
+
+_PENDING = "pending"
+
+
+class IdempotencyStore:
+    """Ответы на запросы с заголовком Idempotency-Key: повтор отдаётся из памяти, без БД и аудита.
+
+    Ключ — (JWT identity, endpoint, Idempotency-Key), хранится в LRU на IDEMPOTENCY_MAX_KEYS
+    записей не дольше IDEMPOTENCY_TTL секунд. Пока первый запрос выполняется, повтор получает
+    409; тот же ключ с другим телом — 422. Ответы 5xx не запоминаются, их можно повторить.
+    Хранилище своё у каждого процесса.
+    """
+
+    def __init__(self):
+        self.ttl = 3600
+        self.stats = {"stored": 0, "replayed": 0, "in_progress": 0, "mismatched": 0}
+        self._responses = LRUCache()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get("IDEMPOTENCY_TTL", 3600)
+        self._responses = LRUCache(maxsize=app.config.get("IDEMPOTENCY_MAX_KEYS", 10000))
+
+    def _begin(self, key, fingerprint):
+        """Резервирует ключ; возвращает (запись, True — выполнять запрос / False — ответить по записи)."""
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is not None and time.monotonic() - entry["created"] < self.ttl:
+                return entry, False
+            entry = {"state": _PENDING, "fingerprint": fingerprint, "created": time.monotonic()}
+            self._responses.set(key, entry)
+            return entry, True
+
+    def _finish(self, key, entry, response):
+        # 5xx и 429 — временные отказы, повтор с тем же ключом должен выполниться заново
+        if response.status_code >= 500 or response.status_code == 429 or response.is_streamed:
+            self._responses.pop(key)
+            return
+        entry.update(status=response.status_code, body=response.get_data(), mimetype=response.mimetype)
+        entry["state"] = "done"
+        self.stats["stored"] += 1
+
+    def _replay(self, entry, fingerprint):
+        if entry["fingerprint"] != fingerprint:
+            self.stats["mismatched"] += 1
+            return jsonify({"status":"error","message":"Idempotency-Key was already used with a different request"}), 422
+        if entry["state"] == _PENDING:
+            self.stats["in_progress"] += 1
+            return jsonify({"status":"error","message":"A request with this Idempotency-Key is in progress"}), 409
+        self.stats["replayed"] += 1
+        response = current_app.response_class(entry["body"], status=entry["status"], mimetype=entry["mimetype"])
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    def idempotent(self, view):
+        """Декоратор маршрута; ставится под @jwt_required() и над лимитером — повтор токен не тратит."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            token = request.headers.get("Idempotency-Key")
+            if not token:
+                return view(*args, **kwargs)
+            key = (get_jwt_identity(), request.endpoint, token)
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            entry, new = self._begin(key, fingerprint)
+            if not new:
+                return self._replay(entry, fingerprint)
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except Exception:
+                self._responses.pop(key)
+                raise
+            self._finish(key, entry, response)
+            return response
+        return wrapper
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,218 @@
+import atexit, threading, time, uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, exists, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from extensions import db
+from models.job import Job
+from services.audit_service import log_action
+from services.maintenance import backup, archive_audit
+from services.bonus_calc import calculate_bonus_for_session
+from services.notification_service import notify_user
+from services.score_aggregates import rebuild_aggregates
+from services.analytics import refresh_session_rollup
+from models.session import Session
+
+
+def _calculate(job):
+    results = calculate_bonus_for_session(job.session_id)
+    session = db.session.get(Session, job.session_id)
+    if session is not None and not session.active:
+        # сводки для аналитики только по закрытым сессиям; commit — вместе с задачей
+        refresh_session_rollup(job.session_id)
+    return {"results_count": len(results)}
+
+
+def _recalculate(job):
+    # ручной пересчёт сверяет инкрементальные агрегаты с полным сканом votes и чинит расхождения
+    mismatches = rebuild_aggregates(job.session_id)
+    if mismatches:
+        print(f"[jobs] session {job.session_id}: aggregates repaired for targets {mismatches}")
+    return dict(_calculate(job), aggregate_mismatches=mismatches)
+
+
+def _close_session(job):
+    # закрытие считает по агрегатам за O(participants), без скана votes
+    result = _calculate(job)
+    if job.created_by:
+        notify_user(job.created_by, f"✅ Сессия #{job.session_id} закрыта, результаты рассчитаны.")
+    return result
+
+
+def _backup(job):
+    return backup()
+
+
+def _audit_archive(job):
+    return archive_audit()
+
+
+HANDLERS = {"recalculate": _recalculate, "close_session": _close_session, "backup": _backup,
+            "audit_archive": _audit_archive}
+
+
+class JobQueue:
+    """Персистентная очередь фоновых задач в таблице jobs.
+
+    Маршрут вставляет строку и сразу отвечает 202; фоновый поток каждого процесса забирает
+    задачи по одной (locked_by — метка процесса). Пока задача ждёт в очереди, её dedupe_key
+    (unique) не даёт поставить вторую такую же — повторный запрос получает уже существующую.
+    Задачи одной сессии не выполняются параллельно: захват пропускает сессию, у которой
+    есть выполняющаяся задача. Зависшие дольше JOBS_STALE_AFTER задачи забираются повторно.
+    Упавшая задача возвращается в очередь с экспоненциальной задержкой (next_attempt_at), как в outbox.
+    При JOBS_ASYNC=False задача выполняется сразу в enqueue (тесты, скрипты), а если сессия
+    занята — сразу помечается failed: фонового воркера, который забрал бы её позже, нет.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.token = str(uuid.uuid4())
+        self.stats = {"enqueued": 0, "deduplicated": 0, "succeeded": 0, "failed": 0}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("JOBS_ASYNC", True)
+        self.poll_interval = app.config.get("JOBS_POLL_INTERVAL", 1.0)
+        self.stale_after = timedelta(seconds=app.config.get("JOBS_STALE_AFTER", 1800))
+        self.max_attempts = app.config.get("JOBS_MAX_ATTEMPTS", 3)
+        self.backoff_base = app.config.get("JOBS_BACKOFF_BASE", 5.0)
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="job-worker", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def enqueue(self, job_type, session_id=None, created_by=None, payload=None, dedupe_key=None):
+        """Ставит задачу в очередь; если такая же уже ждёт — возвращает её (created=False)."""
+        job = Job(job_type=job_type, session_id=session_id, created_by=created_by,
+                  payload=payload, dedupe_key=dedupe_key, status="queued", created_at=datetime.utcnow())
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            existing = Job.query.filter_by(dedupe_key=dedupe_key).first()
+            if existing is not None:
+                self.stats["deduplicated"] += 1
+                return existing, False
+            # задачу успели забрать между INSERT и SELECT — ставим заново
+            return self.enqueue(job_type, session_id, created_by, payload, dedupe_key)
+        self.stats["enqueued"] += 1
+        if self.enabled:
+            self._wakeup.set()
+        else:
+            job_id = self._claim(job.job_id)
+            if job_id is None:
+                self._finish(job.job_id, "failed", error=f"session {session_id} has a running job",
+                             dedupe_key=None)
+            self._execute(job_id)
+            db.session.refresh(job)
+        return job, True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.process_next():
+                    continue
+            except Exception as e:
+                print("[jobs] worker error:", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def process_next(self):
+        """Забирает и выполняет одну задачу; возвращает True, если задача была."""
+        with self.app.app_context():
+            try:
+                job_id = self._claim()
+                if job_id is None:
+                    return False
+                self._execute(job_id)
+                return True
+            finally:
+                db.session.remove()
+
+    def _claim(self, job_id=None):
+        now = datetime.utcnow()
+        stale = now - self.stale_after
+        running = aliased(Job)
+        busy = exists().where(running.session_id == Job.session_id, running.status == "running",
+                              running.started_at >= stale, running.job_id != Job.job_id)
+        due = or_(Job.next_attempt_at.is_(None), Job.next_attempt_at <= now)
+        # то же условие повторяется в UPDATE: между SELECT и UPDATE другой воркер мог
+        # забрать эту задачу или запустить другую задачу той же сессии
+        claimable = and_(or_(and_(Job.status == "queued", due), and_(Job.status == "running", Job.started_at < stale)),
+                         ~busy)
+        candidate = select(Job.job_id).where(claimable)
+        if job_id is not None:
+            candidate = candidate.where(Job.job_id == job_id)
+        candidate = candidate.order_by(Job.created_at, Job.job_id).limit(1)
+        job_id = db.session.execute(candidate).scalar()
+        if job_id is None:
+            return None
+        claim_id = f"{self.token}:{uuid.uuid4()}"
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.job_id == job_id, claimable)
+            .values(status="running", locked_by=claim_id, dedupe_key=None, started_at=now,
+                    next_attempt_at=None, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return job_id if claimed else None
+
+    def _execute(self, job_id):
+        if job_id is None:
+            return
+        job = db.session.get(Job, job_id)
+        handler = HANDLERS.get(job.job_type)
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise ValueError(f"unknown job type {job.job_type}")
+            result, status, error = handler(job), "succeeded", None
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            print(f"[jobs] job {job_id} ({job.job_type}) error:", e)
+            result, error = None, str(e)
+            # неизвестный тип повторять бессмысленно; без фонового воркера повторять некому
+            retry = self.enabled and handler is not None and job.attempts < self.max_attempts
+            if retry:
+                delay = self.backoff_base * 2 ** (job.attempts - 1)
+                return self._finish(job_id, "queued", error=error,
+                                    next_attempt_at=datetime.utcnow() + timedelta(seconds=delay))
+            status = "failed"
+        self._finish(job_id, status, result, error, duration_ms=int((time.perf_counter() - started) * 1000))
+
+    def _finish(self, job_id, status, result=None, error=None, duration_ms=None, **values):
+        values.update(status=status, result=result, error=error, locked_by=None)
+        if status != "queued":
+            values.update(finished_at=datetime.utcnow(), duration_ms=duration_ms)
+        db.session.execute(update(Job).where(Job.job_id == job_id).values(**values))
+        db.session.commit()
+        if status == "queued":
+            return
+        self.stats[status] += 1
+        job = db.session.get(Job, job_id)
+        log_action(job.created_by, f"job_{status}", {"job_id": job_id, "job_type": job.job_type,
+                                                     "duration_ms": duration_ms}, session_id=job.session_id)
+
+
+job_queue = JobQueue()
+
+
+def enqueue_session_job(job_type, session_id, created_by=None):
+    """Ждущие задачи сессии дедуплицируются по своему типу: ждущий пересчёт не поглощает
+    закрытие (у того ещё и уведомление автору)."""
+    return job_queue.enqueue(job_type, session_id=session_id, created_by=created_by,
+                             dedupe_key=f"{job_type}:{session_id}")
@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, or_, and_
+from extensions import db
+from models.auth import AuthSession, RevokedToken
+from services.audit_archive import archive_audit_logs
+from services.backup_service import create_backup
+
+
+def _delete_in_batches(model, key, condition, batch_size):
+    """DELETE пачками по первичному ключу с commit после каждой — без долгой блокировки записи."""
+    deleted = 0
+    while True:
+        keys = db.session.scalars(select(key).where(condition).limit(batch_size)).all()
+        if not keys:
+            return deleted
+        db.session.execute(delete(model).where(key.in_(keys)).execution_options(synchronize_session=False))
+        db.session.commit()
+        deleted += len(keys)
+
+
+def cleanup_auth():
+    """Удаляет истёкшие auth_sessions и отозванные токены, которые уже истекли сами."""
+    config = current_app.config
+    batch_size = config.get("MAINTENANCE_DELETE_BATCH_SIZE", 1000)
+    now = datetime.utcnow()
+    # без expires_at отозванный токен живёт не дольше refresh-токена (как в RevocationIndex)
+    ttl = config.get("JWT_REFRESH_TOKEN_EXPIRES", timedelta(days=7))
+    revoked_expired = or_(RevokedToken.expires_at < now,
+                          and_(RevokedToken.expires_at.is_(None), RevokedToken.revoked_at < now - ttl))
+    return {"auth_sessions": _delete_in_batches(AuthSession, AuthSession.session_id, AuthSession.expires_at < now,
+                                                batch_size),
+            "revoked_tokens": _delete_in_batches(RevokedToken, RevokedToken.token_hash, revoked_expired, batch_size)}
+
+
+def _run_outside_transaction(*statements):
+    # VACUUM нельзя выполнить внутри транзакции — отдельное соединение в autocommit
+    db.session.remove()
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+
+
+def analyze_database():
+    if db.engine.dialect.name == "sqlite":
+        _run_outside_transaction("ANALYZE", "PRAGMA optimize")
+    else:
+        _run_outside_transaction("ANALYZE")
+    return {"dialect": db.engine.dialect.name}
+
+
+def vacuum_database():
+    if db.engine.dialect.name == "sqlite":
+        # после VACUUM возвращаем место из WAL-файла
+        _run_outside_transaction("VACUUM", "PRAGMA wal_checkpoint(TRUNCATE)")
+    else:
+        _run_outside_transaction("VACUUM (ANALYZE)")
+    return {"dialect": db.engine.dialect.name}
+
+
+def backup():
+    path = create_backup(current_app.config)
+    if path is None:
+        raise RuntimeError("backup failed, see backup metrics")
+    return {"path": path, "filename": os.path.basename(path)}
+
+
+def archive_audit():
+    return archive_audit_logs(current_app.config)
+
+
+def register_maintenance_tasks(scheduler, config):
+    """Задачи обслуживания и их расписания из конфига; пустое расписание отключает задачу."""
+    tasks = [("auth_cleanup", config.get("AUTH_CLEANUP_SCHEDULE", "*/30 * * * *"), cleanup_auth),
+             ("db_analyze", config.get("DB_ANALYZE_SCHEDULE", "15 3 * * *"), analyze_database),
+             ("db_vacuum", config.get("DB_VACUUM_SCHEDULE", "45 3 * * 0"), vacuum_database),
+             ("audit_archive", config.get("AUDIT_ARCHIVE_SCHEDULE", "30 2 * * *"), archive_audit)]
+    if config.get("BACKUP_ENABLED", True):
+        tasks.append(("backup", config.get("BACKUP_SCHEDULE", "0 2 * * *"), backup))
+    for name, schedule, fn in tasks:
+        if schedule:
+            scheduler.register(name, schedule, fn)
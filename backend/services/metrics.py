@@ -0,0 +1,178 @@
+import bisect, threading, time
+from collections import Counter, defaultdict
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class _Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _one_line(sql, limit):
+    return " ".join(sql.split())[:limit]
+
+
+class RequestMetrics:
+    """Метрики запросов и SQL для /metrics (формат Prometheus) и заголовка Server-Timing.
+
+    На каждый запрос: гистограмма латентности по (blueprint, endpoint, method), число и время
+    SQL-запросов (события before/after_cursor_execute движка). Один и тот же SQL, выполненный
+    в запросе METRICS_N_PLUS_ONE_THRESHOLD раз и больше, считается подозрением на N+1; запросы
+    дольше SLOW_QUERY_MS пишутся в лог с параметрами. Счётчики собираются на процесс.
+    """
+
+    def __init__(self):
+        self.sources = {}
+        self.server_timing = False
+        self.slow_query_seconds = 0.2
+        self.n_plus_one_threshold = 10
+        self.token = None
+        self._lock = threading.Lock()
+        self._latency = defaultdict(_Histogram)
+        self._requests = Counter()
+        self._sql_per_request = defaultdict(lambda: _Histogram(QUERY_COUNT_BUCKETS))
+        self._n_plus_one = Counter()
+        self._sql_statements = 0
+        self._sql_seconds = _Histogram()
+        self._slow_queries = 0
+
+    def init_app(self, app):
+        self.server_timing = app.config.get("METRICS_SERVER_TIMING", False)
+        self.slow_query_seconds = app.config.get("SLOW_QUERY_MS", 200) / 1000
+        self.n_plus_one_threshold = app.config.get("METRICS_N_PLUS_ONE_THRESHOLD", 10)
+        self.token = app.config.get("METRICS_TOKEN")
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+
+    def instrument_engine(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def register_source(self, name, stats):
+        """Словарь счётчиков другой подсистемы (аудит, уведомления, задачи...) публикуется в /metrics."""
+        self.sources[name] = stats
+
+    # --- запросы ---
+
+    def _before_request(self):
+        g._metrics = {"start": time.perf_counter(), "queries": 0, "sql_seconds": 0.0, "statements": Counter()}
+
+    def _after_request(self, response):
+        state = g.pop("_metrics", None)
+        if state is None:
+            return response
+        elapsed = time.perf_counter() - state["start"]
+        key = (request.blueprint or "", request.endpoint or "unmatched", request.method)
+        suspects = [(sql, n) for sql, n in state["statements"].items() if n >= self.n_plus_one_threshold]
+        with self._lock:
+            self._latency[key].observe(elapsed)
+            self._requests[key + (str(response.status_code),)] += 1
+            self._sql_per_request[key].observe(state["queries"])
+            if suspects:
+                self._n_plus_one[key] += 1
+        for sql, n in suspects:
+            print(f"[metrics] possible N+1 in {key[1]}: {n}x {_one_line(sql, 200)}")
+        if self.server_timing:
+            response.headers["Server-Timing"] = (f'app;dur={elapsed * 1000:.1f}, '
+                                                 f'db;dur={state["sql_seconds"] * 1000:.1f};desc="{state["queries"]} queries"')
+        return response
+
+    # --- SQL ---
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        slow = elapsed >= self.slow_query_seconds
+        with self._lock:
+            self._sql_statements += 1
+            self._sql_seconds.observe(elapsed)
+            if slow:
+                self._slow_queries += 1
+        in_request = has_request_context()
+        state = g.get("_metrics") if in_request else None
+        if state is not None:
+            state["queries"] += 1
+            state["sql_seconds"] += elapsed
+            state["statements"][statement] += 1
+        if slow:
+            where = request.endpoint if in_request else "background"
+            print(f"[slow-query] {elapsed * 1000:.1f}ms {where}: {_one_line(statement, 500)} | params={repr(parameters)[:300]}")
+
+    # --- экспорт ---
+
+    @staticmethod
+    def _histogram_lines(name, labels, hist):
+        cumulative = 0
+        for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            yield f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {hist.sum}"
+        yield f"{name}_count{_labels(labels)} {hist.count}"
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (bp, endpoint, method), hist in sorted(self._latency.items()):
+                labels = [("blueprint", bp), ("endpoint", endpoint), ("method", method)]
+                lines += self._histogram_lines("http_request_duration_seconds", labels, hist)
+            lines.append("# TYPE http_requests_total counter")
+            for (bp, endpoint, method, status), n in sorted(self._requests.items()):
+                labels = [("blueprint", bp), ("endpoint", endpoint), ("method", method), ("status", status)]
+                lines.append(f"http_requests_total{_labels(labels)} {n}")
+            lines.append("# TYPE http_request_sql_queries histogram")
+            for (bp, endpoint, method), hist in sorted(self._sql_per_request.items()):
+                labels = [("blueprint", bp), ("endpoint", endpoint), ("method", method)]
+                lines += self._histogram_lines("http_request_sql_queries", labels, hist)
+            lines.append("# TYPE http_request_n_plus_one_total counter")
+            for (bp, endpoint, method), n in sorted(self._n_plus_one.items()):
+                labels = [("blueprint", bp), ("endpoint", endpoint), ("method", method)]
+                lines.append(f"http_request_n_plus_one_total{_labels(labels)} {n}")
+            lines.append("# TYPE sql_statements_total counter")
+            lines.append(f"sql_statements_total {self._sql_statements}")
+            lines.append("# TYPE sql_statement_duration_seconds histogram")
+            lines += self._histogram_lines("sql_statement_duration_seconds", [], self._sql_seconds)
+            lines.append("# TYPE sql_slow_queries_total counter")
+            lines.append(f"sql_slow_queries_total {self._slow_queries}")
+        for source, stats in sorted(self.sources.items()):
+            for key, value in sorted(stats.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"smart_bonus_{source}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def metrics_view(self):
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+request_metrics = RequestMetrics()
@@ -1,7 +1,229 @@
+import atexit, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import select, update, insert, or_
 from config import Config
+from extensions import db
+from models.notification import NotificationOutbox
+from models.user import User
+from services.rate_limit import TokenBucket
+
+
+class NotificationDispatcher:
+    """Отправка уведомлений из notification_outbox пулом потоков.
+
+    Маршруты только вставляют строки в outbox (enqueue_notification) и не ждут Telegram.
+    Фоновый поток забирает готовые к отправке строки пачкой (locked_by — метка процесса,
+    чтобы несколько gunicorn-воркеров не отправили одно и то же), а пул потоков шлёт их
+    через общий requests.Session с пулом соединений. Лимиты Telegram соблюдаются двумя
+    token bucket: глобальным (NOTIFY_GLOBAL_RATE) и на каждый чат (NOTIFY_PER_CHAT_RATE).
+    Ошибки повторяются с экспоненциальной задержкой до NOTIFY_MAX_ATTEMPTS попыток.
+    """
+
+    LOCK_TIMEOUT = timedelta(minutes=5)
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.token = str(uuid.uuid4())
+        self.stats = {"sent": 0, "retried": 0, "failed": 0, "throttled": 0}
+        self._chat_buckets = {}
+        self._chat_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("NOTIFY_ASYNC", True)
+        self.api_url = app.config.get("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+        self.bot_token = app.config.get("TELEGRAM_BOT_TOKEN")
+        self.workers = app.config.get("NOTIFY_WORKERS", 4)
+        self.batch_size = app.config.get("NOTIFY_BATCH_SIZE", 100)
+        self.max_attempts = app.config.get("NOTIFY_MAX_ATTEMPTS", 5)
+        self.backoff_base = app.config.get("NOTIFY_BACKOFF_BASE", 2.0)
+        self.poll_interval = app.config.get("NOTIFY_POLL_INTERVAL", 1.0)
+        self.per_chat_rate = app.config.get("NOTIFY_PER_CHAT_RATE", 1.0)
+        self.global_bucket = TokenBucket(app.config.get("NOTIFY_GLOBAL_RATE", 30))
+
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+        if self.enabled and self._thread is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify")
+            self._thread = threading.Thread(target=self._run, name="notify-dispatcher", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.process_pending():
+                    continue
+            except Exception as e:
+                print("[notify] dispatcher error:", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def process_pending(self):
+        """Забирает одну пачку готовых уведомлений и отправляет её; возвращает размер пачки."""
+        with self.app.app_context():
+            rows = self._claim_batch()
+            db.session.remove()
+        if not rows:
+            return 0
+        if self._pool is not None:
+            list(self._pool.map(self._deliver, rows))
+        else:
+            for row in rows:
+                self._deliver(row)
+        return len(rows)
+
+    def _claim_batch(self):
+        now = datetime.utcnow()
+        is_due = (or_(NotificationOutbox.status == "pending",
+                      (NotificationOutbox.status == "sending") & (NotificationOutbox.locked_at < now - self.LOCK_TIMEOUT)),
+                  NotificationOutbox.next_attempt_at <= now)
+        # сначала дешёвый SELECT: пустой опрос раз в секунду не должен открывать транзакцию записи
+        due = db.session.scalars(select(NotificationOutbox.notification_id).where(*is_due)
+                                 .order_by(NotificationOutbox.notification_id).limit(self.batch_size)).all()
+        if not due:
+            db.session.rollback()
+            return []
+        claim_id = f"{self.token}:{uuid.uuid4()}"
+        # условие «готово к отправке» повторяется в UPDATE — строку, забранную другим воркером, не перехватим
+        db.session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.notification_id.in_(due), *is_due)
+            .values(status="sending", locked_by=claim_id, locked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return db.session.execute(
+            select(NotificationOutbox.notification_id, NotificationOutbox.chat_id,
+                   NotificationOutbox.message, NotificationOutbox.attempts)
+            .where(NotificationOutbox.locked_by == claim_id, NotificationOutbox.status == "sending")
+        ).all()
+
+    def _chat_bucket(self, chat_id):
+        with self._chat_lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                if len(self._chat_buckets) > 10000:
+                    self._chat_buckets.clear()
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+            return bucket
+
+    def _count(self, name):
+        # _deliver выполняется в потоках пула одновременно
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _deliver(self, row):
+        wait = self._chat_bucket(row.chat_id).try_acquire()
+        if wait:
+            # лимит на чат исчерпан — откладываем без траты попытки
+            self._count("throttled")
+            return self._finish(row.notification_id, status="pending", next_attempt_at=datetime.utcnow() + timedelta(seconds=wait))
+        self.global_bucket.acquire()
+
+        error, retry_after = None, None
+        try:
+            r = self.http.post(f"{self.api_url}/bot{self.bot_token}/sendMessage",
+                               json={"chat_id": row.chat_id, "text": row.message}, timeout=5)
+            if r.status_code == 200:
+                self._count("sent")
+                return self._finish(row.notification_id, status="sent", sent_at=datetime.utcnow(),
+                                    attempts=row.attempts + 1, last_error=None)
+            error = f"HTTP {r.status_code}: {r.text[:200]}"
+            if r.status_code == 429:
+                try:
+                    retry_after = r.json().get("parameters", {}).get("retry_after")
+                except ValueError:
+                    pass
+            elif r.status_code < 500:
+                # 400/403 (чат не найден, бот заблокирован) повторять бессмысленно
+                self._count("failed")
+                return self._finish(row.notification_id, status="failed", attempts=row.attempts + 1, last_error=error)
+        except requests.RequestException as e:
+            error = str(e)
+
+        attempts = row.attempts + 1
+        if attempts >= self.max_attempts:
+            self._count("failed")
+            return self._finish(row.notification_id, status="failed", attempts=attempts, last_error=error)
+        self._count("retried")
+        delay = retry_after if retry_after is not None else self.backoff_base * 2 ** (attempts - 1)
+        return self._finish(row.notification_id, status="pending", attempts=attempts, last_error=error,
+                            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay))
+
+    def _finish(self, notification_id, **values):
+        with self.app.app_context():
+            try:
+                db.session.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.notification_id == notification_id)
+                    .values(locked_by=None, locked_at=None, **values)
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print("[notify] outbox update error:", e)
+            finally:
+                db.session.remove()
+
+
+notification_dispatcher = NotificationDispatcher()
+
+
+def enqueue_notification(chat_ids, message):
+    """Ставит уведомление (одному чату или списку чатов) в outbox и сразу возвращается."""
+    if isinstance(chat_ids, (int, str)):
+        chat_ids = [chat_ids]
+    rows = [{"chat_id": chat_id, "message": message, "status": "pending", "attempts": 0,
+             "next_attempt_at": datetime.utcnow()} for chat_id in chat_ids]
+    if not rows:
+        return 0
+    try:
+        db.session.execute(insert(NotificationOutbox), rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("[notify] enqueue error:", e)
+        return 0
+    notification_dispatcher.wakeup()
+    return len(rows)
+
+
+def notify_user(user_id, message):
+    """Уведомление пользователю по user_id: chat_id — его telegram_id, без него ничего не ставим."""
+    chat_id = db.session.scalar(select(User.telegram_id).where(User.user_id == user_id))
+    if chat_id is None:
+        return 0
+    return enqueue_notification(chat_id, message)
+
 
 def send_notification(chat_id, message):
+    """Синхронная отправка в обход outbox (для скриптов и отладки)."""
     if not Config.TELEGRAM_BOT_TOKEN:
         print("[notify] bot token not set")
         return False
@@ -0,0 +1,143 @@
+import base64, json
+from datetime import datetime, date, timezone
+from flask import request
+from sqlalchemy import tuple_, and_, or_, false
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, (datetime, date)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(values) != len(columns):
+            raise ValueError("cursor length")
+        decoded = []
+        for value, column in zip(values, columns):
+            python_type = column.type.python_type
+            if value is not None and python_type in (datetime, date):
+                value = python_type.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, NotImplementedError) as e:
+        raise InvalidCursor(str(e))
+
+
+def bool_arg(name):
+    """?active=true/false/1/0 -> True/False; отсутствует -> None."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+
+def naive_utc(value):
+    """Метки времени в БД и архиве — naive UTC; aware-значение (…Z, +03:00) переводится в него."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def datetime_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise InvalidCursor(f"{name} must be an ISO datetime")
+
+
+def date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidCursor(f"{name} must be an ISO date")
+
+
+def int_arg(name):
+    """?name=42 -> 42; отсутствует -> None; не число -> 400, а не молчаливый фильтр по NULL."""
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidCursor(f"{name} must be an integer")
+
+
+def page_limit(default=DEFAULT_LIMIT):
+    limit = int_arg("limit")
+    if limit is None:
+        return default
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _after(columns, values, descending):
+    """Условие «строго после курсора» для порядка NULLS LAST (по убыванию — NULLS FIRST).
+
+    Row value (a, b) > (x, y) теряет строки с NULL (сравнение с NULL не истинно), поэтому
+    для nullable-колонок условие раскрывается лексикографически с явными IS NULL.
+    """
+    if not any(c.expression.nullable for c in columns) and None not in values:
+        key, cursor = tuple_(*columns), tuple_(*values)
+        return key < cursor if descending else key > cursor
+    branches, equal = [], []
+    for column, value in zip(columns, values):
+        if value is None:
+            beyond = column.isnot(None) if descending else false()
+        elif descending:
+            beyond = column < value
+        else:
+            beyond = or_(column > value, column.is_(None)) if column.expression.nullable else column > value
+        branches.append(and_(*equal, beyond))
+        equal.append(column.is_(None) if value is None else column == value)
+    return or_(*branches)
+
+
+def keyset_page(query, columns, descending=False, default_limit=None):
+    """Одна страница keyset-пагинации по (columns...) с параметрами ?limit=&after=.
+
+    Последняя колонка должна быть уникальной (обычно PK). Сравнение идёт по row value
+    (a, b) > (x, y), поэтому запрос с подходящим составным индексом — это range scan.
+    Без ?limit= и ?after= отдаётся весь список (прежнее поведение), если не задан default_limit.
+    Возвращает (rows, next_cursor); next_cursor=None на последней странице.
+    """
+    after = request.args.get("after")
+    limit = page_limit(default_limit)
+    if limit is None and after:
+        limit = DEFAULT_LIMIT
+    if after:
+        query = query.filter(_after(columns, decode_cursor(after, columns), descending))
+    query = query.order_by(*[c.desc().nulls_first() if descending else c.asc().nulls_last() for c in columns])
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def paginated_response(rows, next_cursor, projection):
+    """Тело — прежний JSON-массив; курсор следующей страницы уходит в заголовке X-Next-Cursor.
+
+    rows — кортежи колонок projection (services/serialization.Projection), без ORM-объектов.
+    """
+    response = projection.response(rows)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
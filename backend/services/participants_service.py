@@ -0,0 +1,131 @@
+from datetime import datetime
+from sqlalchemy import select, update, delete, case, literal, true
+from extensions import db
+from models.session import SessionParticipant
+from models.user import User
+from services.sql_helpers import insert_from_select, upsert
+
+PARTICIPANT_STATUSES = {"active", "excluded", "vacation", "sick_leave"}
+EDITABLE_FIELDS = {"can_vote": bool, "can_receive_votes": bool, "status": str}
+
+
+def enroll_active_users(session_id):
+    """Все активные пользователи становятся участниками сессии одним INSERT ... SELECT (wiki 6.5).
+
+    Админы по умолчанию не голосуют; уже добавленные участники не трогаются.
+    Выполняется в текущей транзакции, без commit; возвращает число добавленных.
+    """
+    now = datetime.utcnow()
+    source = select(
+        literal(session_id), User.user_id,
+        case((User.role == "admin", False), else_=True),
+        true(), literal("active"), literal(now), literal(now),
+    ).where(User.active.is_(True))
+    columns = ["session_id", "user_id", "can_vote", "can_receive_votes", "status", "created_at", "updated_at"]
+    return insert_from_select(SessionParticipant, columns, source, ["session_id", "user_id"])
+
+
+def _validate_fields(item):
+    fields = {}
+    for key, value in item.items():
+        if key == "user_id":
+            continue
+        expected = EDITABLE_FIELDS.get(key)
+        if expected is None:
+            return None, f"unknown field {key}"
+        if not isinstance(value, expected):
+            return None, f"{key} must be {expected.__name__}"
+        if key == "status" and value not in PARTICIPANT_STATUSES:
+            return None, f"status must be one of {sorted(PARTICIPANT_STATUSES)}"
+        fields[key] = value
+    return fields, None
+
+
+def _split_items(items):
+    """(корректные элементы по user_id, ошибки) — дубликаты и нечисловые user_id уходят в ошибки."""
+    valid, errors = {}, []
+    for item in items:
+        user_id = item.get("user_id") if isinstance(item, dict) else None
+        if not isinstance(user_id, int) or isinstance(user_id, bool):
+            errors.append({"user_id": user_id, "error": "user_id must be an integer"})
+        elif user_id in valid:
+            errors.append({"user_id": user_id, "error": "duplicate user_id"})
+        else:
+            valid[user_id] = item
+    return valid, errors
+
+
+def _enrolled(session_id, user_ids):
+    return set(db.session.scalars(
+        select(SessionParticipant.user_id)
+        .where(SessionParticipant.session_id == session_id, SessionParticipant.user_id.in_(user_ids))
+    ))
+
+
+def bulk_add(session_id, items):
+    """Добавляет участников пачкой; возвращает (добавленные user_id, ошибки по элементам)."""
+    valid, errors = _split_items(items)
+    rows = {}
+    for user_id, item in valid.items():
+        fields, error = _validate_fields(item)
+        if error:
+            errors.append({"user_id": user_id, "error": error})
+        else:
+            rows[user_id] = fields
+    if rows:
+        existing_users = set(db.session.scalars(select(User.user_id).where(User.user_id.in_(rows))))
+        enrolled = _enrolled(session_id, rows)
+        for user_id in list(rows):
+            if user_id not in existing_users:
+                errors.append({"user_id": user_id, "error": "user not found"})
+                del rows[user_id]
+            elif user_id in enrolled:
+                errors.append({"user_id": user_id, "error": "already a participant"})
+                del rows[user_id]
+    now = datetime.utcnow()
+    upsert(SessionParticipant, [{"session_id": session_id, "user_id": user_id,
+                                 "can_vote": fields.get("can_vote", True),
+                                 "can_receive_votes": fields.get("can_receive_votes", True),
+                                 "status": fields.get("status", "active"),
+                                 "created_at": now, "updated_at": now} for user_id, fields in rows.items()],
+           conflict_columns=["session_id", "user_id"])
+    return sorted(rows), errors
+
+
+def bulk_update(session_id, items):
+    """Меняет права/статус участников: по одному UPDATE ... WHERE user_id IN (...) на набор значений."""
+    valid, errors = _split_items(items)
+    groups = {}
+    for user_id, item in valid.items():
+        fields, error = _validate_fields(item)
+        if error or not fields:
+            errors.append({"user_id": user_id, "error": error or "nothing to update"})
+            continue
+        groups.setdefault(tuple(sorted(fields.items())), []).append(user_id)
+    enrolled = _enrolled(session_id, [u for ids in groups.values() for u in ids])
+    updated = []
+    now = datetime.utcnow()
+    for fields, user_ids in groups.items():
+        missing = [u for u in user_ids if u not in enrolled]
+        errors += [{"user_id": u, "error": "not a participant"} for u in missing]
+        user_ids = [u for u in user_ids if u in enrolled]
+        if user_ids:
+            db.session.execute(
+                update(SessionParticipant)
+                .where(SessionParticipant.session_id == session_id, SessionParticipant.user_id.in_(user_ids))
+                .values(**dict(fields), updated_at=now)
+                .execution_options(synchronize_session=False))
+            updated += user_ids
+    return sorted(updated), errors
+
+
+def bulk_remove(session_id, user_ids):
+    valid, errors = _split_items([{"user_id": u} for u in user_ids])
+    enrolled = _enrolled(session_id, list(valid))
+    errors += [{"user_id": u, "error": "not a participant"} for u in valid if u not in enrolled]
+    if enrolled:
+        db.session.execute(
+            delete(SessionParticipant)
+            .where(SessionParticipant.session_id == session_id, SessionParticipant.user_id.in_(enrolled))
+            .execution_options(synchronize_session=False))
+    return sorted(enrolled), errors
@@ -0,0 +1,147 @@
+import threading, time
+from flask import current_app
+from sqlalchemy import select, func
+from extensions import db
+from models.vote import Vote
+
+
+class _SessionCounters:
+    __slots__ = ("voters", "votes_count", "eligible", "open", "version", "synced_at", "changed")
+
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.voters = set()
+        self.votes_count = 0
+        self.eligible = 0
+        self.open = True
+        self.version = 0
+        self.synced_at = 0.0
+
+
+class ProgressHub:
+    """Счётчики участия по сессиям в памяти и раздача их SSE-подписчикам (wiki 8.2).
+
+    submit_votes и удаление голоса сообщают изменения (record_ballot / record_vote_removed),
+    счётчики меняются в памяти и версия сессии растёт; открытые стримы сессии ждут на её
+    Condition и после пробуждения читают общий снимок — производитель один, сколько бы
+    дашбордов ни было подключено, а бюллетень будит только подписчиков своей сессии.
+    Полный пересчёт из votes делается при первом обращении и не чаще раза в
+    PROGRESS_RESYNC_INTERVAL — так подтягиваются голоса из других воркеров.
+    """
+
+    def __init__(self):
+        self.stats = {"events": 0, "resyncs": 0, "subscribers": 0}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _counters(self, session_id):
+        with self._lock:
+            counters = self._sessions.get(session_id)
+            if counters is None:
+                counters = self._sessions[session_id] = _SessionCounters()
+            return counters
+
+    def _count(self, stat, delta=1):
+        with self._lock:
+            self.stats[stat] += delta
+
+    def _resync(self, session_id, eligibility_lookup):
+        """Подтягивает число голосующих и состояние сессии, а голоса из БД — раз в PROGRESS_RESYNC_INTERVAL.
+
+        Стрим живёт долго, поэтому соединение из пула возвращается сразу после чтения.
+        """
+        counters = self._counters(session_id)
+        interval = current_app.config.get("PROGRESS_RESYNC_INTERVAL", 30)
+        recount = not counters.synced_at or time.monotonic() - counters.synced_at >= interval
+        try:
+            eligibility = eligibility_lookup()
+            if recount:
+                voters = set(db.session.scalars(select(Vote.voter_id).where(Vote.session_id == session_id).distinct()))
+                votes_count = db.session.scalar(select(func.count()).select_from(Vote).where(Vote.session_id == session_id))
+        finally:
+            db.session.remove()
+        with counters.changed:
+            state = (counters.voters, counters.votes_count, counters.eligible, counters.open)
+            if recount:
+                counters.voters, counters.votes_count = voters, votes_count
+                counters.synced_at = time.monotonic()
+                self._count("resyncs")
+            if eligibility is None:  # сессию удалили
+                counters.eligible, counters.open = 0, False
+            else:
+                counters.eligible, counters.open = len(eligibility.voters), eligibility.open
+            if state != (counters.voters, counters.votes_count, counters.eligible, counters.open):
+                counters.version += 1
+                counters.changed.notify_all()
+        return counters
+
+    def _publish(self, session_id, update):
+        counters = self._sessions.get(session_id)
+        if counters is None:
+            return
+        with counters.changed:
+            if not counters.synced_at:
+                return  # никто не смотрит — счётчики соберутся из БД при первой подписке
+            update(counters)
+            counters.version += 1
+            counters.changed.notify_all()
+        self._count("events")
+
+    def record_ballot(self, session_id, voter_id, new_votes):
+        def update(counters):
+            counters.voters.add(voter_id)
+            counters.votes_count += new_votes
+        self._publish(session_id, update)
+
+    def record_vote_removed(self, session_id):
+        # голосовавший мог остаться без голосов — это уточнит ближайший пересчёт
+        def update(counters):
+            counters.votes_count -= 1
+        self._publish(session_id, update)
+
+    def record_closed(self, session_id):
+        def update(counters):
+            counters.open = False
+        self._publish(session_id, update)
+
+    @staticmethod
+    def snapshot(session_id, counters):
+        voted = len(counters.voters)
+        return {"session_id": session_id, "active": counters.open, "eligible_voters": counters.eligible,
+                "voted_count": voted, "votes_count": counters.votes_count,
+                "participation_rate": round(voted / counters.eligible, 4) if counters.eligible else 0.0}
+
+    def subscribe(self, session_id, eligibility_lookup, heartbeat=15.0):
+        """Генератор снимков прогресса с полем delta относительно предыдущего отправленного;
+        None — heartbeat секунд без изменений. Заканчивается после закрытия сессии.
+
+        eligibility_lookup() — текущий SessionEligibility сессии (число голосующих и открыта ли она) или None.
+        """
+        counters = self._resync(session_id, eligibility_lookup)
+        seen, previous = None, None
+        self._count("subscribers")
+        try:
+            while True:
+                with counters.changed:
+                    if counters.version == seen:
+                        counters.changed.wait(heartbeat)
+                    changed = counters.version != seen
+                    if changed:
+                        seen = counters.version
+                        event = self.snapshot(session_id, counters)
+                if not changed:
+                    yield None
+                    counters = self._resync(session_id, eligibility_lookup)
+                    continue
+                # счётчики могли измениться несколько раз между пробуждениями — дельта считается по снимкам
+                event["delta"] = {k: event[k] - previous[k] for k in ("eligible_voters", "voted_count", "votes_count")
+                                  if previous and event[k] != previous[k]}
+                previous = event
+                yield event
+                if not event["active"]:
+                    return
+        finally:
+            self._count("subscribers", -1)
+
+
+progress_hub = ProgressHub()
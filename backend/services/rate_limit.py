@@ -0,0 +1,91 @@
+import functools, math, threading, time
+from flask import request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from services.lru_cache import LRUCache
+
+
+class TokenBucket:
+    """Классический token bucket: rate токенов в секунду, не больше capacity про запас."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Забирает токены, если они есть. Возвращает 0 при успехе, иначе сколько секунд ждать."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Блокирует вызывающий поток, пока токены не появятся."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class UserRateLimiter:
+    """Token bucket на пару (JWT identity, endpoint) внутри процесса.
+
+    Бакеты живут в LRUCache на RATE_LIMIT_MAX_KEYS ключей: давно неактивный пользователь
+    вытесняется и начинает с полного бакета. Отказ — 429 с Retry-After.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.rate = 1.0
+        self.burst = 5
+        self.stats = {"allowed": 0, "limited": 0}
+        self._buckets = LRUCache()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RATE_LIMIT_ENABLED", True)
+        self.rate = app.config.get("RATE_LIMIT_RATE", 1.0)
+        self.burst = app.config.get("RATE_LIMIT_BURST", 5)
+        self._buckets = LRUCache(maxsize=app.config.get("RATE_LIMIT_MAX_KEYS", 10000))
+
+    def _bucket(self, key, rate, burst):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, capacity=burst)
+                self._buckets.set(key, bucket)
+            return bucket
+
+    def check(self, identity, endpoint, rate=None, burst=None):
+        """0 — запрос пропущен, иначе через сколько секунд появится токен."""
+        if not self.enabled:
+            return 0.0
+        wait = self._bucket((identity, endpoint), rate or self.rate, burst or self.burst).try_acquire()
+        with self._lock:
+            self.stats["limited" if wait else "allowed"] += 1
+        return wait
+
+    def limit(self, rate=None, burst=None):
+        """Декоратор маршрута; ставится под @jwt_required()."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                wait = self.check(get_jwt_identity(), request.endpoint, rate, burst)
+                if wait:
+                    return (jsonify({"status":"error","message":"Too many requests"}), 429,
+                            {"Retry-After": str(math.ceil(wait))})
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+rate_limiter = UserRateLimiter()
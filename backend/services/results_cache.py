@@ -0,0 +1,66 @@
+import hashlib, threading, time
+from flask import current_app
+from sqlalchemy import select, func
+from extensions import db
+from models.result import Result
+from services.serialization import RESULT
+
+
+class ResultsCache:
+    """Готовые JSON-байты GET /results/<id> по ключу (session_id, версия результатов).
+
+    Версия — (COUNT, MAX(calculated_at)) строк results сессии. Пересчёт и правка голосов
+    админом сбрасывают запись сразу (invalidate); изменения из других воркеров gunicorn
+    замечаются сверкой версии не чаще раза в RESULTS_CACHE_CHECK_INTERVAL секунд —
+    между сверками закрытая сессия отдаётся из памяти без запросов к БД.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.stats = {"hits": 0, "misses": 0, "version_checks": 0, "invalidations": 0}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(session_id):
+        count, last = db.session.execute(
+            select(func.count(), func.max(Result.calculated_at)).where(Result.session_id == session_id)
+        ).one()
+        return (count, last)
+
+    def get(self, session_id):
+        """Возвращает (body, etag) для сессии, при необходимости сериализуя результаты заново."""
+        check_interval = current_app.config.get("RESULTS_CACHE_CHECK_INTERVAL", 30)
+        now = time.monotonic()
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            version, body, etag, checked_at = entry
+            if now - checked_at < check_interval:
+                self.stats["hits"] += 1
+                return body, etag
+            self.stats["version_checks"] += 1
+            if self._version(session_id) == version:
+                self._entries[session_id] = (version, body, etag, now)
+                self.stats["hits"] += 1
+                return body, etag
+
+        self.stats["misses"] += 1
+        version = self._version(session_id)
+        rows = (RESULT.query(db.session).filter(Result.session_id == session_id)
+                .order_by(Result.rank.asc(), Result.user_id.asc()).all())
+        body = RESULT.dumps(rows)
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[session_id] = (version, body, etag, now)
+        return body, etag
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self.stats["invalidations"] += 1
+
+
+def results_cache():
+    return current_app.extensions.setdefault("results_cache", ResultsCache())
@@ -0,0 +1,150 @@
+import atexit, threading, time, uuid
+from datetime import datetime
+import click
+from sqlalchemy import update, or_
+from extensions import db
+from models.job import ScheduledTask
+from services.cron import CronExpression
+from services.sql_helpers import upsert
+
+
+class _Task:
+    def __init__(self, name, schedule, fn):
+        self.name = name
+        self.cron = CronExpression(schedule)
+        self.fn = fn
+        self.next_due = None
+        self.stats = {"runs": 0, "failed": 0, "skipped": 0, "last_duration_seconds": 0.0,
+                      "last_success_timestamp": 0, "next_run_timestamp": 0}
+
+
+class Scheduler:
+    """Планировщик задач обслуживания по cron-расписаниям внутри процесса.
+
+    Фоновый поток каждого gunicorn-воркера раз в SCHEDULER_TICK секунд проверяет, не пора ли
+    запустить задачу. Все воркеры вычисляют одно и то же время срабатывания (due), а запускает
+    его только тот, чей UPDATE scheduled_tasks SET last_due = :due WHERE last_due < :due
+    изменил строку — остальные считают запуск пропущенным (skipped). Пропущенные, пока
+    процесс не работал, срабатывания не догоняются. Счётчики задач публикуются в /metrics.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.token = str(uuid.uuid4())
+        self.tasks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("SCHEDULER_ENABLED", True)
+        self.tick = app.config.get("SCHEDULER_TICK", 30)
+        app.cli.add_command(scheduler_cli)
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def register(self, name, schedule, fn):
+        """fn() выполняется в контексте приложения; её результат (dict) сохраняется в last_result."""
+        task = self.tasks[name] = _Task(name, schedule, fn)
+        task.next_due = task.cron.next_after(datetime.now())
+        task.stats["next_run_timestamp"] = int(task.next_due.timestamp())
+        return task
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_pending()
+            except Exception as e:
+                print("[scheduler] error:", e)
+
+    def run_pending(self, now=None):
+        """Запускает задачи, чьё время подошло; возвращает имена выполненных этим процессом."""
+        now = now or datetime.now()
+        ran = []
+        for task in list(self.tasks.values()):
+            if task.next_due > now:
+                continue
+            due = task.next_due
+            task.next_due = task.cron.next_after(now)
+            task.stats["next_run_timestamp"] = int(task.next_due.timestamp())
+            if self.run_task(task.name, due):
+                ran.append(task.name)
+        return ran
+
+    def _claim(self, name, due):
+        upsert(ScheduledTask, [{"name": name}], conflict_columns=["name"])
+        claimed = db.session.execute(
+            update(ScheduledTask)
+            .where(ScheduledTask.name == name, or_(ScheduledTask.last_due.is_(None), ScheduledTask.last_due < due))
+            .values(last_due=due, locked_by=self.token, last_status="running", last_started_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return bool(claimed)
+
+    def run_task(self, name, due=None):
+        """Выполняет задачу, если срабатывание due ещё никто не забрал; due=None — запуск вручную."""
+        task = self.tasks[name]
+        with self.app.app_context():
+            try:
+                if not self._claim(name, due or datetime.now()):
+                    task.stats["skipped"] += 1
+                    return False
+                started = time.perf_counter()
+                try:
+                    result, status, error = task.fn(), "succeeded", None
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[scheduler] task {name} error:", e)
+                    result, status, error = None, "failed", str(e)
+                duration = time.perf_counter() - started
+                db.session.execute(
+                    update(ScheduledTask).where(ScheduledTask.name == name)
+                    .values(last_status=status, last_finished_at=datetime.utcnow(), last_duration_ms=int(duration * 1000),
+                            last_result=result, last_error=error, locked_by=None)
+                    .execution_options(synchronize_session=False))
+                db.session.commit()
+            finally:
+                db.session.remove()
+        task.stats["runs"] += 1
+        task.stats["last_duration_seconds"] = round(duration, 3)
+        if status == "failed":
+            task.stats["failed"] += 1
+        else:
+            task.stats["last_success_timestamp"] = int(time.time())
+        return True
+
+
+scheduler = Scheduler()
+
+
+@click.group("scheduler")
+def scheduler_cli():
+    """Задачи обслуживания по расписанию."""
+
+
+@scheduler_cli.command("list")
+def list_tasks():
+    for name, task in sorted(scheduler.tasks.items()):
+        click.echo(f"{name}\t{task.cron.expression}\tnext {task.next_due.isoformat()}")
+
+
+@scheduler_cli.command("run")
+@click.argument("name")
+def run_task(name):
+    """Выполняет задачу сейчас, вне расписания."""
+    if name not in scheduler.tasks:
+        raise click.BadParameter(f"unknown task, one of {sorted(scheduler.tasks)}", param_hint="NAME")
+    scheduler.run_task(name)
+    with scheduler.app.app_context():
+        state = db.session.get(ScheduledTask, name)
+        click.echo(f"{name}: {state.last_status} in {state.last_duration_ms} ms {state.last_result or state.last_error or ''}")
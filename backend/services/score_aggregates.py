@@ -0,0 +1,138 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import select, func, update, cast, text, Integer, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from extensions import db
+from models.vote import Vote
+from models.aggregate import ScoreAggregate
+from services.sql_helpers import upsert
+
+
+def load_session_votes(session_id: int):
+    """Загружает голоса сессии одним колоночным батчем (target_id, score, weight).
+
+    Одинаковые пары (target_id, score) схлопываются в БД через GROUP BY по покрывающему
+    индексу idx_votes_counting: вместо ~1M строк в Python приходит не больше
+    participants * (vote_scale_max + 1), а weight хранит число таких голосов.
+    """
+    stmt = (select(Vote.target_id, Vote.score, func.count())
+            .where(Vote.session_id == session_id)
+            .group_by(Vote.target_id, Vote.score))
+    # строк немного (GROUP BY), поэтому обычные Row из результата SQLAlchemy, без DBAPI-курсора
+    rows = db.session.execute(stmt).tuples()
+    batch = np.fromiter((tuple(row) for row in rows),
+                        dtype=[("target_id", np.int64), ("score", np.int64), ("weight", np.int64)])
+    return batch["target_id"], batch["score"], batch["weight"]
+
+
+def load_aggregate_batch(session_id: int):
+    """Тот же батч (target_id, score, weight), но собранный из гистограмм score_aggregates за O(participants)."""
+    rows = db.session.execute(
+        select(ScoreAggregate.target_id, ScoreAggregate.histogram).where(ScoreAggregate.session_id == session_id)
+    ).all()
+    triples = [(target_id, int(score), count) for target_id, histogram in rows
+               for score, count in histogram.items() if count]
+    batch = np.array(triples, dtype=[("target_id", np.int64), ("score", np.int64), ("weight", np.int64)])
+    return batch["target_id"], batch["score"], batch["weight"]
+
+
+def _refresh_bounds(agg, histogram):
+    scores = [int(s) for s, c in histogram.items() if c]
+    agg.histogram = histogram
+    agg.min_score = min(scores) if scores else None
+    agg.max_score = max(scores) if scores else None
+
+
+def _histogram_add(column, deltas, dialect):
+    """SQL-выражение: JSON-гистограмма column с прибавленными deltas {оценка: дельта}."""
+    if dialect == "postgresql":
+        pairs = []
+        for score, delta in deltas.items():
+            pairs += [score, func.coalesce(cast(column.op("->>")(score), Integer), 0) + delta]
+        merged = func.coalesce(cast(column, JSONB), text("'{}'::jsonb")).op("||")(func.jsonb_build_object(*pairs))
+        return cast(merged, JSON)
+    pairs = []
+    for score, delta in deltas.items():
+        path = f'$."{score}"'
+        pairs += [path, func.coalesce(func.json_extract(column, path), 0) + delta]
+    return func.json_set(func.coalesce(column, "{}"), *pairs)
+
+
+def apply_vote_deltas(session_id: int, changes):
+    """Применяет изменения голосов к агрегатам в текущей транзакции (без commit).
+
+    changes — итерируемое (target_id, old_score, new_score); old_score=None для нового голоса,
+    new_score=None для удалённого. Дельты прибавляются в самой БД одним
+    INSERT ... ON CONFLICT DO UPDATE SET col = col + :delta на цель, поэтому параллельные
+    бюллетени не теряют обновлений, а первая вставка агрегата не падает на конфликте ключа.
+    Строка после upsert заблокирована до конца транзакции — min/max и нули гистограммы
+    досчитываются по возвращённой гистограмме отдельным UPDATE.
+    """
+    deltas = {}
+    for target_id, old_score, new_score in changes:
+        if old_score == new_score:
+            continue
+        delta = deltas.setdefault(target_id, {"score_sum": 0, "vote_count": 0, "histogram": {}})
+        for score, sign in ((old_score, -1), (new_score, 1)):
+            if score is not None:
+                delta["score_sum"] += sign * score
+                delta["vote_count"] += sign
+                delta["histogram"][str(score)] = delta["histogram"].get(str(score), 0) + sign
+    if not deltas:
+        return
+
+    table = ScoreAggregate.__table__
+    dialect = db.session.get_bind().dialect.name
+    now = datetime.utcnow()
+    for target_id, delta in sorted(deltas.items()):
+        histogram = {s: c for s, c in delta["histogram"].items() if c}
+        if not histogram:
+            continue
+        row = upsert(ScoreAggregate, [{
+            "session_id": session_id, "target_id": target_id, "score_sum": delta["score_sum"],
+            "vote_count": delta["vote_count"], "histogram": histogram, "updated_at": now,
+        }], conflict_columns=["session_id", "target_id"], update_columns={
+            "score_sum": table.c.score_sum + delta["score_sum"],
+            "vote_count": table.c.vote_count + delta["vote_count"],
+            "histogram": _histogram_add(table.c.histogram, histogram, dialect),
+            "updated_at": now,
+        }, returning=[table.c.histogram, table.c.min_score, table.c.max_score]).one()
+        current = {s: c for s, c in (row.histogram or {}).items() if c}
+        scores = [int(s) for s in current]
+        bounds = (min(scores) if scores else None, max(scores) if scores else None)
+        if current != row.histogram or bounds != (row.min_score, row.max_score):
+            db.session.execute(
+                update(table).where(table.c.session_id == session_id, table.c.target_id == target_id)
+                .values(histogram=current, min_score=bounds[0], max_score=bounds[1]))
+
+
+def rebuild_aggregates(session_id: int):
+    """Пересобирает агрегаты сессии полным сканированием votes (без commit).
+
+    Возвращает список target_id, у которых агрегаты расходились с голосами.
+    """
+    target_ids, scores, weights = load_session_votes(session_id)
+    expected = {}
+    for target_id, score, weight in zip(target_ids.tolist(), scores.tolist(), weights.tolist()):
+        expected.setdefault(target_id, {})[str(score)] = weight
+
+    current = {a.target_id: a for a in ScoreAggregate.query.filter_by(session_id=session_id).with_for_update()}
+    mismatches = []
+    for target_id in sorted(set(expected) | set(current)):
+        histogram = expected.get(target_id, {})
+        score_sum = sum(int(s) * c for s, c in histogram.items())
+        vote_count = sum(histogram.values())
+        agg = current.get(target_id)
+        if agg is not None and (agg.histogram, agg.score_sum, agg.vote_count) == (histogram, score_sum, vote_count):
+            continue
+        mismatches.append(target_id)
+        if not histogram:
+            db.session.delete(agg)
+            continue
+        if agg is None:
+            agg = ScoreAggregate(session_id=session_id, target_id=target_id)
+            db.session.add(agg)
+        agg.score_sum = score_sum
+        agg.vote_count = vote_count
+        _refresh_bounds(agg, histogram)
+    return mismatches
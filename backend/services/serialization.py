@@ -0,0 +1,74 @@
+import json
+from decimal import Decimal
+from datetime import datetime, date
+from flask import current_app
+from models.analytics import SessionSummary, UserSessionHistory
+from models.audit import AuditLog
+from models.result import Result
+from models.session import Session, SessionParticipant
+from models.user import User
+
+try:
+    import orjson
+except ImportError:  # без orjson — тот же результат через stdlib json, только медленнее
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """JSON-байты; datetime/date — ISO-строки, Decimal — float (как в to_dict моделей)."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default, sort_keys=True, separators=(",", ":")).encode()
+
+
+class Projection:
+    """Набор колонок модели, который выбирается кортежами вместо ORM-объектов.
+
+    Ключи JSON совпадают с to_dict() модели; constants — поля, которые to_dict отдаёт
+    без чтения колонки. rows — строки запроса по self.columns.
+    """
+
+    def __init__(self, model, fields, constants=None):
+        self.model = model
+        self.keys = list(fields)
+        self.columns = [getattr(model, f) for f in fields]
+        self.constants = dict(constants or {})
+
+    def query(self, session):
+        return session.query(*self.columns)
+
+    def to_dicts(self, rows):
+        keys = self.keys
+        if self.constants:
+            return [{**dict(zip(keys, row)), **self.constants} for row in rows]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def dumps(self, rows):
+        return dumps(self.to_dicts(rows))
+
+    def response(self, rows):
+        return current_app.response_class(self.dumps(rows), mimetype="application/json")
+
+
+USER = Projection(User, ["user_id", "name", "email", "telegram_id", "telegram_username", "role", "active"])
+SESSION = Projection(Session, ["session_id", "start_date", "end_date", "active", "auto_participants", "created_at"],
+                     constants={"closed_at": None})  # Session.to_dict всегда отдаёт closed_at = null
+PARTICIPANT = Projection(SessionParticipant, ["participant_id", "session_id", "user_id", "can_vote",
+                                              "can_receive_votes", "status"])
+RESULT = Projection(Result, ["result_id", "session_id", "user_id", "average_score", "rank", "total_bonus",
+                             "votes_received", "calculated_at", "calculation_details"])
+AUDIT_LOG = Projection(AuditLog, ["log_id", "user_id", "action", "details", "session_id", "ip_address",
+                                  "user_agent", "timestamp"])
+SESSION_SUMMARY = Projection(SessionSummary, ["session_id", "start_date", "end_date", "participants_count",
+                                              "eligible_voters", "voters_count", "participation_rate", "votes_count",
+                                              "average_score", "total_bonus"])
+USER_HISTORY = Projection(UserSessionHistory, ["session_id", "start_date", "user_id", "average_score", "rank",
+                                               "total_bonus", "votes_received", "votes_given", "can_vote"])
@@ -1,16 +1,87 @@
+import threading, time
+from flask import current_app
+from sqlalchemy import select, func
 from extensions import db
 from models.settings import SystemSetting
 
+
+class SettingsCache:
+    """Read-through кэш всей таблицы system_settings (она маленькая и почти не меняется).
+
+    Снимок живёт не дольше SETTINGS_CACHE_TTL секунд. Чтобы воркеры gunicorn видели чужие
+    изменения без брокера, не чаще раза в SETTINGS_VERSION_CHECK_INTERVAL секунд
+    сверяется дешёвая версия таблицы — (MAX(updated_at), COUNT(*)); если она изменилась,
+    снимок перечитывается. set_setting сбрасывает кэш своего процесса сразу.
+    """
+
+    def __init__(self):
+        self.stats = {"hits": 0, "misses": 0, "version_checks": 0, "invalidations": 0}
+        self._values = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _current_version():
+        max_updated, count = db.session.execute(select(func.max(SystemSetting.updated_at), func.count())).one()
+        return (max_updated, count)
+
+    def _reload(self, now):
+        version = self._current_version()
+        self._values = {s.setting_key: s.setting_value for s in SystemSetting.query.all()}
+        self._version = version
+        self._loaded_at = self._checked_at = now
+        self.stats["misses"] += 1
+
+    def snapshot(self):
+        ttl = current_app.config.get("SETTINGS_CACHE_TTL", 60)
+        check_interval = current_app.config.get("SETTINGS_VERSION_CHECK_INTERVAL", 1.0)
+        now = time.monotonic()
+        with self._lock:
+            if self._values is None or now - self._loaded_at > ttl:
+                self._reload(now)
+            elif now - self._checked_at > check_interval:
+                self.stats["version_checks"] += 1
+                self._checked_at = now
+                if self._current_version() != self._version:
+                    self._reload(now)
+                else:
+                    self.stats["hits"] += 1
+            else:
+                self.stats["hits"] += 1
+            return self._values
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+            self.stats["invalidations"] += 1
+
+
+def settings_cache():
+    return current_app.extensions.setdefault("settings_cache", SettingsCache())
+
+
+def list_settings():
+    return dict(settings_cache().snapshot())
+
+
 def get_setting(key, default=None):
-    setting = SystemSetting.query.get(key)
-    return setting.setting_value if setting else default
+    return settings_cache().snapshot().get(key, default)
+
+
+def vote_scale():
+    """(min, max) шкалы оценок из настроек vote_scale_min / vote_scale_max."""
+    return int(get_setting("vote_scale_min", 0)), int(get_setting("vote_scale_max", 10))
+
 
 def set_setting(key, value):
-    setting = SystemSetting.query.get(key)
+    setting = db.session.get(SystemSetting, key)
     if not setting:
         setting = SystemSetting(setting_key=key, setting_value=value)
         db.session.add(setting)
     else:
         setting.setting_value = value
     db.session.commit()
+    settings_cache().invalidate()
     return value
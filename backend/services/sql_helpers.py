@@ -0,0 +1,41 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def upsert(model, rows, conflict_columns, update_columns=None, many=False, returning=None):
+    """Один многострочный INSERT ... ON CONFLICT (...) DO UPDATE/NOTHING для SQLite и PostgreSQL.
+
+    update_columns — список колонок, берущихся из EXCLUDED, или dict {колонка: выражение};
+    None означает DO NOTHING. Выполняется в текущей транзакции, без commit.
+    many=True — для тысяч строк с одинаковым набором ключей: вместо VALUES на всю пачку
+    (компилируется заново на каждый вызов) — executemany по закэшированному однострочному SQL.
+    returning — колонки для RETURNING (значения строк уже после вставки/обновления).
+    """
+    if not rows:
+        return None
+    dialect = db.session.get_bind().dialect.name
+    stmt = _DIALECT_INSERTS[dialect](model.__table__ if many else model)
+    if not many:
+        stmt = stmt.values(rows)
+    if update_columns is None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+    else:
+        if not isinstance(update_columns, dict):
+            update_columns = {c: stmt.excluded[c] for c in update_columns}
+        stmt = stmt.on_conflict_do_update(index_elements=conflict_columns, set_=update_columns)
+    if returning is not None:
+        stmt = stmt.returning(*returning)
+    if many:
+        return db.session.connection().execute(stmt, rows)
+    return db.session.execute(stmt)
+
+
+def insert_from_select(model, columns, select_stmt, conflict_columns):
+    """INSERT INTO model (columns) SELECT ... ON CONFLICT (...) DO NOTHING; возвращает число вставленных строк."""
+    dialect = db.session.get_bind().dialect.name
+    stmt = (_DIALECT_INSERTS[dialect](model)
+            .from_select(columns, select_stmt)
+            .on_conflict_do_nothing(index_elements=conflict_columns))
+    return db.session.execute(stmt).rowcount
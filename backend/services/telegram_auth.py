@@ -1,22 +1,70 @@
-import hashlib, hmac, urllib.parse, json
+import hashlib, hmac, threading, time, urllib.parse, json
+from functools import lru_cache
 from config import Config
+from services.lru_cache import LRUCache
+
+# telegram_id -> user.to_dict(): повторный вход не ходит в users; сбрасывается при изменении пользователя
+# в этом воркере, а в остальных устаревает через TELEGRAM_USER_CACHE_TTL
+telegram_user_cache = LRUCache(maxsize=Config.TELEGRAM_USER_CACHE_SIZE, ttl=Config.TELEGRAM_USER_CACHE_TTL)
+
+
+@lru_cache(maxsize=4)
+def _webapp_secret_key(bot_token):
+    return hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+
+
+class _ReplayGuard:
+    """Хэши уже принятых init_data до истечения окна TELEGRAM_AUTH_MAX_AGE."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def check_and_remember(self, data_hash, auth_date, max_age):
+        now = time.time()
+        with self._lock:
+            if len(self._seen) >= self.maxsize:
+                self._seen = {h: exp for h, exp in self._seen.items() if exp > now}
+                if len(self._seen) >= self.maxsize:
+                    self._seen.clear()
+            expires = self._seen.get(data_hash)
+            if expires is not None and expires > now:
+                return False
+            self._seen[data_hash] = auth_date + max_age
+            return True
+
+
+replay_guard = _ReplayGuard()
+
 
 def verify_telegram_init_data(init_data):
     try:
         if not init_data:
             return None
         if isinstance(init_data, dict):
-            parsed = init_data
+            parsed = dict(init_data)
         else:
             parsed = dict(urllib.parse.parse_qsl(init_data))
         hash_to_check = parsed.pop("hash", None)
+        if not hash_to_check:
+            return None  # неподписанные данные не принимаем
         data_check_items = sorted((k, v) for k, v in parsed.items())
         data_check_string = "\n".join(f"{k}={v}" for k,v in data_check_items)
 
-        secret_key = hmac.new(b"WebAppData", Config.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256).digest()
+        secret_key = _webapp_secret_key(Config.TELEGRAM_BOT_TOKEN)
         calculated_hash = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
-        if hash_to_check and calculated_hash != hash_to_check:
+        if not hmac.compare_digest(calculated_hash, hash_to_check):
             return None
+
+        # устаревшие, без даты и повторно присланные init_data не принимаем
+        max_age = Config.TELEGRAM_AUTH_MAX_AGE
+        auth_date = int(parsed.get("auth_date", 0) or 0)
+        if not auth_date or time.time() - auth_date > max_age:
+            return None
+        if not replay_guard.check_and_remember(hash_to_check, auth_date, max_age):
+            return None
+
         user_json = parsed.get("user")
         if user_json:
             try:
@@ -0,0 +1,160 @@
+import hashlib, heapq, threading, time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from extensions import db, jwt
+from models.auth import RevokedToken
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_hash_from_payload(jwt_payload):
+    """Ключ отзыва — хэш jti из уже декодированного токена: не зависит от того,
+    пришёл токен в заголовке, в ?jwt= или в cookie."""
+    return hash_token(jwt_payload["jti"])
+
+
+class BloomFilter:
+    """Bloom-фильтр по sha256-хэшам: индексы берутся прямо из hex-строки, без повторного хэширования."""
+
+    def __init__(self, capacity, hashes=4):
+        # ~10 бит на элемент даёт < 1% ложных срабатываний при 4 хэшах
+        self.size = max(1024, capacity * 10)
+        self.capacity = self.size // 10
+        self.hashes = hashes
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, token_hash):
+        for i in range(self.hashes):
+            yield int(token_hash[i * 8:(i + 1) * 8], 16) % self.size
+
+    def add(self, token_hash):
+        self.count += 1
+        for p in self._positions(token_hash):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, token_hash):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(token_hash))
+
+
+class RevocationIndex:
+    """In-memory индекс отозванных токенов для token_in_blocklist_loader.
+
+    token_hash -> expires_at хранится в dict; при большом числе записей
+    (REVOCATION_BLOOM_THRESHOLD) перед dict ставится Bloom-фильтр, который отвечает «точно нет»
+    для подавляющего большинства живых токенов. Индекс загружается целиком при первом
+    обращении и дальше догружается инкрементально по revoked_at не чаще раза в
+    REVOCATION_POLL_INTERVAL секунд; записи с истёкшим exp вычищаются при опросе.
+    Истёкшие хэши остаются в Bloom-фильтре (лишний промах отсекает dict), поэтому фильтр
+    пересобирается не на каждое истечение, а когда добавлений стало больше его ёмкости —
+    амортизированно O(1) на отзыв.
+    """
+
+    # запас на транзакции, закоммиченные позже своего revoked_at
+    POLL_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self):
+        self.entries = {}
+        self.bloom = None
+        self._expiry_heap = []
+        self.stats = {"checks": 0, "revoked_hits": 0, "bloom_negatives": 0, "polls": 0}
+        self._last_seen = None
+        self._polled_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.poll_interval = 2.0
+        self.bloom_threshold = 10000
+        self.default_ttl = timedelta(days=7)
+
+    def init_app(self, app):
+        self.poll_interval = app.config.get("REVOCATION_POLL_INTERVAL", 2.0)
+        self.bloom_threshold = app.config.get("REVOCATION_BLOOM_THRESHOLD", 10000)
+        self.default_ttl = app.config.get("JWT_REFRESH_TOKEN_EXPIRES", timedelta(days=7))
+        jwt.token_in_blocklist_loader(self._blocklist_loader)
+
+    def _blocklist_loader(self, jwt_header, jwt_payload):
+        # токен стрима отозван вместе с токеном входа, которым он выдан
+        parent = jwt_payload.get("parent_jti")
+        return self.is_revoked(token_hash_from_payload(jwt_payload)) or (
+            parent is not None and self.is_revoked(hash_token(parent)))
+
+    def is_revoked(self, token_hash):
+        self.stats["checks"] += 1
+        self._refresh()
+        bloom = self.bloom
+        if bloom is not None and token_hash not in bloom:
+            self.stats["bloom_negatives"] += 1
+            return False
+        expires_at = self.entries.get(token_hash)
+        if expires_at is None or expires_at <= datetime.utcnow():
+            return False
+        self.stats["revoked_hits"] += 1
+        return True
+
+    def add(self, token_hash, expires_at):
+        """Локальный отзыв (logout в этом воркере) виден сразу, не дожидаясь опроса."""
+        with self._lock:
+            self._remember(token_hash, expires_at)
+            if self.bloom is not None:
+                self.bloom.add(token_hash)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded and now - self._polled_at < self.poll_interval:
+            return
+        with self._lock:
+            if self._loaded and now - self._polled_at < self.poll_interval:
+                return
+            self._polled_at = now
+            self._poll()
+
+    def _poll(self):
+        self.stats["polls"] += 1
+        utcnow = datetime.utcnow()
+        stmt = select(RevokedToken.token_hash, RevokedToken.revoked_at, RevokedToken.expires_at)
+        if self._loaded and self._last_seen is not None:
+            stmt = stmt.where(RevokedToken.revoked_at >= self._last_seen - self.POLL_OVERLAP)
+        try:
+            rows = db.session.execute(stmt).all()
+        except Exception as e:
+            print("[token_blocklist] poll error:", e)
+            return
+        added = []
+        for token_hash, revoked_at, expires_at in rows:
+            expires_at = expires_at or (revoked_at or utcnow) + self.default_ttl
+            if expires_at > utcnow and self.entries.get(token_hash) != expires_at:
+                self._remember(token_hash, expires_at)
+                added.append(token_hash)
+            if revoked_at and (self._last_seen is None or revoked_at > self._last_seen):
+                self._last_seen = revoked_at
+
+        # куча по exp: чистка стоит O(k log n) от числа истёкших, а не от размера индекса
+        while self._expiry_heap and self._expiry_heap[0][0] <= utcnow:
+            exp, token_hash = heapq.heappop(self._expiry_heap)
+            if self.entries.get(token_hash) == exp:
+                del self.entries[token_hash]
+        if self.bloom is not None:
+            for token_hash in added:
+                self.bloom.add(token_hash)
+        bloom_full = self.bloom is not None and self.bloom.count > self.bloom.capacity
+        if not self._loaded or bloom_full or (self.bloom is None and len(self.entries) >= self.bloom_threshold):
+            self._rebuild_bloom()
+        self._loaded = True
+
+    def _remember(self, token_hash, expires_at):
+        self.entries[token_hash] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, token_hash))
+
+    def _rebuild_bloom(self):
+        if len(self.entries) < self.bloom_threshold:
+            self.bloom = None
+            return
+        bloom = BloomFilter(len(self.entries) * 2)
+        for token_hash in self.entries:
+            bloom.add(token_hash)
+        self.bloom = bloom
+
+
+revocation_index = RevocationIndex()
@@ -0,0 +1,183 @@
+import csv, io, json
+from datetime import datetime
+from sqlalchemy import select, update, insert
+from extensions import db
+from models.user import User
+from services.audit_service import stage_action
+from services.sql_helpers import upsert
+from services.telegram_auth import telegram_user_cache
+
+USER_ROLES = {"user", "manager", "admin"}
+MAX_REPORTED_ERRORS = 1000
+# поле файла -> колонка users; username — имя поля из wiki 6.4
+FIELD_MAP = {"name": "name", "email": "email", "telegram_id": "telegram_id", "username": "telegram_username",
+             "telegram_username": "telegram_username", "role": "role", "active": "active", "user_id": "user_id"}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_records(stream, fmt):
+    """Построчный разбор CSV или JSON Lines из бинарного потока — файл целиком в память не читается.
+
+    Выдаёт (номер строки, dict); для битой JSON-строки вместо dict — текст ошибки.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, {k.strip(): v for k, v in record.items() if k and v not in (None, "")}
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"invalid JSON: {e}"
+                continue
+            yield line_no, record if isinstance(record, dict) else "line must be a JSON object"
+    else:
+        raise ImportFormatError(f"unsupported format {fmt}")
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("1", "true", "yes"):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ("0", "false", "no"):
+        return False
+    raise ValueError("active must be true/false")
+
+
+def _normalize(record):
+    """Запись файла -> (ключ upsert, значения колонок) или ValueError с текстом ошибки."""
+    row = {}
+    for field, value in record.items():
+        column = FIELD_MAP.get(field)
+        if column is None or value is None:
+            continue
+        if column in ("telegram_id", "user_id"):
+            value = int(value)
+        elif column == "active":
+            value = _parse_bool(value)
+        else:
+            value = str(value).strip()
+        row[column] = value
+    if not row.get("name"):
+        raise ValueError("name is required")
+    if "role" in row and row["role"] not in USER_ROLES:
+        raise ValueError(f"role must be one of {sorted(USER_ROLES)}")
+    if "email" in row:
+        row["email"] = row["email"].lower()
+    for key in ("telegram_id", "email", "user_id"):
+        if row.get(key):
+            return key, row
+    raise ValueError("telegram_id, email or user_id is required")
+
+
+def _group_by_fields(rows):
+    """executemany требует одинаковый набор ключей — строки JSONL с разными полями разводим по группам."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return groups.values()
+
+
+def _apply_chunk(chunk, now):
+    """Upsert одной пачки; возвращает (inserted, updated)."""
+    by_key = {"telegram_id": {}, "email": {}, "user_id": {}}
+    for key, row in chunk:
+        by_key[key][row[key]] = row  # повтор ключа в пачке — побеждает последняя строка
+    inserted = updated = 0
+    touched_telegram_ids = []
+
+    for key in ("telegram_id", "user_id"):
+        rows = by_key[key]
+        if not rows:
+            continue
+        column = getattr(User, key)
+        existing = dict(db.session.execute(select(column, User.telegram_id).where(column.in_(rows))).all())
+        touched_telegram_ids += existing.values()
+        # разный набор полей в строках JSONL — отдельный INSERT ... ON CONFLICT на каждый набор
+        for group in _group_by_fields(rows.values()):
+            update_columns = [f for f in group[0] if f not in (key, "user_id")] + ["updated_at"]
+            upsert(User, [{"role": "user", "active": True, "created_at": now, **r, "updated_at": now} for r in group],
+                   conflict_columns=[key], update_columns=update_columns, many=True)
+        updated += len(existing)
+        inserted += len(rows) - len(existing)
+
+    rows = by_key["email"]
+    if rows:
+        # у email нет уникального индекса — ON CONFLICT невозможен, сопоставляем одним SELECT
+        existing = {email: (user_id, telegram_id) for email, user_id, telegram_id in db.session.execute(
+            select(User.email, User.user_id, User.telegram_id).where(User.email.in_(rows)))}
+        touched_telegram_ids += [telegram_id for _, telegram_id in existing.values()]
+        changes = [{"user_id": existing[e][0], **r, "updated_at": now} for e, r in rows.items() if e in existing]
+        new = [{"role": "user", "active": True, "created_at": now, **r, "updated_at": now}
+               for e, r in rows.items() if e not in existing]
+        for group in _group_by_fields(changes):
+            db.session.execute(update(User), group)
+        for group in _group_by_fields(new):
+            db.session.connection().execute(insert(User.__table__), group)
+        updated += len(changes)
+        inserted += len(new)
+
+    # кэш входа через Telegram хранит to_dict пользователя — изменённых из него убираем
+    for telegram_id in touched_telegram_ids:
+        if telegram_id is not None:
+            telegram_user_cache.pop(telegram_id)
+    return inserted, updated
+
+
+def import_users(records, actor_id=None, batch_size=2000):
+    """Импортирует записи пачками по batch_size: commit и одна запись аудита на пачку.
+
+    records — итерируемое (номер строки, dict | текст ошибки). Генератор: после каждой пачки
+    выдаёт прогресс, последним — итог {"done": True, ...} со списком ошибок по строкам.
+    """
+    totals = {"processed": 0, "inserted": 0, "updated": 0, "failed": 0, "chunks": 0}
+    errors = []
+    chunk = []
+
+    def fail(line, message):
+        totals["failed"] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line, "error": message})
+
+    def flush():
+        try:
+            inserted, updated = _apply_chunk([(key, row) for _, key, row in chunk], datetime.utcnow())
+            stage_action(actor_id, "users_imported", {"chunk": totals["chunks"] + 1, "rows": len(chunk),
+                                                      "inserted": inserted, "updated": updated})
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("[user_import] chunk error:", e)
+            for line, _, _ in chunk:
+                fail(line, f"chunk rejected: {e.__class__.__name__}")
+            return
+        totals["chunks"] += 1
+        totals["inserted"] += inserted
+        totals["updated"] += updated
+
+    for line, record in records:
+        totals["processed"] += 1
+        if isinstance(record, str):
+            fail(line, record)
+            continue
+        try:
+            key, row = _normalize(record)
+        except (ValueError, TypeError) as e:
+            fail(line, str(e))
+            continue
+        chunk.append((line, key, row))
+        if len(chunk) >= batch_size:
+            flush()
+            chunk = []
+            yield {"done": False, **totals}
+    if chunk:
+        flush()
+    yield {"done": True, **totals, "errors": errors}
@@ -0,0 +1,100 @@
+import atexit, queue, threading
+from concurrent.futures import Future
+from extensions import db
+
+
+class WriteLane:
+    """Единственный писатель для SQLite: мелкие транзакции склеиваются в групповой commit.
+
+    run(fn, *args) выполняет fn (работающую через db.session) и коммитит. При включённом
+    SQLITE_WRITE_LANE fn уходит в очередь фонового потока: он забирает до WRITE_LANE_BATCH_SIZE
+    задач, выполняет каждую в своём SAVEPOINT внутри одной транзакции BEGIN IMMEDIATE
+    и делает один commit (один fsync WAL на пачку). Ошибка одной задачи откатывает только
+    её SAVEPOINT. Так писатели не бьются за блокировку базы и не получают "database is locked".
+    Выключенная очередь — обычный commit в транзакции вызывающего.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.stats = {"ops": 0, "batches": 0, "max_batch": 0, "failed": 0}
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("SQLITE_WRITE_LANE", False)
+        self.batch_size = app.config.get("WRITE_LANE_BATCH_SIZE", 64)
+        self.timeout = app.config.get("WRITE_LANE_TIMEOUT", 30)
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-lane", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def run(self, fn, *args):
+        if not self.enabled:
+            try:
+                result = fn(*args)
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+        future = Future()
+        self._queue.put((fn, args, future))
+        return future.result(timeout=self.timeout)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            # всё, что накопилось, пока шёл предыдущий commit, уходит одной транзакцией
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        outcomes = []
+        with self.app.app_context():
+            try:
+                if db.session.get_bind().dialect.name == "sqlite":
+                    # блокировка записи берётся сразу (с ожиданием по busy_timeout), а не на первом DML
+                    db.session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for fn, args, future in batch:
+                    try:
+                        with db.session.begin_nested():
+                            outcomes.append((future, fn(*args), None))
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        outcomes.append((future, None, e))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print("[write_lane] batch error:", e)
+                self.stats["failed"] += len(batch)
+                outcomes = [(future, None, e) for _, _, future in batch]
+            finally:
+                db.session.remove()
+        self.stats["ops"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+write_lane = WriteLane()
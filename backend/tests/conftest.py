@@ -13,6 +13,11 @@ def app():
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "JWT_SECRET_KEY": "test-secret",
+        "AUDIT_ASYNC": False,
+        "NOTIFY_ASYNC": False,
+        "JOBS_ASYNC": False,
+        "RATE_LIMIT_ENABLED": False,
+        "SCHEDULER_ENABLED": False,
     })
 
     with app.app_context():
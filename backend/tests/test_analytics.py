@@ -0,0 +1,55 @@
+from datetime import date
+from flask_jwt_extended import create_access_token
+from extensions import db
+from models.analytics import SessionSummary, UserSessionHistory
+from models.bonus import BonusParameters
+from models.session import Session, SessionParticipant
+from models.user import User
+from models.vote import Vote
+
+
+def test_rollups_filled_on_close_and_backfill(client, app):
+    with app.app_context():
+        token = create_access_token(identity=1)
+        users = [User(name=f"Trend {i}", role="user", active=True) for i in range(3)]
+        # id сессий заданы явно, чтобы не занять номера, которые другие тесты используют напрямую
+        sessions = [Session(session_id=2301, start_date=date(2023, 3, 6), end_date=date(2023, 3, 12), auto_participants=False),
+                    Session(session_id=2401, start_date=date(2024, 3, 4), end_date=date(2024, 3, 10), auto_participants=False)]
+        db.session.add_all(users + sessions); db.session.flush()
+        a, b, c = (u.user_id for u in users)
+        old, new = (s.session_id for s in sessions)
+        db.session.add_all([SessionParticipant(session_id=s, user_id=u) for s in (old, new) for u in (a, b, c)] + [
+            Vote(session_id=old, voter_id=a, target_id=b, score=8), Vote(session_id=old, voter_id=b, target_id=a, score=6),
+            Vote(session_id=new, voter_id=a, target_id=b, score=9),
+            BonusParameters(session_id=old, total_weekly_bonus=1000), BonusParameters(session_id=new, total_weekly_bonus=500)])
+        db.session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+    for session_id in (old, new):
+        assert client.post(f"/api/v1/sessions/{session_id}/close", headers=headers).status_code == 202
+
+    trends = client.get("/api/v1/analytics/trends?from=2023-01-01&to=2024-12-31", headers=headers).get_json()
+    assert [(t["session_id"], t["voters_count"], t["eligible_voters"], t["votes_count"]) for t in trends] == \
+        [(old, 2, 3, 2), (new, 1, 3, 1)]
+    assert trends[0]["participation_rate"] == 0.6667 and trends[0]["average_score"] == 7.0
+    assert trends[0]["total_bonus"] == 1000
+
+    yearly = client.get("/api/v1/analytics/trends?period=year&from=2023-01-01&to=2024-12-31", headers=headers).get_json()
+    assert [(y["period"], y["sessions"], y["average_score"]) for y in yearly] == [("2023", 1, 7.0), ("2024", 1, 9.0)]
+
+    history = client.get(f"/api/v1/analytics/trends?user_id={b}", headers=headers).get_json()
+    assert [(h["session_id"], h["rank"], h["votes_given"], h["votes_received"]) for h in history] == \
+        [(old, 1, 1, 1), (new, 1, 0, 1)]
+    assert client.get("/api/v1/analytics/trends?period=week", headers=headers).status_code == 400
+    bad_date = client.get("/api/v1/analytics/trends?from=yesterday", headers=headers)
+    assert bad_date.status_code == 400 and "from must be an ISO date" in bad_date.get_json()["message"]
+    assert client.get("/api/v1/analytics/trends?user_id=abc", headers=headers).status_code == 400
+
+    with app.app_context():
+        db.session.query(UserSessionHistory).filter_by(session_id=old).delete()
+        db.session.query(SessionSummary).filter_by(session_id=old).delete()
+        db.session.commit()
+    output = app.test_cli_runner().invoke(args=["analytics", "backfill", "--session-id", str(old)]).output
+    assert "Rebuilt rollups for 1 session(s)" in output
+    with app.app_context():
+        assert db.session.get(SessionSummary, old).votes_count == 2
+        assert UserSessionHistory.query.filter_by(session_id=old).count() == 3
@@ -0,0 +1,99 @@
+from flask import Flask
+from extensions import db
+from models.audit import AuditLog
+from services.audit_service import AuditWriter
+
+
+def _writer_app(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'audit.db'}", AUDIT_FLUSH_INTERVAL=60, **config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _record(action):
+    return {"user_id": 1, "action": action, "details": None, "session_id": None,
+            "ip_address": None, "user_agent": None, "timestamp": None}
+
+
+def test_audit_writer_batches_and_flushes(tmp_path):
+    app = _writer_app(tmp_path, AUDIT_BATCH_SIZE=50)
+    writer = AuditWriter()
+    writer.init_app(app)
+    for _ in range(120):
+        writer.submit(_record("votes_submitted"))
+    writer.close()
+    with app.app_context():
+        assert AuditLog.query.count() == 120
+    assert writer.stats["flushed"] == 120
+    assert writer.stats["batches"] >= 3
+
+
+def test_audit_writer_overflow_policy(tmp_path):
+    # фоновый поток не сбросит очередь раньше close(): AUDIT_FLUSH_INTERVAL=60 больше времени теста
+    app = _writer_app(tmp_path, AUDIT_QUEUE_SIZE=2, AUDIT_OVERFLOW_POLICY="drop")
+    writer = AuditWriter()
+    writer.init_app(app)
+    for _ in range(5):
+        writer.submit(_record("votes_submitted"))
+    with app.app_context():
+        assert writer.submit(_record("login"), sync=True)
+    writer.close()
+    assert writer.stats["dropped"] == 3
+    with app.app_context():
+        assert AuditLog.query.count() == 3
+
+
+def test_audit_writer_reinit_keeps_pending_records(tmp_path):
+    app = _writer_app(tmp_path)
+    writer = AuditWriter()
+    writer.init_app(app)
+    writer.submit(_record("votes_submitted"))
+    writer.submit(_record("votes_submitted"))
+    writer.init_app(app)
+    with app.app_context():
+        assert AuditLog.query.count() == 2
+    writer.close()
+    assert writer.stats["flushed"] == 2
+
+
+def test_audit_archive_segments_and_query(client, app, tmp_path, monkeypatch):
+    import gzip, json
+    from datetime import datetime, timedelta
+    from flask_jwt_extended import create_access_token
+    monkeypatch.setitem(app.config, "AUDIT_ARCHIVE_DIR", "archive")
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    old = datetime(2020, 1, 1, 12)
+    with app.app_context():
+        token = create_access_token(identity=1)
+        db.session.add_all([AuditLog(user_id=None, action="archive_probe", details={"n": i},
+                                     timestamp=old + timedelta(days=i // 2, minutes=i)) for i in range(5)]
+                           + [AuditLog(action="archive_other", timestamp=old), AuditLog(action="archive_probe")])
+        db.session.commit()
+    output = app.test_cli_runner().invoke(args=["audit", "archive"]).output
+    assert "Archived 6 audit record(s) into 3 segment(s)" in output
+
+    index = json.loads((tmp_path / "archive" / "index.json").read_text())
+    assert sorted(e["rows"] for e in index.values()) == [1, 2, 3]
+    assert sum(e["actions"].get("archive_other", 0) for e in index.values()) == 1
+    segment = next(name for name, e in index.items() if e["actions"].get("archive_other"))
+    with gzip.open(tmp_path / "archive" / segment, "rt") as f:
+        assert {json.loads(line)["action"] for line in f} == {"archive_probe", "archive_other"}
+    with app.app_context():
+        assert AuditLog.query.filter(AuditLog.action.like("archive_%")).count() == 1
+
+    headers = {"Authorization": f"Bearer {token}"}
+    first = client.get("/api/v1/audit/?action=archive_probe&limit=3", headers=headers)
+    assert [r["details"] for r in first.get_json()] == [None, {"n": 4}, {"n": 3}]
+    second = client.get(f"/api/v1/audit/?action=archive_probe&limit=3&after={first.headers['X-Next-Cursor']}",
+                        headers=headers)
+    assert [r["details"]["n"] for r in second.get_json()] == [2, 1, 0]
+    assert "X-Next-Cursor" not in second.headers
+    window = client.get(f"/api/v1/audit/?action=archive_probe&to={(old + timedelta(days=1)).isoformat()}",
+                        headers=headers)
+    assert [r["details"]["n"] for r in window.get_json()] == [1, 0]
+    aware = client.get(f"/api/v1/audit/?action=archive_probe&to={(old + timedelta(days=1)).isoformat()}Z",
+                       headers=headers)
+    assert [r["details"]["n"] for r in aware.get_json()] == [1, 0]
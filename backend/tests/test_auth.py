@@ -1,11 +1,92 @@
 # backend/tests/test_auth.py
 import pytest
-from backend.services import telegram_auth  # убедись, что путь корректный
+from routes import auth as auth_routes
 
 def test_dummy(client, monkeypatch):
     # Патчинг функции, которую реально вызывает код API
-    monkeypatch.setattr(telegram_auth, "verify_telegram_init_data",
+    monkeypatch.setattr(auth_routes, "verify_telegram_init_data",
                         lambda x: {"id": 1, "first_name": "T"})
     
     r = client.post("/api/v1/auth/telegram", json={"init_data": "fake"})
     assert r.status_code == 200
+
+
+def test_logout_revokes_token(client, app):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        token = create_access_token(identity=1)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/users/", headers=headers).status_code == 200
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/v1/users/", headers=headers).status_code == 401
+    # тот же токен в query string (так его шлёт EventSource) тоже отозван
+    assert client.get(f"/api/v1/sessions/1/progress/stream?jwt={token}").status_code == 401
+
+
+def test_revocation_index_polls_and_expires(app):
+    from datetime import datetime, timedelta
+    from extensions import db
+    from models.auth import RevokedToken
+    from services.token_blocklist import RevocationIndex, hash_token
+    # без init_app: он перерегистрировал бы глобальный token_in_blocklist_loader
+    index = RevocationIndex()
+    index.poll_interval, index.bloom_threshold = 0, 1
+    live, stale, fresh = hash_token("live"), hash_token("stale"), hash_token("never-revoked")
+    with app.app_context():
+        db.session.add_all([
+            RevokedToken(token_hash=live, user_id=1, expires_at=datetime.utcnow() + timedelta(hours=1)),
+            RevokedToken(token_hash=stale, user_id=1, expires_at=datetime.utcnow() - timedelta(seconds=1)),
+        ])
+        db.session.commit()
+        assert index.is_revoked(live)
+        assert index.bloom is not None
+        assert not index.is_revoked(stale) and stale not in index.entries
+        assert not index.is_revoked(fresh)
+
+        # истечение записи не пересобирает фильтр на пути запроса — только переполнение
+        bloom = index.bloom
+        index.add(hash_token("short"), datetime.utcnow() - timedelta(seconds=1))
+        assert not index.is_revoked(hash_token("short")) and index.bloom is bloom
+        for i in range(bloom.capacity):
+            index.add(hash_token(f"bulk-{i}"), datetime.utcnow() + timedelta(hours=1))
+        assert index.is_revoked(hash_token("bulk-0")) and index.bloom is not bloom
+
+
+def _signed_init_data(user_id, auth_date):
+    import hashlib, hmac, json, urllib.parse
+    from config import Config
+    fields = {"auth_date": str(auth_date), "user": json.dumps({"id": user_id, "first_name": "Signed"})}
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", Config.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode(fields)
+
+
+def test_telegram_login_single_transaction_and_replay(client, app):
+    import time
+    from models.auth import AuthSession
+    from models.audit import AuditLog
+    from models.user import User
+    from services.telegram_auth import telegram_user_cache
+
+    init_data = _signed_init_data(555, int(time.time()))
+    response = client.post("/api/v1/auth/telegram", json={"init_data": init_data})
+    assert response.status_code == 200
+    user_id = response.get_json()["user"]["user_id"]
+    assert telegram_user_cache.get(555)["user_id"] == user_id
+    with app.app_context():
+        assert User.query.filter_by(telegram_id=555).count() == 1
+        assert AuthSession.query.filter_by(user_id=user_id).count() == 1
+        assert {l.action for l in AuditLog.query.filter(AuditLog.details.isnot(None)).all()} >= {"user_created", "login"}
+
+    # тот же init_data второй раз — повтор, отклоняем
+    assert client.post("/api/v1/auth/telegram", json={"init_data": init_data}).status_code == 401
+    # устаревший auth_date
+    stale = _signed_init_data(555, int(time.time()) - 2 * 86400)
+    assert client.post("/api/v1/auth/telegram", json={"init_data": stale}).status_code == 401
+    # свежий вход берёт пользователя из кэша
+    fresh = _signed_init_data(555, int(time.time()) - 60)
+    assert client.post("/api/v1/auth/telegram", json={"init_data": fresh}).get_json()["user"]["user_id"] == user_id
+    # без подписи — 401, а не вход в обход проверки и защиты от повторов
+    unsigned = "&".join(p for p in _signed_init_data(555, int(time.time()) - 2).split("&") if not p.startswith("hash="))
+    assert client.post("/api/v1/auth/telegram", json={"init_data": unsigned}).status_code == 401
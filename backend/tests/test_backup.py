@@ -0,0 +1,90 @@
+import gzip, os, sqlite3, time
+from services.backup_service import create_backup, apply_retention, backup_stats, backup_path
+
+
+def _make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE votes (id INTEGER PRIMARY KEY, score INTEGER)")
+    conn.executemany("INSERT INTO votes (score) VALUES (?)", [(i % 11,) for i in range(rows)])
+    conn.commit()
+    return conn
+
+
+def test_sqlite_backup_is_compressed_and_consistent(tmp_path):
+    db_path = tmp_path / "live.db"
+    live = _make_db(db_path, 5000)
+    config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}", "BACKUP_DIR": str(tmp_path / "backups"),
+              "BACKUP_COMPRESSION": "gzip", "BACKUP_PAGES_PER_STEP": 2, "BACKUP_STEP_SLEEP": 0}
+    path = create_backup(config)
+    live.close()
+
+    assert path.endswith(".db.gz") and backup_stats["last_size_bytes"] == os.path.getsize(path)
+    restored = tmp_path / "restored.db"
+    with gzip.open(path) as src, open(restored, "wb") as dst:
+        dst.write(src.read())
+    conn = sqlite3.connect(restored)
+    assert conn.execute("SELECT COUNT(*) FROM votes").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    conn.close()
+
+
+def test_retention_removes_only_old_backups(tmp_path):
+    old, fresh, other = tmp_path / "smart_bonus_old.db.gz", tmp_path / "smart_bonus_new.db.gz", tmp_path / "notes.txt"
+    for f in (old, fresh, other):
+        f.write_bytes(b"x")
+    week_ago = time.time() - 8 * 86400
+    os.utime(old, (week_ago, week_ago))
+    os.utime(other, (week_ago, week_ago))
+    assert apply_retention(str(tmp_path), 7) == ["smart_bonus_old.db.gz"]
+    assert fresh.exists() and other.exists()
+
+
+def test_backup_uses_engine_path_and_fails_without_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"SQLALCHEMY_DATABASE_URI": "sqlite:///missing.db", "BACKUP_DIR": str(tmp_path / "backups"),
+              "BACKUP_COMPRESSION": "gzip"}
+    failed = backup_stats["failed"]
+    assert create_backup(config) is None
+    assert backup_stats["failed"] == failed + 1 and "not found" in backup_stats["last_error"]
+    assert not (tmp_path / "missing.db").exists()
+
+    # Flask-SQLAlchemy кладёт относительный путь SQLite в instance/, бэкап должен читать оттуда же
+    from flask import Flask
+    from extensions import db
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite:///bonus.db")
+    db.init_app(app)
+    config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///bonus.db"
+    with app.app_context():
+        db.session.execute(db.text("CREATE TABLE probe (id INTEGER PRIMARY KEY)"))
+        db.session.commit()
+        path = create_backup(config)
+    assert path is not None and os.path.getsize(path) > 0
+    assert not (tmp_path / "bonus.db").exists()
+
+
+def test_backup_download_stays_inside_backup_dir(client, app, tmp_path, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    (backup_dir / "smart_bonus_20250101_020000.db.gz").write_bytes(b"snapshot")
+    (backup_dir / "smart_bonus_20250102_020000.db.gz.part").write_bytes(b"unfinished")
+    (tmp_path / "smart_bonus_secret.db.gz").write_bytes(b"outside")
+    os.symlink(tmp_path / "smart_bonus_secret.db.gz", backup_dir / "smart_bonus_link.db.gz")
+    monkeypatch.setitem(app.config, "BACKUP_DIR", str(backup_dir))
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity=1)}"}
+
+    overview = client.get("/api/v1/admin/backup/", headers=headers).get_json()
+    assert [b["filename"] for b in overview["backups"]] == ["smart_bonus_20250101_020000.db.gz"]
+    assert "total" in overview["stats"]
+    download = client.get("/api/v1/admin/backup/download/smart_bonus_20250101_020000.db.gz", headers=headers)
+    assert download.status_code == 200 and download.data == b"snapshot"
+    for name in ("smart_bonus_link.db.gz", "smart_bonus_20250102_020000.db.gz.part", "smart_bonus_missing.db.gz"):
+        assert client.get(f"/api/v1/admin/backup/download/{name}", headers=headers).status_code == 404, name
+    # URL-слой сам схлопывает «..» и «//», поэтому обход каталога проверяем на backup_path напрямую
+    config = {"BACKUP_DIR": str(backup_dir)}
+    for name in ("../smart_bonus_secret.db.gz", "sub/../../smart_bonus_secret.db.gz", str(tmp_path / "smart_bonus_secret.db.gz")):
+        assert backup_path(name, config) is None, name
+    assert client.get("/api/v1/settings/backup", headers=headers).status_code != 200
@@ -0,0 +1,16 @@
+import numpy as np
+from benchmarks.load_test import compare, summarize
+
+
+def test_summarize_and_compare_flag_regressions():
+    report = {"endpoints": {"submit_votes": summarize(np.array([10.0] * 95 + [100.0] * 5), 0, 1.0)}}
+    assert report["endpoints"]["submit_votes"]["p50_ms"] == 10.0
+    assert report["endpoints"]["submit_votes"]["throughput_rps"] == 100.0
+
+    baseline = {"endpoints": {"submit_votes": {"p95_ms": 20.0, "throughput_rps": 100.0, "errors": 0},
+                              "login": {"p95_ms": 5.0, "throughput_rps": 50.0, "errors": 0}}}
+    assert compare(report, baseline, tolerance=0.25) == []
+    baseline["endpoints"]["submit_votes"]["throughput_rps"] = 200.0
+    baseline["endpoints"]["submit_votes"]["p95_ms"] = 10.0
+    assert len(compare(report, baseline, tolerance=0.25, min_delta_ms=0)) == 2
+    assert len(compare(report, baseline, tolerance=0.25)) == 1  # рост p95 на 4.5 мс — шум
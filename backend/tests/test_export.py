@@ -0,0 +1,57 @@
+import csv, gzip, io, json, zipfile
+from flask_jwt_extended import create_access_token
+from extensions import db
+from models.user import User
+from models.vote import Vote
+
+
+def _seed(app, session_id=30):
+    with app.app_context():
+        users = [User(name=f"Export {i}", telegram_username=f"exp{i}") for i in range(3)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all([Vote(session_id=session_id, voter_id=v.user_id, target_id=t.user_id, score=5 + i)
+                            for i, v in enumerate(users) for t in users])
+        db.session.commit()
+        return create_access_token(identity=users[0].user_id)
+
+
+def test_export_votes_csv_and_gzip_jsonl(client, app):
+    headers = {"Authorization": f"Bearer {_seed(app)}"}
+    response = client.get("/api/v1/export/session/30?dataset=votes&format=csv", headers=headers)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 9 and rows[0]["score"] == "5"
+
+    response = client.get("/api/v1/export/session/30?dataset=votes&format=jsonl&gzip=1", headers=headers)
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(response.get_data()).decode().splitlines()
+    assert [json.loads(l)["score"] for l in lines] == [5, 5, 5, 6, 6, 6, 7, 7, 7]
+
+
+def test_export_xlsx_and_resumable_range(client, app):
+    headers = {"Authorization": f"Bearer {_seed(app, session_id=31)}"}
+    full = client.get("/api/v1/export/session/31?dataset=votes&format=xlsx", headers=headers)
+    data = full.get_data()
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+    assert sheet.count("<row>") == 10
+
+    tail = client.get("/api/v1/export/session/31?dataset=votes&format=xlsx",
+                      headers={**headers, "Range": "bytes=100-", "If-Range": full.headers["ETag"]})
+    assert tail.status_code == 206
+    assert tail.headers["Content-Range"] == f"bytes 100-{len(data) - 1}/{len(data)}"
+    assert data[:100] + tail.get_data() == data
+
+
+def test_range_after_full_download_streams_export_once(client, app, monkeypatch):
+    import routes.export as export_routes
+    headers = {"Authorization": f"Bearer {_seed(app, session_id=32)}"}
+    url = "/api/v1/export/session/32?dataset=votes&format=csv"
+    data = client.get(url, headers=headers).get_data()
+    runs = []
+    original = export_routes.export_stream
+    monkeypatch.setattr(export_routes, "export_stream", lambda *args: runs.append(args) or original(*args))
+    tail = client.get(url, headers={**headers, "Range": "bytes=10-"})
+    assert tail.status_code == 206 and data[:10] + tail.get_data() == data
+    assert len(runs) == 1
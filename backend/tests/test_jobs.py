@@ -0,0 +1,113 @@
+from flask_jwt_extended import create_access_token
+from extensions import db
+from models.job import Job
+from models.vote import Vote
+from services.job_queue import JobQueue
+
+
+def test_close_session_returns_job(client, app):
+    with app.app_context():
+        token = create_access_token(identity=1)
+    headers = {"Authorization": f"Bearer {token}"}
+    session = client.post("/api/v1/sessions/", json={"start_date": "2025-03-03", "end_date": "2025-03-09"}, headers=headers).get_json()["session"]
+
+    response = client.post(f"/api/v1/sessions/{session['session_id']}/close", headers=headers)
+    assert response.status_code == 202
+    job_id = response.get_json()["job"]["job_id"]
+    assert response.headers["Location"] == f"/api/v1/jobs/{job_id}"
+
+    job = client.get(f"/api/v1/jobs/{job_id}", headers=headers).get_json()
+    assert (job["job_type"], job["status"], job["attempts"]) == ("close_session", "succeeded", 1)
+    assert job["duration_ms"] is not None and job["queue_wait_ms"] is not None
+    assert client.get("/api/v1/jobs/999999", headers=headers).status_code == 404
+
+
+def test_background_worker_deduplicates_recalculation(app):
+    queue = JobQueue()
+    queue.init_app(app)
+    queue.enabled = True  # без фонового потока: задачи разбираем вручную через process_next
+    with app.app_context():
+        db.session.add(Vote(session_id=55, voter_id=1, target_id=2, score=7))
+        db.session.commit()
+        first, created = queue.enqueue("recalculate", session_id=55, dedupe_key="recalculate:55")
+        second, created_again = queue.enqueue("recalculate", session_id=55, dedupe_key="recalculate:55")
+        assert created and not created_again and second.job_id == first.job_id
+        job_id = first.job_id
+
+    assert queue.process_next() is True
+    assert queue.process_next() is False
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        assert (job.status, job.dedupe_key, job.result["results_count"]) == ("succeeded", None, 1)
+        # после захвата ключ свободен — новый пересчёт ставится отдельной задачей
+        third, created = queue.enqueue("recalculate", session_id=55, dedupe_key="recalculate:55")
+        assert created and third.job_id != job_id
+    assert queue.process_next() is True
+
+
+def test_failed_calculation_is_retried_and_not_rolled_up(app, monkeypatch):
+    from models.analytics import SessionSummary
+    from models.session import Session
+    from datetime import date, datetime, timedelta
+    queue = JobQueue()
+    queue.init_app(app)
+    queue.enabled, queue.max_attempts = True, 2
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+    monkeypatch.setattr("services.bonus_calc.compute_session_results", broken)
+    with app.app_context():
+        db.session.add(Session(session_id=5701, start_date=date(2025, 5, 5), end_date=date(2025, 5, 11), active=False))
+        db.session.commit()
+        job, _ = queue.enqueue("close_session", session_id=5701, dedupe_key="close_session:5701")
+        job_id = job.job_id
+
+    assert queue.process_next() is True
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        assert job.status == "queued" and job.next_attempt_at > datetime.utcnow()
+    # до next_attempt_at задачу не забирают — упавшая задача не крутится в цикле
+    assert queue.process_next() is False
+    with app.app_context():
+        db.session.get(Job, job_id).next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+    assert queue.process_next() is True
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        assert (job.status, job.attempts, job.error) == ("failed", 2, "boom")
+        assert db.session.get(SessionSummary, 5701) is None
+
+
+def test_sync_job_for_busy_session_fails_instead_of_waiting(app):
+    from datetime import datetime
+    from services.job_queue import enqueue_session_job
+    with app.app_context():
+        db.session.add(Job(job_type="recalculate", session_id=5702, status="running", started_at=datetime.utcnow()))
+        db.session.commit()
+        close, created = enqueue_session_job("close_session", 5702)
+        assert created and (close.status, close.dedupe_key) == ("failed", None)
+        assert "running job" in close.error
+
+
+def test_close_notification_goes_to_creator_telegram_id(app):
+    from datetime import date
+    from models.notification import NotificationOutbox
+    from models.session import Session
+    from models.user import User
+    queue = JobQueue()
+    queue.init_app(app)
+    queue.enabled = True
+    with app.app_context():
+        with_chat, without_chat = User(name="Closer", telegram_id=5703001), User(name="No Telegram")
+        db.session.add_all([with_chat, without_chat,
+                            Session(session_id=5703, start_date=date(2025, 6, 2), end_date=date(2025, 6, 8), active=False),
+                            Session(session_id=5704, start_date=date(2025, 6, 9), end_date=date(2025, 6, 15), active=False)])
+        db.session.commit()
+        queue.enqueue("close_session", session_id=5703, created_by=with_chat.user_id)
+        queue.enqueue("close_session", session_id=5704, created_by=without_chat.user_id)
+        before = NotificationOutbox.query.count()
+
+    assert queue.process_next() is True and queue.process_next() is True
+    with app.app_context():
+        rows = NotificationOutbox.query.order_by(NotificationOutbox.notification_id).offset(before).all()
+        # уведомление уходит в telegram_id создателя, а не в его user_id; без telegram_id — пропуск
+        assert [(row.chat_id, "#5703" in row.message) for row in rows] == [(5703001, True)]
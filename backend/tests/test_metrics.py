@@ -0,0 +1,27 @@
+from flask_jwt_extended import create_access_token
+from services.metrics import request_metrics
+
+
+def test_metrics_endpoint_and_server_timing(client, app, monkeypatch):
+    with app.app_context():
+        token = create_access_token(identity=1)
+    monkeypatch.setattr(request_metrics, "server_timing", True)
+    monkeypatch.setattr(request_metrics, "n_plus_one_threshold", 1)
+
+    response = client.get("/api/v1/sessions/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("app;dur=") and "db;dur=" in timing and "queries" in timing
+
+    body = client.get("/metrics").get_data(as_text=True)
+    labels = 'blueprint="sessions_bp",endpoint="sessions_bp.get_sessions",method="GET"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}' in body
+    assert f'http_requests_total{{{labels},status="200"}}' in body
+    assert f"http_request_n_plus_one_total{{{labels}}}" in body
+    assert "sql_statements_total" in body and "smart_bonus_audit_sync_writes" in body
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(request_metrics, "token", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
@@ -0,0 +1,117 @@
+import json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from flask import Flask
+from extensions import db
+from models.notification import NotificationOutbox
+from services.notification_service import NotificationDispatcher, enqueue_notification
+
+
+class FakeTelegram(BaseHTTPRequestHandler):
+    """Локальная замена api.telegram.org: первые fail_first запросов в каждый чат отвечают fail_status."""
+    fail_first, fail_status = 0, 500
+    calls = {}
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        chat_id = payload["chat_id"]
+        self.calls[chat_id] = self.calls.get(chat_id, 0) + 1
+        if self.calls[chat_id] <= self.fail_first:
+            status, body = self.fail_status, {"ok": False, "parameters": {"retry_after": 0}}
+        else:
+            status, body = 200, {"ok": True}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def telegram():
+    FakeTelegram.calls = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTelegram)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def _dispatcher(tmp_path, telegram, **config):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'outbox.db'}",
+                      TELEGRAM_API_URL=f"http://127.0.0.1:{telegram.server_port}", TELEGRAM_BOT_TOKEN="test",
+                      NOTIFY_POLL_INTERVAL=0.05, NOTIFY_BACKOFF_BASE=0, NOTIFY_GLOBAL_RATE=1000, **config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    dispatcher = NotificationDispatcher()
+    dispatcher.init_app(app)
+    return app, dispatcher
+
+
+def _wait_for(app, status, count, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app.app_context():
+            if NotificationOutbox.query.filter_by(status=status).count() == count:
+                return True
+        time.sleep(0.05)
+    return False
+
+
+def test_outbox_broadcast_is_delivered(tmp_path, telegram):
+    app, dispatcher = _dispatcher(tmp_path, telegram)
+    with app.app_context():
+        assert enqueue_notification(list(range(1, 51)), "Голосование открыто") == 50
+    dispatcher.wakeup()
+    assert _wait_for(app, "sent", 50)
+    dispatcher.close()
+    assert sorted(FakeTelegram.calls) == list(range(1, 51))
+    assert dispatcher.stats["sent"] == 50
+
+
+@pytest.mark.parametrize("fail_status", [500, 429])
+def test_outbox_retries_with_backoff(tmp_path, telegram, fail_status):
+    FakeTelegram.fail_first, FakeTelegram.fail_status = 2, fail_status
+    app, dispatcher = _dispatcher(tmp_path, telegram, NOTIFY_PER_CHAT_RATE=1000)
+    try:
+        with app.app_context():
+            enqueue_notification([7, 8], "retry me")
+        assert _wait_for(app, "sent", 2)
+    finally:
+        FakeTelegram.fail_first = 0
+        dispatcher.close()
+    with app.app_context():
+        assert [n.attempts for n in NotificationOutbox.query.all()] == [3, 3]
+    assert dispatcher.stats["retried"] == 4
+
+
+def test_outbox_gives_up_on_client_errors(tmp_path, telegram):
+    FakeTelegram.fail_first, FakeTelegram.fail_status = 1, 403
+    app, dispatcher = _dispatcher(tmp_path, telegram)
+    try:
+        with app.app_context():
+            enqueue_notification(9, "blocked")
+        assert _wait_for(app, "failed", 1)
+    finally:
+        FakeTelegram.fail_first = 0
+        dispatcher.close()
+    assert FakeTelegram.calls == {9: 1}
+
+
+def test_empty_poll_does_not_write(tmp_path, telegram):
+    from sqlalchemy import event
+    app, dispatcher = _dispatcher(tmp_path, telegram, NOTIFY_ASYNC=False)
+    statements = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0].upper())
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert dispatcher.process_pending() == 0
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert statements == ["SELECT"]
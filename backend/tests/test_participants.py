@@ -0,0 +1,64 @@
+from flask_jwt_extended import create_access_token
+from extensions import db
+from models.session import SessionParticipant
+from models.user import User
+
+
+def test_auto_enrollment_and_bulk_operations(client, app):
+    with app.app_context():
+        token = create_access_token(identity=1)
+        users = [User(name="Auto Admin", role="admin", active=True), User(name="Auto User", role="user", active=True),
+                 User(name="Auto Gone", role="user", active=False), User(name="Late User", role="user", active=True)]
+        db.session.add_all(users[:3]); db.session.commit()
+        admin_id, user_id, gone_id = (u.user_id for u in users[:3])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    session_id = client.post("/api/v1/sessions/", json={"start_date": "2025-05-05", "end_date": "2025-05-11"},
+                             headers=headers).get_json()["session"]["session_id"]
+    with app.app_context():
+        enrolled = {p.user_id: p for p in SessionParticipant.query.filter_by(session_id=session_id)}
+        assert enrolled[admin_id].can_vote is False and enrolled[user_id].can_vote is True
+        assert gone_id not in enrolled
+        db.session.add(users[3]); db.session.commit()
+        late_id = users[3].user_id
+
+    response = client.post(f"/api/v1/participants/{session_id}/bulk", headers=headers,
+                           json={"user_ids": [late_id, user_id, 10**9, late_id], "can_receive_votes": False})
+    body = response.get_json()
+    assert body["applied"] == [late_id]
+    assert sorted(e["error"] for e in body["errors"]) == ["already a participant", "duplicate user_id", "user not found"]
+
+    response = client.patch(f"/api/v1/participants/{session_id}/bulk", headers=headers, json={"participants": [
+        {"user_id": user_id, "status": "vacation"}, {"user_id": late_id, "status": "vacation"},
+        {"user_id": admin_id, "status": "fired"}, {"user_id": gone_id, "can_vote": False}]})
+    body = response.get_json()
+    assert body["applied"] == sorted([user_id, late_id])
+    assert {e["user_id"]: e["error"] for e in body["errors"]}[gone_id] == "not a participant"
+
+    response = client.delete(f"/api/v1/participants/{session_id}/bulk", headers=headers, json={"user_ids": [late_id, gone_id]})
+    assert response.get_json()["applied"] == [late_id]
+    with app.app_context():
+        statuses = {p.user_id: p.status for p in SessionParticipant.query.filter_by(session_id=session_id)}
+        assert statuses[user_id] == "vacation" and statuses[admin_id] == "active" and late_id not in statuses
+    assert client.post(f"/api/v1/participants/{session_id}/bulk", headers=headers, json={}).status_code == 400
+
+
+def test_bulk_add_requires_open_session(client, app):
+    from datetime import date
+    from models.session import Session
+    with app.app_context():
+        token = create_access_token(identity=1)
+        user = User(name="Closed Session User", role="user", active=True)
+        db.session.add_all([user, Session(session_id=1801, start_date=date(2025, 5, 12), end_date=date(2025, 5, 18),
+                                          active=False, auto_participants=False)])
+        db.session.commit()
+        user_id = user.user_id
+    headers = {"Authorization": f"Bearer {token}"}
+
+    missing = client.post("/api/v1/participants/999999/bulk", headers=headers, json={"user_ids": [user_id]})
+    assert missing.status_code == 404
+    closed = client.post("/api/v1/participants/1801/bulk", headers=headers, json={"user_ids": [user_id]})
+    assert closed.status_code == 409
+    assert client.post("/api/v1/participants/1801", headers=headers, json={"user_id": user_id}).status_code == 409
+    with app.app_context():
+        assert SessionParticipant.query.filter_by(session_id=1801).count() == 0
@@ -5,3 +5,66 @@ def test_results_access(client, app):
         token = create_access_token(identity=1)
     response = client.get("/api/v1/results/1", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code in (200, 404)
+
+
+def test_recalculate_ranks_and_bonus(client, app):
+    from extensions import db
+    from models.vote import Vote
+    from models.bonus import BonusParameters
+    with app.app_context():
+        token = create_access_token(identity=1)
+        db.session.add_all([
+            Vote(session_id=42, voter_id=1, target_id=2, score=8),
+            Vote(session_id=42, voter_id=3, target_id=2, score=6),
+            Vote(session_id=42, voter_id=1, target_id=3, score=7),
+            Vote(session_id=42, voter_id=2, target_id=4, score=4),
+            BonusParameters(session_id=42, total_weekly_bonus=1800),
+        ])
+        db.session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/api/v1/results/42/recalculate", headers=headers)
+    assert response.status_code == 202
+    assert response.get_json()["job"]["status"] == "succeeded"
+    results = client.get("/api/v1/results/42", headers=headers).get_json()
+    assert [(r["user_id"], r["rank"], r["votes_received"]) for r in results] == [(2, 1, 2), (3, 1, 1), (4, 3, 1)]
+    assert results[2]["calculation_details"]["dense_rank"] == 2
+    assert results[0]["calculation_details"]["T1_raw_scores"] == [6, 8]
+    assert sum(r["total_bonus"] for r in results) == 1800
+
+
+def test_results_etag_and_cache_invalidation(client, app):
+    from extensions import db
+    from models.vote import Vote
+    from services.results_cache import results_cache
+    with app.app_context():
+        token = create_access_token(identity=1)
+        db.session.add_all([Vote(session_id=43, voter_id=1, target_id=2, score=9),
+                            Vote(session_id=43, voter_id=2, target_id=1, score=3)])
+        db.session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/api/v1/results/43/recalculate", headers=headers)
+
+    first = client.get("/api/v1/results/43", headers=headers)
+    etag = first.headers["ETag"]
+    with app.app_context():
+        hits = results_cache().stats["hits"]
+    assert client.get("/api/v1/results/43", headers={**headers, "If-None-Match": etag}).status_code == 304
+    with app.app_context():
+        assert results_cache().stats["hits"] == hits + 1
+
+    with app.app_context():
+        vote_id = Vote.query.filter_by(session_id=43, target_id=2).first().vote_id
+    client.patch(f"/api/v1/votes/{vote_id}", json={"new_score": 1}, headers=headers)
+    client.post("/api/v1/results/43/recalculate", headers=headers)
+    second = client.get("/api/v1/results/43", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200 and second.headers["ETag"] != etag
+    assert [r["user_id"] for r in second.get_json()] == [1, 2]
+
+
+def test_out_of_scale_scores_do_not_widen_histogram():
+    import numpy as np
+    from services.bonus_calc import compute_session_results
+    results = compute_session_results(np.array([1, 1, 2, 2]), np.array([6, 10**9, 4, -5]),
+                                      np.array([1, 1, 2, 1]), scale_min=0, scale_max=10)
+    assert [(r["user_id"], r["average_score"], r["votes_received"]) for r in results] == [(1, 6.0, 1), (2, 4.0, 2)]
+    assert results[1]["calculation_details"]["T1_raw_scores"] == [4, 4]
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import pytest
+from extensions import db
+from models.auth import AuthSession, RevokedToken
+from models.job import ScheduledTask
+from services.cron import CronExpression, CronError
+from services.scheduler import Scheduler
+from services.token_blocklist import hash_token
+
+
+def test_cron_next_after():
+    assert CronExpression("0 2 * * *").next_after(datetime(2025, 3, 1, 2, 0)) == datetime(2025, 3, 2, 2, 0)
+    assert CronExpression("*/15 9-17 * * 1-5").next_after(datetime(2025, 3, 7, 17, 50)) == datetime(2025, 3, 10, 9, 0)
+    # день месяца или день недели, как в cron: 13-е число либо пятница
+    assert CronExpression("0 0 13 * 5").next_after(datetime(2025, 6, 1)) == datetime(2025, 6, 6)
+    assert CronExpression("@monthly").next_after(datetime(2025, 12, 31, 23, 59)) == datetime(2026, 1, 1)
+    for bad in ("* * *", "60 * * * *", "*/0 * * * *", "0 0 30 2 *"):
+        with pytest.raises(CronError):
+            CronExpression(bad).next_after(datetime(2025, 1, 1))
+
+
+def test_scheduler_runs_each_due_once_across_workers(app):
+    calls = []
+    workers = [Scheduler(), Scheduler()]
+    for worker in workers:
+        worker.app = app
+        worker.register("probe", "*/5 * * * *", lambda: calls.append(1) or {"calls": len(calls)})
+    due = workers[0].tasks["probe"].next_due
+    assert [w.run_pending(now=due) for w in workers] == [["probe"], []]
+    assert workers[1].tasks["probe"].stats["skipped"] == 1
+    assert len(calls) == 1
+    with app.app_context():
+        state = db.session.get(ScheduledTask, "probe")
+        assert (state.last_status, state.last_result, state.last_due) == ("succeeded", {"calls": 1}, due)
+
+    workers[0].tasks["probe"].fn = lambda: 1 / 0
+    later = workers[0].tasks["probe"].next_due
+    assert workers[0].run_pending(now=later) == ["probe"]
+    assert workers[0].tasks["probe"].stats["failed"] == 1
+    with app.app_context():
+        assert db.session.get(ScheduledTask, "probe").last_error == "division by zero"
+
+
+def test_auth_cleanup_task_deletes_expired_rows(app):
+    from services.scheduler import scheduler
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add_all([
+            AuthSession(user_id=1, token_hash="expired", expires_at=now - timedelta(hours=1)),
+            AuthSession(user_id=1, token_hash="alive", expires_at=now + timedelta(hours=1)),
+            RevokedToken(token_hash=hash_token("old-exp"), user_id=1, expires_at=now - timedelta(minutes=1)),
+            RevokedToken(token_hash=hash_token("old-noexp"), user_id=1, revoked_at=now - timedelta(days=30)),
+            RevokedToken(token_hash=hash_token("fresh"), user_id=1, expires_at=now + timedelta(days=1)),
+        ])
+        db.session.commit()
+    output = app.test_cli_runner().invoke(args=["scheduler", "run", "auth_cleanup"]).output
+    assert "auth_cleanup: succeeded" in output
+    with app.app_context():
+        assert {s.token_hash for s in AuthSession.query.filter(AuthSession.token_hash.in_(["expired", "alive"]))} == {"alive"}
+        assert not RevokedToken.query.filter(RevokedToken.token_hash.in_([hash_token("old-exp"), hash_token("old-noexp")])).count()
+        assert db.session.get(RevokedToken, hash_token("fresh")) is not None
+    assert scheduler.tasks["auth_cleanup"].stats["runs"] >= 1
+    assert "db_vacuum: succeeded" in app.test_cli_runner().invoke(args=["scheduler", "run", "db_vacuum"]).output
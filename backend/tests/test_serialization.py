@@ -0,0 +1,30 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from extensions import db
+from models import User, Session, SessionParticipant, Result, AuditLog
+from services.serialization import USER, SESSION, PARTICIPANT, RESULT, AUDIT_LOG
+
+
+def test_projections_match_to_dict(app):
+    with app.app_context():
+        user = User(name="Проекция", email="p@example.com", telegram_id=880001, role="admin", active=True)
+        session = Session(start_date=date(2025, 4, 7), end_date=date(2025, 4, 13), closed_at=datetime(2025, 4, 13, 18, 0))
+        db.session.add_all([user, session]); db.session.flush()
+        db.session.add_all([
+            SessionParticipant(session_id=session.session_id, user_id=user.user_id, can_vote=False),
+            Result(session_id=session.session_id, user_id=user.user_id, average_score=Decimal("7.25"), rank=1,
+                   total_bonus=Decimal("1800.50"), votes_received=4, calculated_at=datetime(2025, 4, 13, 18, 0, 1, 500),
+                   calculation_details={"dense_rank": 1}),
+            AuditLog(user_id=user.user_id, action="projection", details={"k": [1, 2]}, session_id=session.session_id,
+                     timestamp=datetime(2025, 4, 13, 18, 0, 2)),
+        ])
+        db.session.commit()
+
+        cases = [(USER, User.user_id == user.user_id), (SESSION, Session.session_id == session.session_id),
+                 (PARTICIPANT, SessionParticipant.session_id == session.session_id),
+                 (RESULT, Result.session_id == session.session_id), (AUDIT_LOG, AuditLog.action == "projection")]
+        for projection, condition in cases:
+            objects = projection.model.query.filter(condition).all()
+            rows = projection.query(db.session).filter(condition).all()
+            assert objects and json.loads(projection.dumps(rows)) == json.loads(json.dumps([o.to_dict() for o in objects]))
@@ -12,3 +12,114 @@ def test_get_sessions(client, app):
         token = create_access_token(identity=1)
     response = client.get("/api/v1/sessions/", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
+
+
+def test_progress_stream_pushes_vote_deltas(client, app):
+    import json
+    from extensions import db
+    from models.session import SessionParticipant
+    from models.user import User
+    with app.app_context():
+        users = [User(name=f"Progress {i}", role="user", active=True) for i in range(3)]
+        db.session.add_all(users); db.session.commit()
+        ids = [u.user_id for u in users]
+        admin, voter = create_access_token(identity=ids[0]), create_access_token(identity=ids[1])
+    session_id = client.post("/api/v1/sessions/", json={"start_date": "2025-11-03", "end_date": "2025-11-09",
+                                                        "auto_participants": False},
+                             headers={"Authorization": f"Bearer {admin}"}).get_json()["session"]["session_id"]
+    client.post(f"/api/v1/participants/{session_id}/bulk", json={"user_ids": ids},
+                headers={"Authorization": f"Bearer {admin}"})
+
+    stream_token = client.post(f"/api/v1/sessions/{session_id}/progress/token",
+                               headers={"Authorization": f"Bearer {admin}"}).get_json()["token"]
+    response = client.get(f"/api/v1/sessions/{session_id}/progress/stream?jwt={stream_token}")
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+
+    def next_event():
+        chunk = next(chunks)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        while not chunk.startswith("event: progress"):
+            chunk = next(chunks); chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        return json.loads(chunk.split("data: ", 1)[1])
+
+    first = next_event()
+    assert (first["eligible_voters"], first["voted_count"], first["votes_count"]) == (3, 0, 0)
+    client.post("/api/v1/votes/", json={"session_id": session_id, "votes": [{"target_id": ids[0], "score": 7},
+                                                                             {"target_id": ids[2], "score": 5}]},
+                headers={"Authorization": f"Bearer {voter}"})
+    update = next_event()
+    assert update["voted_count"] == 1 and update["votes_count"] == 2
+    assert update["participation_rate"] == round(1 / 3, 4)
+    assert update["delta"] == {"voted_count": 1, "votes_count": 2}
+
+    client.post(f"/api/v1/sessions/{session_id}/close", headers={"Authorization": f"Bearer {admin}"})
+    assert next_event()["active"] is False
+    assert list(chunks) == []
+    response.close()
+    with app.app_context():
+        assert SessionParticipant.query.filter_by(session_id=session_id).count() == 3
+
+
+def test_progress_hub_wakes_only_subscribers_of_the_session(app):
+    from services.eligibility import SessionEligibility
+    from services.progress import ProgressHub
+    hub = ProgressHub()
+    eligibility = SessionEligibility(None, True, frozenset({1, 2}), frozenset({1, 2}), None, 0)
+    with app.test_request_context():
+        first, other = hub._resync(9101, lambda: eligibility), hub._resync(9102, lambda: eligibility)
+    assert first.changed is not other.changed
+    before = other.version
+    hub.record_ballot(9101, 1, 2)
+    assert (first.voters, first.votes_count, other.version) == ({1}, 2, before)
+    assert hub.stats["events"] == 1
+
+
+def test_session_list_pages_cover_null_keys(client, app):
+    from datetime import date
+    from extensions import db
+    from models.session import Session
+    with app.app_context():
+        token = create_access_token(identity=1)
+        db.session.add_all([Session(session_id=9200 + i, start_date=date(2025, 1, 6), end_date=date(2025, 1, 12))
+                            for i in range(3)])
+        db.session.commit()
+        db.session.execute(db.update(Session).where(Session.session_id.in_([9200, 9201])).values(created_at=None))
+        db.session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    full = client.get("/api/v1/sessions/", headers=headers)
+    assert "X-Next-Cursor" not in full.headers
+    expected = [s["session_id"] for s in full.get_json()]
+    assert {9200, 9201, 9202} <= set(expected)
+    paged, cursor = [], None
+    while True:
+        response = client.get("/api/v1/sessions/?limit=2" + (f"&after={cursor}" if cursor else ""), headers=headers)
+        paged += [s["session_id"] for s in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert paged == expected
+    assert client.get("/api/v1/audit/?user_id=abc", headers=headers).status_code == 400
+
+
+def test_progress_stream_query_token_is_scoped_and_revocable(client, app):
+    from datetime import date
+    from extensions import db
+    from models.session import Session
+    with app.app_context():
+        db.session.add(Session(session_id=9301, start_date=date(2025, 2, 3), end_date=date(2025, 2, 9)))
+        db.session.commit()
+        login = create_access_token(identity=1)
+    headers = {"Authorization": f"Bearer {login}"}
+    stream_token = client.post("/api/v1/sessions/9301/progress/token", headers=headers).get_json()["token"]
+
+    # токен входа в URL не принимается, токен стрима — только в своём стриме
+    assert client.get(f"/api/v1/sessions/9301/progress/stream?jwt={login}").status_code == 403
+    assert client.get("/api/v1/sessions/9302/progress/stream?jwt=" + stream_token).status_code == 403
+    assert client.get("/api/v1/users/", headers={"Authorization": f"Bearer {stream_token}"}).status_code == 403
+    assert client.post("/api/v1/sessions/404404/progress/token", headers=headers).status_code == 404
+
+    # logout отзывает и выданный токен стрима
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 200
+    assert client.get(f"/api/v1/sessions/9301/progress/stream?jwt={stream_token}").status_code == 401
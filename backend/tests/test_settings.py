@@ -8,3 +8,32 @@ def test_update_setting(client, app):
                             headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.get_json()["status"] == "success"
+
+
+def test_settings_cache_read_through_and_invalidation(client, app):
+    from extensions import db
+    from models.settings import SystemSetting
+    from services.settings_service import get_setting, settings_cache
+    with app.app_context():
+        token = create_access_token(identity=1)
+        headers = {"Authorization": f"Bearer {token}"}
+        client.patch("/api/v1/settings/vote_scale_max", json={"value": 10}, headers=headers)
+        stats = settings_cache().stats
+        misses = stats["misses"]
+        assert get_setting("vote_scale_max") == 10
+        assert get_setting("vote_scale_max") == 10
+        assert stats["misses"] == misses + 1 and stats["hits"] >= 1
+
+        client.patch("/api/v1/settings/vote_scale_max", json={"value": 5}, headers=headers)
+        assert get_setting("vote_scale_max") == 5
+
+        # запись «другим воркером» мимо set_setting замечается по версии таблицы
+        app.config["SETTINGS_VERSION_CHECK_INTERVAL"] = 0
+        db.session.get(SystemSetting, "vote_scale_max").setting_value = 7
+        db.session.commit()
+        assert get_setting("vote_scale_max") == 7
+        app.config["SETTINGS_VERSION_CHECK_INTERVAL"] = 1.0
+        client.patch("/api/v1/settings/vote_scale_max", json={"value": 10}, headers=headers)
+
+    assert client.get("/api/v1/settings/", headers=headers).get_json()["vote_scale_max"] == 10
+    assert "hits" in client.get("/api/v1/settings/cache", headers=headers).get_json()
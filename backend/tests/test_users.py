@@ -5,3 +5,94 @@ def test_user_list(client, app):
         token = create_access_token(identity=1)
     response = client.get("/api/v1/users/", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
+
+
+def test_user_list_keyset_pagination(client, app):
+    from extensions import db
+    from models.user import User
+    with app.app_context():
+        token = create_access_token(identity=1)
+        db.session.add_all([User(name=f"Page {i:02d}", role="manager", active=i % 2 == 0) for i in range(7)])
+        db.session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    names, cursor = [], None
+    while True:
+        query = "role=manager&limit=3" + (f"&after={cursor}" if cursor else "")
+        response = client.get(f"/api/v1/users/?{query}", headers=headers)
+        names += [u["name"] for u in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert names == [f"Page {i:02d}" for i in range(7)]
+
+    inactive = client.get("/api/v1/users/?role=manager&active=false", headers=headers).get_json()
+    assert [u["name"] for u in inactive] == ["Page 01", "Page 03", "Page 05"]
+    assert client.get("/api/v1/users/?after=garbage", headers=headers).status_code == 400
+
+
+def test_bulk_user_import_streams_csv_and_jsonl(client, app):
+    import io, json
+    from extensions import db
+    from models.user import User
+    from models.audit import AuditLog
+    from services.telegram_auth import telegram_user_cache
+    with app.app_context():
+        token = create_access_token(identity=1)
+        db.session.add(User(name="Old Name", telegram_id=660001, role="user"))
+        db.session.commit()
+    telegram_user_cache.set(660001, {"name": "Old Name"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    csv_body = "telegram_id,name,username,role,active\n660001,Renamed,renamed,user,true\n" + "".join(
+        f"{660100 + i},Imported {i},imp{i},user,{'true' if i % 2 else 'false'}\n" for i in range(5)) + "bad,No Id,,user,true\n"
+    response = client.post("/api/v1/users/bulk?format=csv", data=io.BytesIO(csv_body.encode()),
+                           content_type="text/csv", headers=headers)
+    body = response.get_json()
+    assert (body["inserted"], body["updated"], body["failed"]) == (5, 1, 1)
+    assert body["errors"][0]["line"] == 8
+    assert telegram_user_cache.get(660001) is None
+
+    lines = [{"email": "Hr.Sync@example.com", "name": "By Email"}, {"email": "hr.sync@example.com", "name": "By Email 2"},
+             {"name": "Nameless key"}, {"telegram_id": 660001, "name": "Renamed Again"}]
+    response = client.post("/api/v1/users/bulk?progress=true", headers=headers, content_type="application/x-ndjson",
+                           data="\n".join(json.dumps(l) for l in lines) + "\nnot json\n")
+    progress = [json.loads(l) for l in response.get_data(as_text=True).splitlines()]
+    assert progress[-1]["done"] and (progress[-1]["inserted"], progress[-1]["updated"], progress[-1]["failed"]) == (1, 1, 2)
+
+    with app.app_context():
+        assert User.query.filter_by(telegram_id=660001).one().name == "Renamed Again"
+        assert User.query.filter_by(email="hr.sync@example.com").one().name == "By Email 2"
+        assert User.query.filter_by(telegram_id=660102).one().active is False
+        assert AuditLog.query.filter_by(action="users_imported").count() == 2  # одна запись на пачку
+
+
+def test_bulk_user_import_mixed_optional_fields(client, app):
+    import json
+    from models.user import User
+    with app.app_context():
+        token = create_access_token(identity=1)
+    headers = {"Authorization": f"Bearer {token}"}
+    lines = [{"name": "A", "email": "mixed.a@x", "username": "ua"}, {"name": "B", "email": "mixed.b@x", "role": "admin"},
+             {"telegram_id": 661001, "name": "T"}]
+    post = lambda rows: client.post("/api/v1/users/bulk", headers=headers, content_type="application/x-ndjson",
+                                    data="\n".join(json.dumps(r) for r in rows)).get_json()
+    body = post(lines)
+    assert (body["inserted"], body["updated"], body["failed"], body["chunks"]) == (3, 0, 0, 1)
+    # обновление существующих по email — тоже с разными наборами полей
+    body = post([{"name": "A2", "email": "mixed.a@x", "active": False}, {"name": "B2", "email": "mixed.b@x"}])
+    assert (body["updated"], body["failed"]) == (2, 0)
+    with app.app_context():
+        a, b = (User.query.filter_by(email=e).one() for e in ("mixed.a@x", "mixed.b@x"))
+        assert (a.name, a.telegram_username, a.active) == ("A2", "ua", False)
+        assert (b.name, b.role, b.active) == ("B2", "admin", True)
+
+
+def test_lru_cache_ttl_expires_entries(monkeypatch):
+    from services import lru_cache
+    cache = lru_cache.LRUCache(maxsize=4, ttl=60)
+    cache.set("user", {"role": "user"})
+    assert cache.get("user") == {"role": "user"}
+    now = lru_cache.time.monotonic()
+    monkeypatch.setattr(lru_cache.time, "monotonic", lambda: now + 61)
+    assert cache.get("user") is None and len(cache) == 0
@@ -1,6 +1,30 @@
+from datetime import date
 from flask_jwt_extended import create_access_token
+from extensions import db
+from models.session import Session, SessionParticipant
+from services.eligibility import eligibility_index
+
+
+def _enroll(app, session_id, user_ids, **flags):
+    with app.app_context():
+        # голосовать можно только в открытой сессии; другие тесты могли её закрыть
+        session = db.session.get(Session, session_id)
+        if session is None:
+            db.session.add(Session(session_id=session_id, start_date=date(2025, 1, 6), end_date=date(2025, 1, 12),
+                                   auto_participants=False))
+        else:
+            session.active = True
+        # сессия могла уже получить участников через auto_participants
+        SessionParticipant.query.filter(SessionParticipant.session_id == session_id,
+                                        SessionParticipant.user_id.in_(user_ids)).delete()
+        db.session.add_all([SessionParticipant(session_id=session_id, user_id=u, **flags) for u in user_ids])
+        db.session.commit()
+        # участники добавлены в обход маршрутов — индекс прав сбрасывается вручную
+        eligibility_index().invalidate(session_id)
+
 
 def test_vote_submission(client, app):
+    _enroll(app, 1, [1, 2, 3])
     with app.app_context():
         token = create_access_token(identity=1)
     payload = {
@@ -13,3 +37,125 @@ def test_vote_submission(client, app):
     response = client.post("/api/v1/votes/", json=payload, headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.get_json()["status"] == "success"
+
+
+def test_vote_submission_checks_eligibility(client, app):
+    _enroll(app, 8, [1, 2])
+    _enroll(app, 8, [3], can_receive_votes=False)
+    _enroll(app, 8, [4], can_vote=False)
+    with app.app_context():
+        voter, outsider = create_access_token(identity=1), create_access_token(identity=4)
+    payload = {"session_id": 8, "votes": [{"target_id": 2, "score": 8}, {"target_id": 3, "score": 9}, {"target_id": 99, "score": 5}]}
+
+    response = client.post("/api/v1/votes/", json=payload, headers={"Authorization": f"Bearer {voter}"})
+    assert response.get_json()["saved"] == 1
+    assert response.get_json()["rejected"] == [3, 99]
+
+    response = client.post("/api/v1/votes/", json=payload, headers={"Authorization": f"Bearer {outsider}"})
+    assert response.status_code == 403
+
+
+def test_eligibility_index_follows_participants_and_close(client, app):
+    _enroll(app, 9, [1, 2, 3])
+    with app.app_context():
+        token = create_access_token(identity=1)
+        stats = eligibility_index().stats
+    headers = {"Authorization": f"Bearer {token}"}
+    ballot = {"session_id": 9, "votes": [{"target_id": 2, "score": 7}, {"target_id": 3, "score": 5}]}
+
+    assert client.post("/api/v1/votes/", json=ballot, headers=headers).get_json()["saved"] == 2
+    misses = stats["misses"]
+    assert client.post("/api/v1/votes/", json=ballot, headers=headers).get_json()["saved"] == 2
+    assert stats["misses"] == misses
+
+    client.patch("/api/v1/participants/9/bulk", json={"user_ids": [3], "status": "vacation"}, headers=headers)
+    assert client.post("/api/v1/votes/", json=ballot, headers=headers).get_json()["rejected"] == [3]
+
+    client.post("/api/v1/sessions/9/close", headers=headers)
+    assert client.post("/api/v1/votes/", json=ballot, headers=headers).status_code == 409
+    assert client.post("/api/v1/votes/", json={**ballot, "session_id": 10**9}, headers=headers).status_code == 404
+
+
+def test_votes_maintain_score_aggregates(client, app):
+    from models.aggregate import ScoreAggregate
+    from models.vote import Vote
+    _enroll(app, 7, [2, 3, 5])
+    with app.app_context():
+        token = create_access_token(identity=5)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/api/v1/votes/", json={"session_id": 7, "votes": [{"target_id": 2, "score": 8}, {"target_id": 3, "score": 4}]}, headers=headers)
+    client.post("/api/v1/votes/", json={"session_id": 7, "votes": [{"target_id": 2, "score": 6}]}, headers=headers)
+    with app.app_context():
+        agg = ScoreAggregate.query.get((7, 2))
+        assert (agg.score_sum, agg.vote_count, agg.min_score, agg.max_score, agg.histogram) == (6, 1, 6, 6, {"6": 1})
+        vote_id = Vote.query.filter_by(session_id=7, target_id=3).first().vote_id
+
+    assert client.patch(f"/api/v1/votes/{vote_id}", json={"new_score": 10}, headers=headers).status_code == 200
+    live = client.get("/api/v1/results/7/live", headers=headers).get_json()
+    assert [(r["user_id"], r["average_score"]) for r in live] == [(3, 10.0), (2, 6.0)]
+
+    assert client.delete(f"/api/v1/votes/{vote_id}", headers=headers).status_code == 200
+    job = client.post("/api/v1/results/7/recalculate", headers=headers).get_json()["job"]
+    assert job["result"] == {"results_count": 1, "aggregate_mismatches": []}
+    assert [r["user_id"] for r in client.get("/api/v1/results/7", headers=headers).get_json()] == [2]
+
+
+def test_vote_idempotency_key_and_rate_limit(client, app):
+    from models.vote import Vote
+    from services.rate_limit import rate_limiter
+    from services.idempotency import idempotency_store
+    _enroll(app, 12, [1, 2, 3])
+    with app.app_context():
+        token = create_access_token(identity=3)
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "ballot-12-3"}
+    ballot = {"session_id": 12, "votes": [{"target_id": 1, "score": 6}, {"target_id": 2, "score": 9}]}
+
+    first = client.post("/api/v1/votes/", json=ballot, headers=headers)
+    with app.app_context():
+        Vote.query.filter_by(session_id=12).delete(); db.session.commit()
+    replay = client.post("/api/v1/votes/", json=ballot, headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true" and replay.get_json() == first.get_json()
+    with app.app_context():
+        assert Vote.query.filter_by(session_id=12).count() == 0  # повтор в БД не ходил
+    assert client.post("/api/v1/votes/", json={**ballot, "votes": []}, headers=headers).status_code == 422
+    assert idempotency_store.stats["replayed"] >= 1
+
+    rate_limiter.enabled, rate_limiter.burst = True, 2
+    try:
+        del headers["Idempotency-Key"]
+        codes = [client.post("/api/v1/votes/", json=ballot, headers=headers).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        limited = client.post("/api/v1/votes/", json=ballot, headers=headers)
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert rate_limiter.stats["limited"] >= 2
+    finally:
+        rate_limiter.enabled, rate_limiter.burst = False, 5
+
+
+def test_vote_submission_validates_ballot(client, app):
+    from models.vote import Vote
+    _enroll(app, 2801, [1, 2, 3])
+    with app.app_context():
+        token = create_access_token(identity=1)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def submit(*votes, session_id=2801):
+        return client.post("/api/v1/votes/", json={"session_id": session_id, "votes": list(votes)}, headers=headers)
+
+    for bad in ({"target_id": 2, "score": "8"}, {"target_id": 2}, {"target_id": 2, "score": 1.5},
+                {"target_id": 2, "score": 50000}, {"target_id": 2, "score": -1}, {"target_id": 2, "score": True},
+                {"target_id": "2", "score": 8}, {"score": 8}, 7):
+        response = submit({"target_id": 3, "score": 5}, bad)
+        assert response.status_code == 400, bad
+        assert "votes[1]" in response.get_json()["message"]
+    assert client.post("/api/v1/votes/", json={"session_id": 2801, "votes": {"2": 8}}, headers=headers).status_code == 400
+    assert submit({"target_id": 2, "score": 8}, session_id="2801").status_code == 400
+    with app.app_context():
+        # ни одна оценка из отклонённых бюллетеней не записана
+        assert Vote.query.filter_by(session_id=2801).count() == 0
+
+    assert submit({"target_id": 2, "score": 10}, {"target_id": 3, "score": 0}).get_json()["saved"] == 2
+    with app.app_context():
+        vote_id = Vote.query.filter_by(session_id=2801, target_id=2).first().vote_id
+    assert client.patch(f"/api/v1/votes/{vote_id}", json={"new_score": 11}, headers=headers).status_code == 400
+    assert client.patch(f"/api/v1/votes/{vote_id}", json={}, headers=headers).status_code == 400
@@ -0,0 +1,63 @@
+import threading
+import pytest
+from flask import Flask
+from sqlalchemy import insert, text
+from extensions import db, sqlite_engine_options, install_sqlite_profile
+from models.audit import AuditLog
+from services.write_lane import WriteLane
+
+
+@pytest.fixture()
+def file_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'lane.db'}", SQLITE_WRITE_LANE=True)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options(app.config)
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_profile(db.engine, app.config)
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _insert(action):
+    db.session.execute(insert(AuditLog), [{"action": action}])
+    if action == "boom":
+        raise ValueError("boom")
+    return action
+
+
+def test_sqlite_profile_pragmas(file_app):
+    with file_app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_write_lane_group_commit_isolates_failures(file_app):
+    lane = WriteLane()
+    lane.init_app(file_app)
+    errors = []
+
+    def worker(n):
+        with file_app.app_context():
+            for i in range(20):
+                action = "boom" if n == 0 and i == 5 else f"w{n}-{i}"
+                try:
+                    assert lane.run(_insert, action) == action
+                except ValueError:
+                    errors.append(action)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lane.close()
+
+    assert errors == ["boom"]
+    assert lane.stats["ops"] == 160 and lane.stats["batches"] <= 160
+    with file_app.app_context():
+        actions = [a for (a,) in db.session.execute(text("SELECT action FROM audit_log"))]
+    assert len(actions) == 159 and "boom" not in actions